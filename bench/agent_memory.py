@@ -0,0 +1,134 @@
+## agent_memory.py
+"""Report the memory used per agent by the agent engine.
+
+Run from the repository root:
+
+    python bench/agent_memory.py --people 100000
+
+To compare with an earlier version of the models, give the git revision to
+measure as the baseline, e.g. the commit before a change:
+
+    python bench/agent_memory.py --people 100000 --baseline HEAD~1
+"""
+import os
+import sys
+import gc
+import json
+import tarfile
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+APP_DIR = os.path.join(REPO_DIR, 'streamlit_app')
+
+## Extra parameters each model type needs, beyond those they share
+EXTRA_PARAMETERS = {
+    'Generic': {},
+    'Smoke': {
+        'intervention_effect': 1.1,
+        'initial_smoking_prob': 0.5,
+        'quit_attempt_prob': 0.01,
+        'base_smoke_relapse_prob': 0.01
+    }
+}
+
+## Function to import the model classes from an app directory
+def load_models(app_dir = APP_DIR):
+    """Return the model class for each model type, imported from app_dir"""
+    sys.path.insert(0, os.path.abspath(app_dir))
+    from model_two_types_mecc import MECC_Model, SmokeModel_MECC_Model
+    return {'Generic': MECC_Model, 'Smoke': SmokeModel_MECC_Model}
+
+## Function to measure the memory allocated while building a model
+def bytes_per_agent(model_type, N_people, N_service=1, breakdown=None, models=None):
+    """Return the bytes allocated per agent while constructing a model.
+
+    If a breakdown dictionary is given it is filled with the bytes per agent
+    allocated from each source file.
+    """
+    model_class = (models or load_models())[model_type]
+    gc.collect()
+    tracemalloc.start()
+    model = model_class(N_people=N_people
+                        , N_service=N_service
+                        , mecc_effect=0.9
+                        , base_make_intervention_prob=0.1
+                        , visit_prob=0.1
+                        , mecc_trained=False
+                        , seed=0
+                        , **EXTRA_PARAMETERS[model_type])
+    allocated, _ = tracemalloc.get_traced_memory()
+    if breakdown is not None:
+        for statistic in tracemalloc.take_snapshot().statistics('filename'):
+            filename = os.path.basename(statistic.traceback[0].filename)
+            breakdown[filename] = round(statistic.size / (N_people + N_service), 1)
+    tracemalloc.stop()
+    del model
+    return allocated / (N_people + N_service)
+
+## Function to measure every model type
+def measure(people, app_dir = APP_DIR):
+    """Return the bytes per agent and the breakdown by source file for each model type"""
+    models = load_models(app_dir)
+    results = {}
+    breakdowns = {}
+    for model_type in models:
+        breakdowns[model_type] = {}
+        results[model_type] = round(bytes_per_agent(model_type, people
+                                                    , breakdown=breakdowns[model_type]
+                                                    , models=models), 1)
+    return {'people': people, 'bytes_per_agent': results, 'breakdown': breakdowns}
+
+## Function to measure the models as they were at a git revision
+def measure_revision(people, revision):
+    """Return measure() for the models at a git revision, run in a separate process
+    so the two versions of the models are never imported together"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        archive_path = os.path.join(temp_dir, 'app.tar')
+        subprocess.run(['git', 'archive', '--output', archive_path, revision, 'streamlit_app']
+                       , cwd=REPO_DIR, check=True)
+        with tarfile.open(archive_path) as archive:
+            archive.extractall(temp_dir)
+
+        output_path = os.path.join(temp_dir, 'baseline.json')
+        subprocess.run([sys.executable, os.path.abspath(__file__)
+                        , '--people', str(people)
+                        , '--app-dir', os.path.join(temp_dir, 'streamlit_app')
+                        , '--output', output_path]
+                       , check=True, stdout=subprocess.DEVNULL)
+        with open(output_path) as f:
+            return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--people', type=int, default=100_000)
+    parser.add_argument('--baseline', metavar='REVISION'
+                        , help="git revision whose models are measured for comparison")
+    parser.add_argument('--app-dir', default=APP_DIR, help=argparse.SUPPRESS)
+    parser.add_argument('--output', help="optional JSON file for the results")
+    args = parser.parse_args()
+
+    current = measure(args.people, args.app_dir)
+    baseline = measure_revision(args.people, args.baseline) if args.baseline else None
+
+    for model_type, value in current['bytes_per_agent'].items():
+        if baseline is None:
+            print(f"{model_type:>8}: {value:8.1f} bytes per agent ({args.people} people)")
+        else:
+            before = baseline['bytes_per_agent'][model_type]
+            print(f"{model_type:>8}: {value:8.1f} bytes per agent, {before:8.1f} at {args.baseline}"
+                  f" ({value / before - 1:+.0%}, {args.people} people)")
+        ## the largest sources of the allocations
+        for filename, size in sorted(current['breakdown'][model_type].items(), key=lambda item: -item[1])[:4]:
+            print(f"{'':>10}{size:8.1f}  {filename}")
+
+    if args.output:
+        if baseline is not None:
+            current['baseline'] = dict(baseline, revision=args.baseline)
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=4)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+## run_benchmarks.py
+"""Time model construction, stepping, data collection, the Monte Carlo loop and the figures.
+
+Run from the repository root:
+
+    python bench/run_benchmarks.py                       # full run, N_people 50 to 1M
+    python bench/run_benchmarks.py --quick               # small sizes, for a quick check
+
+Results are written to JSON (bench/results.json by default). Timings depend
+on the machine, so no baseline is kept in the repository: record one before
+a change and compare against it afterwards, on the same machine and with
+the same settings:
+
+    python bench/run_benchmarks.py --save-baseline bench/baseline.json
+    python bench/run_benchmarks.py --baseline bench/baseline.json
+
+With --baseline the exit code is 1 if any benchmark is slower than the
+tolerance allows. A baseline run with other settings is refused, and one
+recorded on a different machine or Python is compared with a warning.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'streamlit_app'))
+from streamlit_model_functions import (
+    create_MECC_model,
+    run_simulation,
+    create_population_figure,
+    create_intervention_figure,
+    create_multi_intervention_figure,
+    create_metrics_figure,
+    update_figure_data
+)
+from monte_carlo_runner import run_monte_carlo
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+##################################
+### Settings
+##################################
+
+## model parameters shared by every benchmark, N_people and num_steps are set per run
+BASE_PARAMETERS = {
+    "model_seed": 42,
+    "N_service": 1,
+    "visit_prob": 0.1,
+    "base_make_intervention_prob": 0.1,
+    "mecc_effect": 0.9,
+    "initial_smoking_prob": 0.5,
+    "quit_attempt_prob": 0.01,
+    "base_smoke_relapse_prob": 0.01,
+    "intervention_effect": 1.1,
+    "animation_speed": 0
+}
+
+FULL_SETTINGS = {
+    'sizes': [50, 1_000, 10_000, 100_000, 1_000_000],
+    'num_steps': 12,
+    'iterations': 10,
+    ## the Monte Carlo loop runs 2 * iterations models, so it is limited to smaller populations
+    'max_monte_carlo_people': 10_000
+}
+
+QUICK_SETTINGS = {
+    'sizes': [50, 1_000],
+    'num_steps': 3,
+    'iterations': 2,
+    'max_monte_carlo_people': 1_000
+}
+
+##################################
+### Timing Functions
+##################################
+
+## Function to time a function
+def time_function(function, min_time=0.2, max_repeats=5):
+    """Call function repeatedly and return timing statistics in seconds.
+
+    Repeats until min_time has passed or max_repeats calls have been made,
+    so slow benchmarks at large sizes only run once.
+    """
+    timings = []
+    while not timings or (sum(timings) < min_time and len(timings) < max_repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return {
+        'median': statistics.median(timings),
+        'min': min(timings),
+        'repeats': len(timings)
+    }
+
+## Function to time the model benchmarks for one population size
+def model_benchmarks(model_type, engine, N_people, num_steps):
+    """Return timings for construction, step, collect and get_model_vars_dataframe"""
+    parameters = {**BASE_PARAMETERS, "N_people": N_people, "num_steps": num_steps}
+    results = {}
+
+    results['construct'] = time_function(
+        lambda: create_MECC_model(parameters, model_type=model_type, engine=engine))
+
+    ## one model is stepped through the run and each step timed
+    model = create_MECC_model(parameters, model_type=model_type, engine=engine)
+    step_timings = []
+    for _ in range(num_steps):
+        start = time.perf_counter()
+        model.step()
+        step_timings.append(time.perf_counter() - start)
+    results['step'] = {
+        'median': statistics.median(step_timings),
+        'min': min(step_timings),
+        'repeats': len(step_timings)
+    }
+
+    ## the collected data is restored after timing collect so the DataFrame holds one row per step
+    datacollector = model.datacollector
+    model_vars = {name: list(values) for name, values in datacollector.model_vars.items()}
+    results['collect'] = time_function(lambda: datacollector.collect(model))
+    datacollector.model_vars = model_vars
+    results['get_model_vars_dataframe'] = time_function(datacollector.get_model_vars_dataframe)
+    return results
+
+## Function to time the figure builders on a run's data
+def figure_benchmarks(model_type, engine, N_people, num_steps):
+    """Return timings for the single run figures"""
+    parameters = {**BASE_PARAMETERS, "N_people": N_people, "num_steps": num_steps}
+    data = [run_simulation(create_MECC_model(parameters, model_type=model_type
+                                             , mecc_trained=mecc_trained, engine=engine), num_steps)
+            for mecc_trained in [False, True]]
+    step = num_steps - 1
+
+    results = {'intervention_figure': time_function(lambda: create_intervention_figure(*data, step))}
+    ## the live pages build each figure once and then only replace its data
+    intervention_figure = create_intervention_figure(*data, 0)
+    results['update_intervention_figure'] = time_function(
+        lambda: update_figure_data(intervention_figure, *data, step))
+    if model_type == 'Smoke':
+        results['population_figure'] = time_function(lambda: create_population_figure(*data, step))
+        results['metrics_figure'] = time_function(lambda: create_metrics_figure(*data, step))
+    return results
+
+## Function to time the Monte Carlo loop and its figure
+def monte_carlo_benchmarks(engine, N_people, num_steps, iterations):
+    """Return timings for run_monte_carlo, as run by the Monte Carlo page, and its figure"""
+    parameters = {**BASE_PARAMETERS, "N_people": N_people, "num_steps": num_steps}
+    mc_data = {}
+
+    def run():
+        mc_data['data'] = run_monte_carlo(parameters, iterations, model_type='Generic'
+                                          , engine=engine, max_workers=1)
+
+    results = {'monte_carlo': time_function(run, max_repeats=1)}
+    results['multi_intervention_figure'] = time_function(
+        lambda: create_multi_intervention_figure(*mc_data['data']))
+    return results
+
+## Function to run every benchmark
+def run_benchmarks(settings, model_types=('Generic', 'Smoke'), engines=('Agent',), progress=print):
+    """Return a dictionary of timings keyed by benchmark name"""
+    results = {}
+    for engine in engines:
+        for model_type in model_types:
+            for N_people in settings['sizes']:
+                progress(f"{engine} {model_type} N_people={N_people}")
+                timings = model_benchmarks(model_type, engine, N_people, settings['num_steps'])
+                timings.update(figure_benchmarks(model_type, engine, N_people, settings['num_steps']))
+                for name, timing in timings.items():
+                    results[f"{engine}/{model_type}/{name}/N={N_people}"] = timing
+
+        for N_people in settings['sizes']:
+            if N_people > settings['max_monte_carlo_people']:
+                continue
+            progress(f"{engine} Monte Carlo N_people={N_people}")
+            timings = monte_carlo_benchmarks(engine, N_people, settings['num_steps'], settings['iterations'])
+            for name, timing in timings.items():
+                results[f"{engine}/Generic/{name}/N={N_people}"] = timing
+    return results
+
+##################################
+### Baseline Comparison
+##################################
+
+## Function to compare results against a baseline
+def compare_to_baseline(results, baseline, tolerance=1.5, noise_floor=0.001):
+    """Return a list of (name, baseline_median, median, ratio) for every regression.
+
+    A benchmark has regressed if its median is more than tolerance times the
+    baseline median and slower by more than noise_floor seconds.
+    """
+    regressions = []
+    for name, timing in results.items():
+        if name not in baseline:
+            continue
+        baseline_median = baseline[name]['median']
+        median = timing['median']
+        ratio = median / baseline_median if baseline_median > 0 else float('inf')
+        if ratio > tolerance and median - baseline_median > noise_floor:
+            regressions.append((name, baseline_median, median, ratio))
+    return regressions
+
+## Function to check a baseline was recorded in the same way as the current results
+def baseline_mismatches(output, baseline_output):
+    """Return (settings, environment) lists of the keys whose values differ from the baseline's"""
+    return tuple([key for key in sorted(set(output[part]) | set(baseline_output[part]))
+                  if output[part].get(key) != baseline_output[part].get(key)]
+                 for part in ['settings', 'environment'])
+
+## Function to describe the machine the benchmarks ran on
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help="small sizes and few steps")
+    parser.add_argument('--sizes', type=int, nargs='+', help="N_people values to run")
+    parser.add_argument('--engines', nargs='+', default=['Agent'], help="engines to run, e.g. Agent Vectorized")
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results.json'))
+    parser.add_argument('--baseline', help="baseline JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=1.5
+                        , help="slowdown ratio allowed before a benchmark counts as a regression")
+    parser.add_argument('--save-baseline', metavar='PATH', help="also write the results as a baseline")
+    args = parser.parse_args()
+
+    settings = dict(QUICK_SETTINGS if args.quick else FULL_SETTINGS)
+    if args.sizes:
+        settings['sizes'] = args.sizes
+
+    results = run_benchmarks(settings, engines=args.engines)
+    output = {'environment': environment(), 'settings': settings, 'results': results}
+
+    with open(args.output, 'w') as f:
+        json.dump(output, f, indent=4)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(output, f, indent=4)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline_output = json.load(f)
+        settings_changed, environment_changed = baseline_mismatches(output, baseline_output)
+        if settings_changed:
+            parser.exit(2, f"{args.baseline} was run with different {', '.join(settings_changed)}; "
+                           f"record a new baseline with --save-baseline\n")
+        if environment_changed:
+            print(f"WARNING {args.baseline} was recorded with a different {', '.join(environment_changed)}, "
+                  f"so timings may not be comparable")
+        regressions = compare_to_baseline(results, baseline_output['results'], args.tolerance)
+        for name, baseline_median, median, ratio in regressions:
+            print(f"REGRESSION {name}: {baseline_median * 1000:.2f} ms -> {median * 1000:.2f} ms ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+if __name__ == '__main__':
+    main()
@@ -49,31 +49,34 @@ def get_quarto(repo_name, quarto_version="1.5.57"):
     except:
         print("Other unspecified error when running quarto check")
 
-st.set_page_config(layout="wide")
+## worker processes spawned by the app import this script again, as __mp_main__, before starting their work;
+## what they run lives in importable modules, so the app itself is only run when Streamlit runs this script
+if __name__ != '__mp_main__':
+    st.set_page_config(layout="wide")
 
-# If running on community cloud, output of this is an empty string
-# If this is the case, we'll try to install quarto
-if platform.processor() == '':
-    get_quarto("project_toy_mecc")
+    # If running on community cloud, output of this is an empty string
+    # If this is the case, we'll try to install quarto
+    if platform.processor() == '':
+        get_quarto("project_toy_mecc")
 
-pg = st.navigation(
+    pg = st.navigation(
 
-    [st.Page("homepage.py",
-             title="Toy MECC Details",
-             icon=":material/cottage:"),
-    st.Page("parameters.py",
-             title="Parameters for Simulation",
-             icon=":material/settings:"),
-    st.Page("generic_mecc_model.py",
-             title="Simple MECC",
-             icon=":material/people:"),
-    st.Page("mesa_abs_two_types_mecc.py",
-             title="Smoking cessation with MECC",
-             icon=":material/smoke_free:"),
-    st.Page("generic_mecc_monte.py",
-             title="Simple Monte Carlo",
-             icon=":material/casino:")             
-     ]
-     )
+        [st.Page("homepage.py",
+                 title="Toy MECC Details",
+                 icon=":material/cottage:"),
+        st.Page("parameters.py",
+                 title="Parameters for Simulation",
+                 icon=":material/settings:"),
+        st.Page("generic_mecc_model.py",
+                 title="Simple MECC",
+                 icon=":material/people:"),
+        st.Page("mesa_abs_two_types_mecc.py",
+                 title="Smoking cessation with MECC",
+                 icon=":material/smoke_free:"),
+        st.Page("generic_mecc_monte.py",
+                 title="Simple Monte Carlo",
+                 icon=":material/casino:")             
+         ]
+         )
 
-pg.run()
+    pg.run()
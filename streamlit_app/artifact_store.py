@@ -0,0 +1,139 @@
+## artifact_store.py
+import os
+import time
+import contextlib
+import shutil
+import hashlib
+import threading
+
+##################################
+### Artifact Store
+##################################
+
+## keeps each session's run outputs (the parameters and results a report is rendered from) apart
+## every run is saved to <root>/<session id>/<hash of its files>, which is never changed once written,
+## so sessions cannot overwrite each other's files and a rerun with the same outputs reuses its directory
+## runs unused for longer than ttl are removed, then the least recently used beyond max_runs,
+## except runs pinned while something is still reading them, e.g. a report rendering from their files
+class ArtifactStore:
+    def __init__(self
+                 , root
+                 , ttl = 6 * 60 * 60
+                 , max_runs = 200):
+        self.root = root
+        self.ttl = ttl
+        self.max_runs = max_runs
+        self.lock = threading.Lock()
+
+        ## number of pins held on each run directory
+        self.pins = {}
+
+    ## Saves a run's files and returns the directory holding them
+    def save(self, session_id, files):
+        """Write files, a dictionary of file name to str or bytes contents, for one run.
+
+        The directory is named by a hash of the files, so saving the same files
+        again returns the existing directory.
+        """
+        contents = {name: data.encode('utf-8') if isinstance(data, str) else data
+                    for name, data in files.items()}
+        run_hash = hashlib.sha256()
+        for name in sorted(contents):
+            run_hash.update(name.encode('utf-8') + b'\0')
+            run_hash.update(len(contents[name]).to_bytes(8, 'little'))
+            run_hash.update(contents[name])
+
+        run_dir = os.path.join(self.root, str(session_id), run_hash.hexdigest()[:16])
+        if not os.path.isdir(run_dir):
+            ## written to a temporary directory first, so a run directory is only ever seen complete
+            temp_dir = f"{run_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+            os.makedirs(temp_dir)
+            for name, data in contents.items():
+                with open(os.path.join(temp_dir, name), 'wb') as f:
+                    f.write(data)
+            try:
+                os.rename(temp_dir, run_dir)
+            except OSError:
+                ## saved by another thread in the meantime
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+        self.touch(run_dir)
+        self.cleanup()
+        return run_dir
+
+    ## Marks a run as just used, so it is the last to be removed
+    def touch(self, run_dir):
+        os.utime(run_dir)
+
+    ## Keeps a run from being removed until it is unpinned as many times as it was pinned
+    def pin(self, run_dir):
+        run_dir = os.path.abspath(run_dir)
+        with self.lock:
+            self.pins[run_dir] = self.pins.get(run_dir, 0) + 1
+
+    ## Releases a pin, marking the run as just used so it is not removed straight away
+    def unpin(self, run_dir):
+        run_dir = os.path.abspath(run_dir)
+        with self.lock:
+            self.pins[run_dir] -= 1
+            if self.pins[run_dir] == 0:
+                del self.pins[run_dir]
+        with contextlib.suppress(FileNotFoundError):
+            self.touch(run_dir)
+
+    ## Every saved run directory with the time it was last used, least recent first
+    def runs(self):
+        runs = []
+        if not os.path.isdir(self.root):
+            return runs
+        for session_id in os.listdir(self.root):
+            session_dir = os.path.join(self.root, session_id)
+            if not os.path.isdir(session_dir):
+                continue
+            for name in os.listdir(session_dir):
+                run_dir = os.path.join(session_dir, name)
+                if name.endswith('.tmp') or not os.path.isdir(run_dir):
+                    continue
+                try:
+                    runs.append((os.path.getmtime(run_dir), run_dir))
+                except FileNotFoundError:
+                    continue
+        return sorted(runs)
+
+    ## Removes expired runs, then the least recently used beyond max_runs
+    def cleanup(self, now = None):
+        """Remove old runs and any session directories left empty, returning the runs removed.
+
+        Pinned runs are never removed and do not count towards max_runs.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            runs = [(last_used, run_dir) for last_used, run_dir in self.runs()
+                    if os.path.abspath(run_dir) not in self.pins]
+            expired = [run_dir for last_used, run_dir in runs if now - last_used > self.ttl]
+            kept = [run_dir for last_used, run_dir in runs if now - last_used <= self.ttl]
+            removed = expired + kept[:max(len(kept) - self.max_runs, 0)]
+
+            for run_dir in removed:
+                shutil.rmtree(run_dir, ignore_errors=True)
+            for session_dir in {os.path.dirname(run_dir) for run_dir in removed}:
+                try:
+                    os.rmdir(session_dir)
+                except OSError:
+                    ## the session still has other runs
+                    pass
+        return removed
+
+## one store for the whole app, shared by every session
+## created under a lock, so sessions starting together cannot each create their own, with their own pins
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+def get_artifact_store():
+    """Return the process-wide store saving runs under streamlit_app/outputs/sessions"""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            root = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'outputs', 'sessions')
+            _shared_store = ArtifactStore(root)
+    return _shared_store
@@ -0,0 +1,162 @@
+## batch_runner.py
+"""Run MECC scenarios headless from parameter files.
+
+Each parameter file uses the same schema as the session_data.json written by
+the Streamlit pages. Run from the repository root, for example:
+
+    python streamlit_app/batch_runner.py scenario.json --model Smoke --output-dir results
+    python streamlit_app/batch_runner.py a.json b.json --model MonteCarlo --iterations 1000 --format parquet
+
+Results for each parameter file are written to <output-dir>/<file name>/ as
+data_no_mecc and data_mecc (mc_data_no_mecc and mc_data_mecc for Monte Carlo
+runs), next to a copy of the parameters as session_data.json. They are Arrow
+IPC files by default, with a month and seed column before the reporters, and
+can be read back with results_store.read_results; --format csv exports them as
+text instead. Streamlit and plotly are never imported.
+
+A parameter file that cannot be read or run is reported and the remaining
+files still run; the exit code is 1 if any of them failed.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from simulation_functions import MODEL_ENGINES
+from paired_runner import run_paired_simulation
+from monte_carlo_runner import run_monte_carlo
+from results_store import RESULTS_FORMATS, write_results
+
+##################################
+### Batch Functions
+##################################
+
+## parameters every model needs, and the extra ones for the smoking model
+GENERIC_PARAMETERS = ['model_seed', 'N_people', 'N_service', 'visit_prob'
+                      , 'base_make_intervention_prob', 'mecc_effect', 'num_steps']
+SMOKE_PARAMETERS = ['initial_smoking_prob', 'quit_attempt_prob'
+                    , 'base_smoke_relapse_prob', 'intervention_effect']
+
+## file formats results can be written in
+OUTPUT_FORMATS = RESULTS_FORMATS
+
+## Function to read a parameter file
+def load_parameters(path):
+    """Read a session_data.json style parameter file"""
+    with open(path) as f:
+        model_parameters = json.load(f)
+    ## the Streamlit pages only ever use one service
+    model_parameters.setdefault('N_service', 1)
+    return model_parameters
+
+## Function to pick the model for a parameter file
+def infer_model_type(model_parameters):
+    """Return 'Smoke' if the smoking parameters are present, otherwise 'Generic'"""
+    return 'Smoke' if all(name in model_parameters for name in SMOKE_PARAMETERS) else 'Generic'
+
+## Function to check a parameter file has everything a model needs
+def check_parameters(model_parameters, model_type):
+    required = GENERIC_PARAMETERS + (SMOKE_PARAMETERS if model_type == 'Smoke' else [])
+    missing = [name for name in required if name not in model_parameters]
+    if missing:
+        raise ValueError(f"Parameters for the {model_type} model are missing {missing}")
+
+## Function to write one table of results
+def write_table(data, path_stem, output_format, seed = None):
+    return write_results(data, f"{path_stem}.{output_format}", seed)
+
+## Function to run one parameter file
+def run_scenario(model_parameters
+                 ,output_dir
+                 ,model = None
+                 ,engine = 'Agent'
+                 ,iterations = None
+                 ,max_workers = None
+                 ,common_random_numbers = False
+                 ,output_format = 'arrow'):
+    """Run one scenario and write its results, returning the paths written.
+
+    model is 'Generic', 'Smoke' or 'MonteCarlo'; if None it is worked out from
+    the parameters. Monte Carlo runs use the Generic model, like the Monte
+    Carlo page, with iterations taken from the parameters if not given.
+    """
+    monte_carlo = model == 'MonteCarlo'
+    model_type = 'Generic' if monte_carlo else (model or infer_model_type(model_parameters))
+    check_parameters(model_parameters, model_type)
+    os.makedirs(output_dir, exist_ok=True)
+
+    if monte_carlo:
+        iterations = iterations or model_parameters.get('iterations', 100)
+        data_no_mecc, data_mecc = run_monte_carlo(
+            model_parameters=model_parameters,
+            iterations=iterations,
+            model_type=model_type,
+            engine=engine,
+            max_workers=max_workers,
+            common_random_numbers=common_random_numbers
+        )
+        prefix = 'mc_'
+    else:
+        ## both arms run at once in their own process unless limited to one worker
+        data_no_mecc, data_mecc = run_paired_simulation(
+            model_parameters=model_parameters,
+            model_type=model_type,
+            engine=engine,
+            parallel=max_workers != 1
+        )
+        prefix = ''
+
+    ## Monte Carlo results have a seed column for each iteration, a single run was run with the model seed
+    paths = [write_table(data_no_mecc, os.path.join(output_dir, f"{prefix}data_no_mecc"), output_format
+                         , model_parameters['model_seed']),
+             write_table(data_mecc, os.path.join(output_dir, f"{prefix}data_mecc"), output_format
+                         , model_parameters['model_seed'])]
+
+    ## keeps the parameters with the results so they can be reported on later
+    json_path = os.path.join(output_dir, 'session_data.json')
+    with open(json_path, 'w') as f:
+        json.dump({**model_parameters, 'iterations': iterations} if monte_carlo else model_parameters, f, indent=4)
+    paths.append(json_path)
+    return paths
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('parameter_files', nargs='+', help="session_data.json style parameter files")
+    parser.add_argument('--model', choices=['Generic', 'Smoke', 'MonteCarlo']
+                        , help="model to run, worked out from the parameters if not given")
+    parser.add_argument('--engine', choices=list(MODEL_ENGINES), default='Agent')
+    parser.add_argument('--iterations', type=int, help="Monte Carlo iterations, overrides the parameter file")
+    parser.add_argument('--workers', type=int, help="worker processes, defaults to every core")
+    parser.add_argument('--common-random-numbers', action='store_true'
+                        , help="share random draws between the arms of Monte Carlo runs")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='arrow'
+                        , help="arrow or parquet to keep the column types, csv to export as text")
+    parser.add_argument('--output-dir', default='batch_outputs')
+    args = parser.parse_args(argv)
+
+    ## a file that fails is reported and the rest still run, with the exit code showing the failures at the end
+    failed = []
+    for parameter_file in args.parameter_files:
+        scenario = os.path.splitext(os.path.basename(parameter_file))[0]
+        start = time.perf_counter()
+        try:
+            paths = run_scenario(load_parameters(parameter_file)
+                                 , output_dir=os.path.join(args.output_dir, scenario)
+                                 , model=args.model
+                                 , engine=args.engine
+                                 , iterations=args.iterations
+                                 , max_workers=args.workers
+                                 , common_random_numbers=args.common_random_numbers
+                                 , output_format=args.format)
+        ## any error, including one raised by the model itself, only stops this file
+        except Exception as error:
+            print(f"{parameter_file}: {type(error).__name__}: {error}", file=sys.stderr)
+            failed.append(parameter_file)
+            continue
+        print(f"{parameter_file}: wrote {', '.join(paths)} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    if failed:
+        parser.exit(1, f"{len(failed)} of {len(args.parameter_files)} parameter files failed: {', '.join(failed)}\n")
+
+if __name__ == '__main__':
+    main()
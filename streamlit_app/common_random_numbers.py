@@ -0,0 +1,54 @@
+## common_random_numbers.py
+from collections import OrderedDict
+import numpy as np
+
+##################################
+### Common Random Numbers
+##################################
+
+## the uniform draws made for each person each month, in the order they are generated
+MONTHLY_STREAMS = ('visit', 'service', 'intervention', 'quit', 'relapse')
+
+## creates shared uniform streams so the no MECC and MECC arms see the same randomness
+## every draw is indexed by (stream, month, person) rather than by the order it is made,
+## so the arms stay in step even when they take different paths. The intervention stream
+## is shared too: the arms compare the same draw against different intervention
+## probabilities, so the intervention decision is the only thing that differs
+class CommonRandomNumbers:
+    def __init__(self
+                 , seed
+                 , N_people
+                 , months_cached = 2):
+        ## entropy is fixed here so a seed of None still gives one shared stream
+        self.entropy = np.random.SeedSequence(seed).entropy
+        self.N_people = N_people['value'] if isinstance(N_people, dict) else N_people
+
+        ## each month's draws are made on first use and the most recent few are kept
+        self.months_cached = months_cached
+        self.monthly = OrderedDict()
+        self.initial = None
+
+    ## Returns a generator for one block of draws
+    def block_rng(self, *spawn_key):
+        return np.random.default_rng(np.random.SeedSequence(self.entropy, spawn_key=spawn_key))
+
+    ## Uniform draws deciding who starts as a smoker
+    def initial_smoking(self):
+        if self.initial is None:
+            self.initial = self.block_rng(0).random(self.N_people)
+        return self.initial
+
+    ## Returns a dictionary of one uniform array per stream for a month
+    def month(self, month):
+        if month not in self.monthly:
+            rng = self.block_rng(1, month)
+            self.monthly[month] = {stream: rng.random(self.N_people) for stream in MONTHLY_STREAMS}
+            while len(self.monthly) > self.months_cached:
+                self.monthly.popitem(last=False)
+        return self.monthly[month]
+
+    ## Returns a single draw for one person
+    def uniform(self, stream, month, person_id):
+        if stream == 'initial_smoking':
+            return self.initial_smoking()[person_id]
+        return self.month(month)[stream][person_id]
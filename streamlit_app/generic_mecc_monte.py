@@ -4,10 +4,15 @@ import pandas as pd
 import numpy as np
 import streamlit as st
 import time
-from streamlit_model_functions import run_simulation_step, create_MECC_model,create_multi_intervention_figure
+from streamlit_model_functions import create_aggregate_intervention_figure
+from monte_carlo_runner import adaptive_monte_carlo
+from running_statistics import RunningStatistics
+from result_cache import get_result_cache, cache_key
 import os
 import shutil
 import json
+import uuid
+from artifact_store import get_artifact_store
 
 st.title("Simulate - Service with MECC Training")
 
@@ -49,7 +54,12 @@ with col2:
 
 with col3:
     st.markdown("#### Simulation Parameters")
-    st.write(f" - Number of Reruns: :blue-background[{st.session_state.iterations}]")
+    if st.session_state.adaptive_stopping:
+        st.write(f" - Maximum Number of Reruns: :blue-background[{st.session_state.iterations}]")
+        st.write(f" - Target Precision: :blue-background[±{st.session_state.target_precision}% of the mean]")
+    else:
+        st.write(f" - Number of Reruns: :blue-background[{st.session_state.iterations}]")
+    st.write(f" - Common Random Numbers: :blue-background[{st.session_state.common_random_numbers}]")
     st.write(f" - Number of Months to Simulate: :blue-background[{st.session_state.num_steps}]")
     st.write(f" - Animation Speed (seconds): :blue-background[{st.session_state.animation_speed}]")
 
@@ -67,12 +77,20 @@ model_parameters = {
 # Sets number of iterations for model to run
 iterations = st.session_state.iterations
 
-# save to json file to be used later for the quarto report
-output_path = os.path.join(os.getcwd(),'streamlit_app','outputs')
-json_path = os.path.join(output_path,'session_data.json')
+# Sets whether both arms share the same random draws
+common_random_numbers = st.session_state.common_random_numbers
 
-with open(json_path, "w") as f:
-    json.dump(model_parameters, f, indent=4)
+# Sets the confidence interval width to stop at, as a fraction of the mean, or None to run every iteration
+target_precision = st.session_state.target_precision / 100 if st.session_state.adaptive_stopping else None
+
+## each session saves its files to its own directory, so users never share the report's files
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+# save the parameters to the session's store, to be used later for the quarto report
+get_artifact_store().save(st.session_state.session_id, {
+    'session_data.json': json.dumps(model_parameters, indent=4)
+})
 
 
 st.write("----")  # divider
@@ -91,53 +109,69 @@ if st.button("Run Simulations"):
     chart_placeholder2 = st.empty()
     chart_placeholder3 = st.empty()
 
-    list_data_no_mecc = []
-    list_data_mecc = []
-
-    for iteration in range(iterations):
-
-        model_parameters["model_seed"] = iteration
-
-        model_no_mecc = create_MECC_model(
-            model_parameters=model_parameters,
-            model_type='Generic',
-            mecc_trained=False
-        )
-        model_mecc = create_MECC_model(
+    ## running statistics of each arm, updated as each iteration completes
+    statistics_no_mecc = RunningStatistics()
+    statistics_mecc = RunningStatistics()
+
+    ## redraws the chart from the statistics so far, at most once a second
+    last_redraw = [0.0]
+    def show_chart(force=False):
+        if force or time.perf_counter() - last_redraw[0] >= 1.0:
+            fig2 = create_aggregate_intervention_figure(statistics_no_mecc.aggregates(), statistics_mecc.aggregates())
+            with chart_placeholder2:
+                st.plotly_chart(fig2, use_container_width=True)
+            last_redraw[0] = time.perf_counter()
+
+    ## updates the progress bar and live chart as iterations complete across the worker processes
+    ## with adaptive stopping the bar shows progress towards the maximum number of reruns
+    def show_progress(completed):
+        model_message.info(f"Simulations Running ({completed}/{'up to ' if target_precision else ''}{iterations})")
+        progress_bar.progress(completed / iterations)
+        show_chart()
+
+    ## reuse summaries already simulated with identical parameters and number of reruns
+    ## only the running statistics and headline precision are cached, so each entry is a few rows
+    result_cache = get_result_cache()
+    key_settings = dict(iterations=iterations, common_random_numbers=common_random_numbers
+                        , target_precision=target_precision)
+    key_no_mecc = cache_key(model_parameters, model_type='Generic', mecc_trained=False, output='summary', **key_settings)
+    key_mecc = cache_key(model_parameters, model_type='Generic', mecc_trained=True, output='summary', **key_settings)
+    key_precision = cache_key(model_parameters, model_type='Generic', output='precision', **key_settings)
+    summary_no_mecc = result_cache.get(key_no_mecc)
+    summary_mecc = result_cache.get(key_mecc)
+    precision_data = result_cache.get(key_precision)
+
+    if summary_no_mecc is not None and summary_mecc is not None and precision_data is not None:
+        statistics_no_mecc = RunningStatistics.from_summary(summary_no_mecc)
+        statistics_mecc = RunningStatistics.from_summary(summary_mecc)
+    else:
+        ## No sleep for monte carlo
+        _, _, precision = adaptive_monte_carlo(
             model_parameters=model_parameters,
+            target_precision=target_precision,
+            max_iterations=iterations,
             model_type='Generic',
-            mecc_trained=True
+            progress_callback=show_progress,
+            common_random_numbers=common_random_numbers,
+            statistics=(statistics_no_mecc, statistics_mecc)
         )
-
-        data_no_mecc = pd.DataFrame()
-        data_mecc  = pd.DataFrame()
-
-        for step in range(st.session_state.num_steps):
-            data_no_mecc = run_simulation_step(model_no_mecc)
-            data_mecc = run_simulation_step(model_mecc)
-
-        if iteration == iterations - 1:
-            model_message.success(f"Simulations Completed! ({iterations}/{iterations})")
-            progress_bar.empty()
-        else:
-            model_message.info(f"Simulations Running ({iteration + 1}/{iterations})")
-            progress = (iteration + 1) / (iterations)
-            progress_bar.progress(progress)
-            
-        data_no_mecc['seed'] = iteration
-        data_mecc['seed']  = iteration
-
-        data_no_mecc = data_no_mecc.reset_index(names='month')
-        data_mecc = data_mecc.reset_index(names='month')
-
-        list_data_no_mecc.append(data_no_mecc)
-        list_data_mecc.append(data_mecc)
-         
-        ## No sleep for monte carlo
-        #time.sleep(st.session_state.animation_speed)
-
-    data_no_mecc = pd.concat(list_data_no_mecc).reset_index(drop=True)
-    data_mecc = pd.concat(list_data_mecc).reset_index(drop=True)
+        summary_no_mecc = statistics_no_mecc.summary()
+        summary_mecc = statistics_mecc.summary()
+        precision_data = pd.DataFrame.from_dict(precision['metrics'], orient='index').rename_axis('Metric').reset_index()
+        precision_data['converged'] = precision['converged']
+        result_cache.put(key_no_mecc, summary_no_mecc)
+        result_cache.put(key_mecc, summary_mecc)
+        result_cache.put(key_precision, precision_data)
+
+    iterations_run = len(statistics_no_mecc)
+    converged = bool(precision_data['converged'].iloc[0])
+    if target_precision and converged:
+        model_message.success(f"Simulations Completed! Precise to ±{st.session_state.target_precision}% after {iterations_run} of up to {iterations} reruns")
+    elif target_precision:
+        model_message.warning(f"Simulations Completed without reaching ±{st.session_state.target_precision}% ({iterations_run}/{iterations})")
+    else:
+        model_message.success(f"Simulations Completed! ({iterations_run}/{iterations_run})")
+    progress_bar.empty()
 
     st.session_state.generic_MC_simulation_completed = True  # set to True after completion
     
@@ -153,17 +187,16 @@ if st.button("Run Simulations"):
 ######################################################
     
     ## figures
-    fig2 = create_multi_intervention_figure(data_no_mecc, data_mecc)
-    with chart_placeholder2:
-        st.plotly_chart(fig2, use_container_width=True)  
+    show_chart(force=True)
 
     ## output cards
-    def group_output_data(df):
-        df = df[df['month']==(st.session_state.num_steps-1)]
-        return df
+    ## the final month's means, which give the same ratios as the sums over every rerun
+    def final_month_means(statistics):
+        mean_data = statistics.aggregates()[0]
+        return mean_data[mean_data['month']==(st.session_state.num_steps-1)].iloc[0]
 
-    data_no_mecc_total = group_output_data(data_no_mecc)
-    data_mecc_total = group_output_data(data_mecc)
+    data_no_mecc_total = final_month_means(statistics_no_mecc)
+    data_mecc_total = final_month_means(statistics_mecc)
 
     st.markdown("### Final Statistics")
     col1, col2, col3 = st.columns(3)
@@ -171,21 +204,21 @@ if st.button("Run Simulations"):
     with col1:
         st.metric(
             "Contacts with Intervention\n\n(No MECC Training)", 
-            f"{( sum(data_no_mecc_total['Total Interventions']) / sum(data_no_mecc_total['Total Contacts']) * 100):.1f}%",
+            f"{( data_no_mecc_total['Total Interventions'] / data_no_mecc_total['Total Contacts'] * 100):.1f}%",
             #f"{(data_no_mecc['Total Contacts'].iloc[-1] - data_no_mecc['Total Not Smoking'].iloc[0]):.0f}"
         )
     
     with col2:
         st.metric(
             "Contacts with Intervention\n\n(MECC Trained)",
-            f"{( sum(data_mecc_total['Total Interventions']) / sum(data_mecc_total['Total Contacts']) * 100):.1f}%",
+            f"{( data_mecc_total['Total Interventions'] / data_mecc_total['Total Contacts'] * 100):.1f}%",
             #f"{(data_mecc['Total Not Smoking'].iloc[-1] - data_mecc['Total Not Smoking'].iloc[0]):.0f}"
         )
     
     with col3:
         mecc_improvement = (
-            (sum(data_mecc_total['Total Interventions']) - 
-            sum(data_no_mecc_total['Total Interventions']))/iterations
+            data_mecc_total['Total Interventions'] - 
+            data_no_mecc_total['Total Interventions']
         )
         st.metric(
             "MECC Training\n\nImpact: mean additional interventions",
@@ -193,13 +226,25 @@ if st.button("Run Simulations"):
             #f"{(mecc_improvement / data_no_mecc['Total Interventions'].iloc[-1] * 100):.1f}%"
         )
 
-    ## raw data
-    with st.expander("View Raw Data"):
+    ## precision of the headline metrics
+    st.markdown("### Precision")
+    st.write(f"{iterations_run} reruns, with 95% confidence intervals on the final month's interventions of:")
+    st.dataframe(
+        precision_data.assign(**{
+            "Mean": precision_data['mean'].round(1),
+            "95% CI": [f"± {half_width:.1f}" for half_width in precision_data['half_width']],
+            "± % of Mean": (precision_data['relative_half_width'] * 100).round(1)
+        })[['Metric', 'Mean', '95% CI', '± % of Mean']],
+        hide_index=True
+    )
+
+    ## summary data
+    with st.expander("View Summary Data"):
         tab1, tab2 = st.tabs(["No MECC Training", "MECC Trained"])
         with tab1:
-            st.dataframe(data_no_mecc)
+            st.dataframe(summary_no_mecc)
         with tab2:
-            st.dataframe(data_mecc)
+            st.dataframe(summary_mecc)
 
 
 ######################################################
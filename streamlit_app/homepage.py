@@ -2,6 +2,8 @@ import streamlit as st
 from logic_diagram import create_logic_diagram
 import json
 import os
+import uuid
+from artifact_store import get_artifact_store
 
 # st.logo("resources/MECC.jpg")
 
@@ -67,6 +69,9 @@ if 'quit_attempt_prob' not in st.session_state:
 if 'base_smoke_relapse_prob' not in st.session_state:
     st.session_state.base_smoke_relapse_prob = 0.01
 
+if 'relapse_decay' not in st.session_state:
+    st.session_state.relapse_decay = 0.95
+
 if 'base_make_intervention_prob' not in st.session_state:
     st.session_state.base_make_intervention_prob = 0.1
 
@@ -85,9 +90,21 @@ if 'num_steps' not in st.session_state:
 if 'animation_speed' not in st.session_state:
     st.session_state.animation_speed = 0.1
 
+if 'precompute_replay' not in st.session_state:
+    st.session_state.precompute_replay = True
+
 if 'iterations' not in st.session_state:
     st.session_state.iterations = 100
 
+if 'common_random_numbers' not in st.session_state:
+    st.session_state.common_random_numbers = False
+
+if 'adaptive_stopping' not in st.session_state:
+    st.session_state.adaptive_stopping = False
+
+if 'target_precision' not in st.session_state:
+    st.session_state.target_precision = 5
+
 model_parameters = {
     "model_seed": st.session_state.model_seed,
     "N_people": st.session_state.N_people,
@@ -96,6 +113,7 @@ model_parameters = {
     "visit_prob": st.session_state.visit_prob,
     "quit_attempt_prob": st.session_state.quit_attempt_prob,
     "base_smoke_relapse_prob": st.session_state.base_smoke_relapse_prob,
+    "relapse_decay": st.session_state.relapse_decay,
     "base_make_intervention_prob": st.session_state.base_make_intervention_prob,
     "mecc_effect": st.session_state.mecc_effect,
     "intervention_effect": st.session_state.intervention_effect,
@@ -104,9 +122,11 @@ model_parameters = {
     "iterations":st.session_state.iterations
 }
 
-# save to json file to be used later for the quarto report
-output_path = os.path.join(os.getcwd(),'streamlit_app','outputs')
-json_path = os.path.join(output_path,'session_data.json')
+## each session saves its files to its own directory, so users never share the report's files
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
-with open(json_path, "w") as f:
-    json.dump(model_parameters, f, indent=4)
+# save the parameters to the session's store, to be used later for the quarto report
+get_artifact_store().save(st.session_state.session_id, {
+    'session_data.json': json.dumps(model_parameters, indent=4)
+})
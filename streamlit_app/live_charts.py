@@ -0,0 +1,79 @@
+## live_charts.py
+import time
+import pandas as pd
+from streamlit_model_functions import update_figure_data
+
+##################################
+### Live Charts
+##################################
+
+## draws a page's figures as a run progresses
+## each figure's subplots and layout are built once on the first month, and later months only replace
+## the trace data; redraws are limited to one per frame_budget seconds so that fast runs (no animation
+## delay, or replaying cached results) do not spend their time sending every month's figures to the browser
+class LiveCharts:
+    def __init__(self
+                 , frame_budget = 0.1):
+        self.frame_budget = frame_budget
+        self.charts = []
+        self.last_draw = None
+
+        ## counts of months drawn and months skipped to stay within the frame budget
+        self.draws = 0
+        self.skipped = 0
+
+    ## Adds a figure drawn into a placeholder, optionally fixing its month axis to the whole run
+    def add(self, placeholder, create_figure, num_steps = None):
+        self.charts.append({'placeholder': placeholder
+                            , 'create_figure': create_figure
+                            , 'num_steps': num_steps
+                            , 'figure': None})
+        return self
+
+    ## Redraws every figure with the results up to step, unless the last redraw was too recent
+    def update(self, results_no_mecc, results_mecc, step, force = False):
+        """Draw the figures for step and return True, or skip them and return False.
+
+        The results are DataFrames or, while a run is simulating, its
+        SimulationResults buffers, which are only read if the month is drawn.
+        force draws regardless of the frame budget, e.g. for the final month.
+        """
+        now = time.perf_counter()
+        if not force and self.last_draw is not None and now - self.last_draw < self.frame_budget:
+            self.skipped += 1
+            return False
+
+        if not isinstance(results_no_mecc, pd.DataFrame):
+            results_no_mecc, results_mecc = results_no_mecc.view(), results_mecc.view()
+
+        for chart in self.charts:
+            if chart['figure'] is None:
+                chart['figure'] = chart['create_figure'](results_no_mecc, results_mecc, step)
+                ## a fixed month axis stops the lines rescaling as each month is added
+                if chart['num_steps'] is not None:
+                    chart['figure'].update_xaxes(range=[0, max(chart['num_steps'] - 1, 1)])
+            else:
+                update_figure_data(chart['figure'], results_no_mecc, results_mecc, step)
+            chart['placeholder'].plotly_chart(chart['figure'], use_container_width=True)
+
+        self.last_draw = time.perf_counter()
+        self.draws += 1
+        return True
+
+    ## Replays a finished run month by month, waiting animation_speed seconds after each month
+    def replay(self, results_no_mecc, results_mecc, start = 0, animation_speed = 0, progress_callback = None):
+        """Draw each month from start to the end of the results in turn.
+
+        progress_callback, if given, is called with each month once it has been drawn.
+        """
+        last_month = len(results_no_mecc) - 1
+        for step in range(start, last_month + 1):
+            self.update(results_no_mecc.iloc[:step + 1], results_mecc.iloc[:step + 1], step
+                        , force=step == last_month)
+            if progress_callback is not None:
+                progress_callback(step)
+            time.sleep(animation_speed)
+
+    ## Draws a finished run as it stood at one month, e.g. when scrubbing through it
+    def show(self, results_no_mecc, results_mecc, step):
+        return self.update(results_no_mecc.iloc[:step + 1], results_mecc.iloc[:step + 1], step, force=True)
@@ -1,5 +1,4 @@
 ## mesa_abs_two_types_mecc.py
-import subprocess
 import pandas as pd
 import numpy as np
 import streamlit as st
@@ -8,6 +7,13 @@ from streamlit_model_functions import run_simulation_step, create_MECC_model,cre
 import os
 import shutil
 import json
+import uuid
+from paired_runner import PairedScenarioRunner
+from live_charts import LiveCharts
+from result_cache import get_result_cache, cache_key
+from report_service import get_report_service
+from artifact_store import get_artifact_store
+from results_store import results_bytes
 from quarto_render_func import render_quarto
 import platform
 
@@ -23,6 +29,7 @@ if "download_clicked" not in st.session_state:
 def disable_download():
     st.session_state.download_clicked = True
     st.session_state.simulation_completed = False
+    st.session_state.smoke_run = None
     report_message.empty()
 
 col1, col2, col3 = st.columns(3)
@@ -34,6 +41,7 @@ with col1:
     st.write(f" - Chance of Visiting a Service per Month: :blue-background[{st.session_state.visit_prob}]")
     st.write(f" - Base Quit Attempt Probability per Month: :blue-background[{st.session_state.quit_attempt_prob}]")
     st.write(f" - Base Smoking Relapse per Month: :blue-background[{st.session_state.base_smoke_relapse_prob}]  \n  *(Relapse chance decreases over time of not smoking)*")
+    st.write(f" - Relapse Chance Kept per Smoke-Free Month: :blue-background[{st.session_state.relapse_decay}]")
 
 with col2:
     st.markdown("#### Service Parameters")
@@ -51,6 +59,7 @@ with col3:
     st.write(f" - Random Seed: :blue-background[{st.session_state.model_seed}]")
     st.write(f" - Number of Months to Simulate: :blue-background[{st.session_state.num_steps}]")
     st.write(f" - Animation Speed (seconds): :blue-background[{st.session_state.animation_speed}]")
+    st.write(f" - Simulate First, Then Animate: :blue-background[{st.session_state.precompute_replay}]")
 
 model_parameters = {
     "model_seed": st.session_state.model_seed,
@@ -60,6 +69,7 @@ model_parameters = {
     "visit_prob": st.session_state.visit_prob,
     "quit_attempt_prob": st.session_state.quit_attempt_prob,
     "base_smoke_relapse_prob": st.session_state.base_smoke_relapse_prob,
+    "relapse_decay": st.session_state.relapse_decay,
     "base_make_intervention_prob": st.session_state.base_make_intervention_prob,
     "mecc_effect": st.session_state.mecc_effect,
     "intervention_effect": st.session_state.intervention_effect,
@@ -67,167 +77,232 @@ model_parameters = {
     "animation_speed" : st.session_state.animation_speed
 }
 
-# save to json file to be used later for the quarto report
-output_path = os.path.join(os.getcwd(),'streamlit_app','outputs')
-json_path = os.path.join(output_path,'session_data.json')
+## each session saves its runs to its own directory, so users never share the report's files
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
-with open(json_path, "w") as f:
-    json.dump(model_parameters, f, indent=4)
+## filepaths for the report
+qmd_filename = 'smoking_cessation_sim_report.qmd'
+qmd_path = os.path.join(os.getcwd(),'streamlit_app',qmd_filename)
+html_filename = os.path.basename(qmd_filename).replace('.qmd', '.html')
+
+## Function to save a run's parameters and results for the quarto report, returning the report's input files
+## the results are saved as Arrow files, which the report reads without parsing or copying them
+def save_report_inputs(data_no_mecc, data_mecc):
+    run_dir = get_artifact_store().save(st.session_state.session_id, {
+        'session_data.json': json.dumps(model_parameters, indent=4),
+        'data_no_mecc.arrow': results_bytes(data_no_mecc, seed=model_parameters['model_seed']),
+        'data_mecc.arrow': results_bytes(data_mecc, seed=model_parameters['model_seed'])
+    })
+    return [os.path.join(run_dir, filename) for filename in ['session_data.json', 'data_no_mecc.arrow', 'data_mecc.arrow']]
 
 
 st.write("----")  # divider
 if "simulation_completed" not in st.session_state:
     st.session_state.simulation_completed = False
 
-if st.button("Run Simulation"):
+## the last run's results are kept so they can be replayed, scrubbed through or skipped to the end
+if 'smoke_run' not in st.session_state:
+    st.session_state.smoke_run = None
+
+if 'smoke_replaying' not in st.session_state:
+    st.session_state.smoke_replaying = False
+
+## Functions for the replay controls, which run before the page is redrawn
+def replay_from_start():
+    st.session_state.smoke_replaying = True
+    st.session_state.smoke_replay_month = 0
+
+def skip_to_end():
+    st.session_state.smoke_replaying = False
+    st.session_state.smoke_replay_month = len(st.session_state.smoke_run['data_no_mecc']) - 1
+
+run_clicked = st.button("Run Simulation")
+
+model_message = st.empty()
+progress_bar = st.empty()
+replay_controls = st.empty()
+chart_placeholder1 = st.empty()
+chart_placeholder2 = st.empty()
+chart_placeholder3 = st.empty()
+final_statistics = st.container()
+
+## figures are built once and then only have their data replaced, at most ten redraws a second
+live_charts = (LiveCharts(frame_budget=0.1)
+               .add(chart_placeholder1, create_population_figure, st.session_state.num_steps)
+               .add(chart_placeholder2, create_intervention_figure, st.session_state.num_steps)
+               .add(chart_placeholder3, create_metrics_figure))
+
+## reuse results already simulated with identical parameters and seed
+result_cache = get_result_cache()
+key_no_mecc = cache_key(model_parameters, model_type='Smoke', mecc_trained=False)
+key_mecc = cache_key(model_parameters, model_type='Smoke', mecc_trained=True)
+
+if run_clicked:
     # set simulation_completed to False before starting - to control the download report button
     st.session_state.simulation_completed = False
     st.session_state.download_clicked = False
 
-    model_no_mecc = create_MECC_model(
-        model_parameters=model_parameters,
-        model_type='Smoke',
-        mecc_trained=False
-    )
-    model_mecc = create_MECC_model(
-        model_parameters=model_parameters,
-        model_type='Smoke',
-        mecc_trained=True
-    )
-
-    model_message = st.info("Simulation Running")
-    progress_bar = st.progress(0)
-    chart_placeholder1 = st.empty()
-    chart_placeholder2 = st.empty()
-    chart_placeholder3 = st.empty()
-
-    data_no_mecc = pd.DataFrame()
-    data_mecc = pd.DataFrame()
-
-    for step in range(st.session_state.num_steps):
-        if step == st.session_state.num_steps - 1:
-            model_message.success("Simulation Completed!")
-            progress_bar.empty()
-        else:
-            progress = (step + 1) / st.session_state.num_steps
-            progress_bar.progress(progress)
-
-        data_no_mecc = run_simulation_step(model_no_mecc)
-        data_mecc = run_simulation_step(model_mecc)
-
-        fig1 = create_population_figure(data_no_mecc, data_mecc, step)
-        with chart_placeholder1:
-            st.plotly_chart(fig1, use_container_width=True)
-
-        fig2 = create_intervention_figure(data_no_mecc, data_mecc, step)
-        with chart_placeholder2:
-            st.plotly_chart(fig2, use_container_width=True)
-
-        fig3 = create_metrics_figure(data_no_mecc, data_mecc, step)
-        with chart_placeholder3:
-            st.plotly_chart(fig3, use_container_width=True)
-
-        time.sleep(st.session_state.animation_speed)
+    data_no_mecc = result_cache.get(key_no_mecc)
+    data_mecc = result_cache.get(key_mecc)
+    use_cache = data_no_mecc is not None and data_mecc is not None
+    ## months are only animated while simulating if the run is not simulated first
+    animated = not use_cache and not st.session_state.precompute_replay
+
+    if not use_cache:
+        model_message.info("Simulation Running")
+
+        ## both arms run in their own worker process
+        runner = PairedScenarioRunner(model_parameters, model_type='Smoke')
+        for step, _, _ in runner.snapshots():
+            progress_bar.progress((step + 1) / st.session_state.num_steps)
+
+            if animated:
+                ## each month is drawn once both arms have simulated it, straight from the runner's buffers
+                ## so the months so far are not copied into a new DataFrame each month
+                live_charts.update(runner.results_no_mecc, runner.results_mecc, step
+                                   , force=step == st.session_state.num_steps - 1)
+                time.sleep(st.session_state.animation_speed)
+
+        data_no_mecc = runner.results_no_mecc.to_dataframe()
+        data_mecc = runner.results_mecc.to_dataframe()
+        result_cache.put(key_no_mecc, data_no_mecc)
+        result_cache.put(key_mecc, data_mecc)
+
+    model_message.success("Simulation Completed!")
+    progress_bar.empty()
 
     st.session_state.simulation_completed = True  # set to True after completion
 
-    # save csv files for use in quarto
-    data_no_mecc_file = os.path.join(output_path,'data_no_mecc.csv')
-    data_mecc_file = os.path.join(output_path,'data_mecc.csv')
+    # save the parameters and results for use in quarto
+    report_inputs = save_report_inputs(data_no_mecc, data_mecc)
+
+    ## starts rendering the report straight away, so it can be ready by the end of the replay
+    get_report_service().request(qmd_path, report_inputs)
+
+    st.session_state.smoke_run = {'key': key_no_mecc
+                                 , 'data_no_mecc': data_no_mecc
+                                 , 'data_mecc': data_mecc
+                                 , 'report_inputs': report_inputs}
+    st.session_state.smoke_replaying = not animated
+    st.session_state.smoke_replay_month = 0 if not animated else len(data_no_mecc) - 1
 
-    data_no_mecc.to_csv(data_no_mecc_file, index=False)
-    data_mecc.to_csv(data_mecc_file, index=False)
+## the kept run is only shown while the parameters still match it
+smoke_run = st.session_state.smoke_run
+run_shown = smoke_run is not None and smoke_run['key'] == key_no_mecc
+
+if run_shown:
+    data_no_mecc = smoke_run['data_no_mecc']
+    data_mecc = smoke_run['data_mecc']
+    last_month = len(data_no_mecc) - 1
 
 ######################################################
 
-    st.markdown("### Final Statistics")
-    col1, col2, col3 = st.columns(3)
-
-    with col1:
-        st.metric(
-            "Smoking Reduction\n\n(No MECC Training)",
-            f"{(data_no_mecc['Total Not Smoking'].iloc[-1] / st.session_state.N_people * 100):.1f}%",
-            f"{(data_no_mecc['Total Not Smoking'].iloc[-1] - data_no_mecc['Total Not Smoking'].iloc[0]):.0f}"
-        )
-
-    with col2:
-        st.metric(
-            "Smoking Reduction\n\n(MECC Trained)",
-            f"{(data_mecc['Total Not Smoking'].iloc[-1] / st.session_state.N_people * 100):.1f}%",
-            f"{(data_mecc['Total Not Smoking'].iloc[-1] - data_mecc['Total Not Smoking'].iloc[0]):.0f}"
-        )
-
-    with col3:
-        mecc_improvement = (
-            data_mecc['Total Not Smoking'].iloc[-1] -
-            data_no_mecc['Total Not Smoking'].iloc[-1]
-        )
-        st.metric(
-            "MECC Training\n\nImpact",
-            f"{mecc_improvement:.0f} additional quits",
-            f"{(mecc_improvement / st.session_state.N_people * 100):.1f}%"
-        )
-
-    with st.expander("View Raw Data"):
-        tab1, tab2 = st.tabs(["No MECC Training", "MECC Trained"])
-        with tab1:
-            st.dataframe(data_no_mecc)
-        with tab2:
-            st.dataframe(data_mecc)
+    ## the final statistics are shown as soon as the run is simulated, before any replay
+    with final_statistics:
+        st.markdown("### Final Statistics")
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            st.metric(
+                "Smoking Reduction\n\n(No MECC Training)",
+                f"{(data_no_mecc['Total Not Smoking'].iloc[-1] / st.session_state.N_people * 100):.1f}%",
+                f"{(data_no_mecc['Total Not Smoking'].iloc[-1] - data_no_mecc['Total Not Smoking'].iloc[0]):.0f}"
+            )
+
+        with col2:
+            st.metric(
+                "Smoking Reduction\n\n(MECC Trained)",
+                f"{(data_mecc['Total Not Smoking'].iloc[-1] / st.session_state.N_people * 100):.1f}%",
+                f"{(data_mecc['Total Not Smoking'].iloc[-1] - data_mecc['Total Not Smoking'].iloc[0]):.0f}"
+            )
+
+        with col3:
+            mecc_improvement = (
+                data_mecc['Total Not Smoking'].iloc[-1] -
+                data_no_mecc['Total Not Smoking'].iloc[-1]
+            )
+            st.metric(
+                "MECC Training\n\nImpact",
+                f"{mecc_improvement:.0f} additional quits",
+                f"{(mecc_improvement / st.session_state.N_people * 100):.1f}%"
+            )
+
+        with st.expander("View Raw Data"):
+            tab1, tab2 = st.tabs(["No MECC Training", "MECC Trained"])
+            with tab1:
+                st.dataframe(data_no_mecc)
+                st.download_button("Export as CSV", data_no_mecc.to_csv(index=False), "data_no_mecc.csv", "text/csv")
+            with tab2:
+                st.dataframe(data_mecc)
+                st.download_button("Export as CSV", data_mecc.to_csv(index=False), "data_mecc.csv", "text/csv")
+
+######################################################
 
+    if st.session_state.smoke_replaying:
+        ## clicking skip reruns the page, which stops the replay where it is
+        replay_controls.button("Skip to End", on_click=skip_to_end)
+        live_charts.replay(data_no_mecc, data_mecc
+                           , start=st.session_state.smoke_replay_month
+                           , animation_speed=st.session_state.animation_speed
+                           , progress_callback=lambda step: progress_bar.progress((step + 1) / (last_month + 1)))
+        progress_bar.empty()
+        st.session_state.smoke_replaying = False
+        st.session_state.smoke_replay_month = last_month
+    else:
+        if 'smoke_replay_month' not in st.session_state:
+            st.session_state.smoke_replay_month = last_month
+        live_charts.show(data_no_mecc, data_mecc, st.session_state.smoke_replay_month)
+
+    with replay_controls.container():
+        col1, col2 = st.columns([5, 1])
+        if last_month > 0:
+            col1.slider("Month", 0, last_month, key='smoke_replay_month')
+        col2.button("Replay", on_click=replay_from_start)
 
 ######################################################
 
 ## empty location for report message
 report_message = st.empty()
 
-if st.session_state.simulation_completed:
-
-    report_message.info("Generating Report...")
-
-    ## filepaths for
-    output_dir = os.path.join(os.getcwd(),'streamlit_app','downloads')
-    qmd_filename = 'smoking_cessation_sim_report.qmd'
-    qmd_path = os.path.join(os.getcwd(),'streamlit_app',qmd_filename)
-    html_filename = os.path.basename(qmd_filename).replace('.qmd', '.html')
-    dest_html_path = os.path.join(output_dir,html_filename)
-
-    try:
-        ## forces result to be html
-        result = subprocess.run(["quarto"
-                                , "render"
-                                , qmd_path
-                                , "--to"
-                                , "html"
-                                , "--output-dir"
-                                , output_dir]
-                                , capture_output=True
-                                , text=True)
-    except:
-        ## error message
-        report_message.error(f"Report cannot be generated")
-
-    if os.path.exists(dest_html_path):
-        with open(dest_html_path, "r") as f:
+## the report is rendered by a background worker and saved against a hash of its inputs, so reruns reuse it
+## while Quarto runs, this checks on it every second and redraws the page once the render has finished
+## (it only checks, so a failed render is reported by the redrawn page rather than retried here)
+@st.fragment(run_every=1)
+def report_progress():
+    if not get_report_service().rendering(report['key']):
+        st.rerun()
+    st.info("Generating Report...")
+
+## the report is only offered for the run on screen
+if st.session_state.simulation_completed and run_shown:
+    ## saves the run again if its files were cleaned up while the session was idle
+    report_inputs = smoke_run['report_inputs']
+    if not all(os.path.exists(path) for path in report_inputs):
+        report_inputs = smoke_run['report_inputs'] = save_report_inputs(smoke_run['data_no_mecc'], smoke_run['data_mecc'])
+    get_artifact_store().touch(os.path.dirname(report_inputs[0]))
+
+    report = get_report_service().request(qmd_path, report_inputs)
+
+    if report['status'] == 'rendering':
+        with report_message.container():
+            report_progress()
+
+    elif report['status'] == 'ready':
+        with open(report['html_path'], "r") as f:
             html_data = f.read()
 
         report_message.success("Report Available for Download")
 
-
-
         if not st.session_state.download_clicked:
             st.download_button(
                 label="Download MECC Simulation Report and Clear Simulation Results",
                 data=html_data,
                 file_name=html_filename,
                 mime="text/html",
-                # disabled=not st.session_state.simulation_completed,
                 on_click=disable_download
             )
-        else:
-            ## error message
-            report_message.error(f"Report failed to generate\n\n_{result}_")
 
-else:
-    ## empty location for report message
-    report_message = st.empty()
+    else:
+        ## error message
+        report_message.error(f"Report failed to generate\n\n_{report['message']}_")
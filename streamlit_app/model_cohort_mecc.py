@@ -0,0 +1,243 @@
+# model_cohort_mecc.py
+
+##################################
+### Packages
+##################################
+import numpy as np
+from mesa import Model
+from mesa.datacollection import DataCollector
+from relapse_schedule import RelapseSchedule
+
+##################################
+### Cohort Class
+##################################
+
+## holds the smoking population as weighted buckets of people with identical state
+## a person's state is (smoker, never_smoked, months_smoke_free, interventions_received, quit_attempts)
+## and count is the number of people in that state
+class Cohorts:
+    STATE = ('smoker', 'never_smoked', 'months_smoke_free', 'interventions_received', 'quit_attempts')
+
+    def __init__(self
+                 , smoker
+                 , never_smoked
+                 , months_smoke_free
+                 , interventions_received
+                 , quit_attempts
+                 , count):
+        self.smoker = np.asarray(smoker, dtype=bool)
+        self.never_smoked = np.asarray(never_smoked, dtype=bool)
+        self.months_smoke_free = np.asarray(months_smoke_free, dtype=np.int64)
+        self.interventions_received = np.asarray(interventions_received, dtype=np.int64)
+        self.quit_attempts = np.asarray(quit_attempts, dtype=np.int64)
+        self.count = np.asarray(count, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.count)
+
+    ## Splits moved people out of each bucket into a copy with the changed state
+    ## changes maps a state name to a function of the moved buckets' current values
+    def split(self, moved, **changes):
+        moving = moved > 0
+        columns = {}
+        for name in self.STATE:
+            values = getattr(self, name)
+            moved_values = values[moving]
+            if name in changes:
+                moved_values = changes[name](moved_values)
+            columns[name] = np.concatenate([values, moved_values])
+        return Cohorts(**columns, count=np.concatenate([self.count - moved, moved[moving]]))
+
+    ## Merges buckets with identical state and drops empty ones
+    def merge(self):
+        keep = self.count > 0
+        state = np.column_stack([getattr(self, name)[keep].astype(np.int64) for name in self.STATE])
+        unique_state, inverse = np.unique(state, axis=0, return_inverse=True)
+        count = np.bincount(inverse.ravel(), weights=self.count[keep], minlength=len(unique_state))
+        return Cohorts(*unique_state.T, count=count.astype(np.int64))
+
+
+##################################
+### Model Class
+##################################
+
+## creates a cohort-compressed version of SmokeModel_MECC_Model
+## each month every bucket is split with binomial draws instead of stepping each person,
+## so memory and time scale with the number of distinct states rather than N_people
+class Cohort_SmokeModel_MECC_Model(Model):
+    def __init__(self
+                , N_people
+                , N_service
+                , mecc_effect
+                , base_make_intervention_prob
+                , visit_prob
+                , mecc_trained
+                , seed
+                , intervention_effect
+                , initial_smoking_prob
+                , quit_attempt_prob
+                , base_smoke_relapse_prob
+                , common_random_numbers = None
+                , relapse_schedule = None):
+        super().__init__()
+
+        ## individual people are not tracked, so there are no per-person streams to share
+        if common_random_numbers is not None:
+            raise ValueError("The cohort engine does not support common random numbers")
+
+        ## Random number generator for all draws
+        self.rng = np.random.default_rng(seed)
+
+        ## numbers of agents
+        ## Convert dictionary values if they're dictionaries
+        self.N_people = N_people['value'] if isinstance(N_people, dict) else N_people
+        self.N_service = N_service['value'] if isinstance(N_service, dict) else N_service
+
+        ## other features for people
+        ## Convert dictionary values if they're dictionaries
+        self.visit_prob = visit_prob['value'] if isinstance(visit_prob, dict) else visit_prob
+
+        ## intervention features for services
+        ## Convert dictionary values if they're dictionaries
+        self.base_make_intervention_prob = base_make_intervention_prob['value'] if isinstance(base_make_intervention_prob, dict) else base_make_intervention_prob
+        self.mecc_effect = mecc_effect['value'] if isinstance(mecc_effect, dict) else mecc_effect
+
+        ## Flag for whether model uncludes MECC training
+        self.mecc_trained = mecc_trained
+        self.make_intervention_prob = self.mecc_effect if self.mecc_trained else self.base_make_intervention_prob
+
+        ## smoking features for people
+        ## Convert dictionary values if they're dictionaries
+        self.initial_smoking_prob = initial_smoking_prob['value'] if isinstance(initial_smoking_prob, dict) else initial_smoking_prob
+        self.quit_attempt_prob = quit_attempt_prob['value'] if isinstance(quit_attempt_prob, dict) else quit_attempt_prob
+        self.base_smoke_relapse_prob = base_smoke_relapse_prob['value'] if isinstance(base_smoke_relapse_prob, dict) else base_smoke_relapse_prob
+        self.intervention_effect = intervention_effect['value'] if isinstance(intervention_effect, dict) else intervention_effect
+
+        ## Relapse chance by months smoke free
+        self.relapse_schedule = relapse_schedule if relapse_schedule is not None else RelapseSchedule(self.base_smoke_relapse_prob)
+
+        ## Running totals for the services
+        self.total_contacts = 0
+        self.total_interventions = 0
+
+        ## Data collector for metrics
+        self.datacollector = DataCollector(
+            model_reporters={
+                "Total Smoking": cohort_number_smoking,
+                "Total Not Smoking": cohort_number_not_smoking,
+                "Total Quit Attempts": cohort_total_quit_attempts,
+                "Total Quit Smoking": cohort_total_quit_smoking,
+                "Total Contacts": cohort_total_contacts,
+                "Total Interventions": cohort_total_interventions,
+                "Smokers With an Intervention": cohort_smoker_with_interventions,
+                "Average Months Smoke Free": cohort_average_months_smoke_free
+            },
+            agent_reporters={}
+        )
+
+        ## Create the starting smokers and never smokers
+        smokers = self.rng.binomial(self.N_people, self.initial_smoking_prob)
+        self.cohorts = Cohorts(smoker = [True, False]
+                               , never_smoked = [False, True]
+                               , months_smoke_free = [0, 0]
+                               , interventions_received = [0, 0]
+                               , quit_attempts = [0, 0]
+                               , count = [smokers, self.N_people - smokers]).merge()
+
+    ## Chance of a quit attempt after a number of interventions
+    def quit_prob(self, interventions_received):
+        return np.minimum(self.quit_attempt_prob * self.intervention_effect ** interventions_received, 1.0)
+
+    ## Caps intervention counts beyond which nothing about a person changes
+    ## so people who only differ by them share a bucket
+    def cap_interventions(self, cohorts):
+        k = cohorts.interventions_received
+        ## never smokers only ever report whether they had an intervention
+        k[cohorts.never_smoked] = np.minimum(k[cohorts.never_smoked], 1)
+        if self.intervention_effect == 1:
+            np.minimum(k, 1, out=k)
+        elif self.intervention_effect > 1 and self.quit_attempt_prob > 0:
+            ## once the quit chance reaches 1 further interventions do not change it
+            saturated = max(int(np.ceil(np.log(1 / self.quit_attempt_prob) / np.log(self.intervention_effect))), 1)
+            np.minimum(k, saturated, out=k)
+        return cohorts
+
+    ## People in each bucket have a chance to visit a service and receive an intervention
+    def move(self):
+        if self.N_service == 0:
+            return
+        ## every service has the same intervention chance, so which service is visited does not matter
+        visitors = self.rng.binomial(self.cohorts.count, self.visit_prob)
+        intervened = self.rng.binomial(visitors, self.make_intervention_prob)
+        self.total_contacts += int(visitors.sum())
+        self.total_interventions += int(intervened.sum())
+
+        self.cohorts = self.cohorts.split(intervened, interventions_received=lambda k: k + 1)
+
+    ## Smokers in each bucket have a chance of quitting smoking
+    def attempt_quit(self):
+        cohorts = self.cohorts
+        quit_prob = np.where(cohorts.smoker, self.quit_prob(cohorts.interventions_received), 0.0)
+        quitters = self.rng.binomial(cohorts.count, quit_prob)
+        self.cohorts = cohorts.split(quitters
+                                     , smoker = lambda values: np.zeros_like(values)
+                                     , never_smoked = lambda values: np.zeros_like(values)
+                                     , months_smoke_free = lambda values: np.zeros_like(values)
+                                     , quit_attempts = lambda values: values + 1)
+
+    ## Ex-smokers in each bucket have a chance of relapsing
+    def update_smoking_status(self):
+        cohorts = self.cohorts
+        ex_smokers = ~cohorts.smoker & ~cohorts.never_smoked  ## Only ex-smokers can relapse
+        cohorts.months_smoke_free[ex_smokers] += 1
+        ## Recidivism rate decreases as months smoke-free increases
+        recidivism_prob = np.where(ex_smokers, self.relapse_schedule[cohorts.months_smoke_free], 0.0)
+        relapsed = self.rng.binomial(cohorts.count, recidivism_prob)
+        self.cohorts = cohorts.split(relapsed
+                                     , smoker = lambda values: np.ones_like(values)
+                                     , months_smoke_free = lambda values: np.zeros_like(values))
+
+    ## Define actions at each step
+    def step(self):
+        self.datacollector.collect(self)
+        self.move()
+        self.attempt_quit()
+        self.update_smoking_status()
+        self.cohorts = self.cap_interventions(self.cohorts).merge()
+
+##################################
+### Metric Outputs
+##################################
+
+## creates the same metrics as the agent model from the buckets
+def cohort_number_smoking(model):
+    return int(model.cohorts.count[model.cohorts.smoker].sum())
+
+def cohort_number_not_smoking(model):
+    return int(model.N_people - model.cohorts.count[model.cohorts.smoker].sum())
+
+def cohort_total_quit_attempts(model):
+    return int((model.cohorts.quit_attempts * model.cohorts.count).sum())
+
+def cohort_total_quit_smoking(model):
+    cohorts = model.cohorts
+    ex_smokers = ~cohorts.never_smoked & ~cohorts.smoker
+    return int((cohorts.quit_attempts * cohorts.count)[ex_smokers].sum())
+
+def cohort_total_contacts(model):
+    return int(model.total_contacts)
+
+def cohort_total_interventions(model):
+    return int(model.total_interventions)
+
+def cohort_smoker_with_interventions(model):
+    cohorts = model.cohorts
+    return int(cohorts.count[~cohorts.never_smoked & (cohorts.interventions_received > 0)].sum())
+
+def cohort_average_months_smoke_free(model):
+    cohorts = model.cohorts
+    non_smokers = ~cohorts.smoker
+    people = cohorts.count[non_smokers].sum()
+    if people == 0:
+        return 0
+    return float((cohorts.months_smoke_free * cohorts.count)[non_smokers].sum() / people)
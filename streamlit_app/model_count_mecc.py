@@ -0,0 +1,94 @@
+# model_count_mecc.py
+
+##################################
+### Packages
+##################################
+import numpy as np
+from mesa import Model
+from mesa.datacollection import DataCollector
+
+##################################
+### Model Class
+##################################
+
+## creates a count-level version of the generic MECC_Model
+## people are interchangeable in the generic model, so each month's totals are sampled directly:
+##   visitors ~ Binomial(N_people, visit_prob)
+##   contacts per service ~ Multinomial(visitors, equal chance of each service)
+##   interventions per service ~ Binomial(contacts, make_intervention_prob)
+## the cost of a step depends on N_service only, not on N_people
+class Count_MECC_Model(Model):
+    def __init__(self
+                , N_people
+                , N_service
+                , mecc_effect
+                , base_make_intervention_prob
+                , visit_prob
+                , mecc_trained = False
+                , seed = None
+                , common_random_numbers = None):
+        super().__init__()
+
+        ## individual people are not tracked, so there are no per-person streams to share
+        if common_random_numbers is not None:
+            raise ValueError("The count engine does not support common random numbers")
+
+        ## Random number generator for all draws
+        self.rng = np.random.default_rng(seed)
+
+        ## numbers of agents
+        ## Convert dictionary values if they're dictionaries
+        self.N_people = N_people['value'] if isinstance(N_people, dict) else N_people
+        self.N_service = N_service['value'] if isinstance(N_service, dict) else N_service
+
+        ## other features for people
+        ## Convert dictionary values if they're dictionaries
+        self.visit_prob = visit_prob['value'] if isinstance(visit_prob, dict) else visit_prob
+
+        ## intervention features for services
+        ## Convert dictionary values if they're dictionaries
+        self.base_make_intervention_prob = base_make_intervention_prob['value'] if isinstance(base_make_intervention_prob, dict) else base_make_intervention_prob
+        self.mecc_effect = mecc_effect['value'] if isinstance(mecc_effect, dict) else mecc_effect
+
+        ## Flag for whether model uncludes MECC training
+        self.mecc_trained = mecc_trained
+        self.make_intervention_prob = self.mecc_effect if self.mecc_trained else self.base_make_intervention_prob
+
+        ## Running totals for each service
+        self.contacts_made = np.zeros(self.N_service, dtype=np.int64)
+        self.interventions_made = np.zeros(self.N_service, dtype=np.int64)
+
+        ## Data collector for metrics
+        self.datacollector = DataCollector(
+            model_reporters={
+                "Total Contacts": count_total_contacts,
+                "Total Interventions": count_total_interventions
+            },
+            agent_reporters={}
+        )
+
+    ## Samples this month's contacts and interventions for every service
+    def move(self):
+        if self.N_service == 0:
+            return
+        visitors = self.rng.binomial(self.N_people, self.visit_prob)
+        contacts = self.rng.multinomial(visitors, np.full(self.N_service, 1 / self.N_service))
+        interventions = self.rng.binomial(contacts, self.make_intervention_prob)
+
+        self.contacts_made += contacts
+        self.interventions_made += interventions
+
+    ## Define actions at each step
+    def step(self):
+        self.datacollector.collect(self)
+        self.move()
+
+##################################
+### Metric Outputs
+##################################
+
+def count_total_contacts(model):
+    return int(model.contacts_made.sum())
+
+def count_total_interventions(model):
+    return int(model.interventions_made.sum())
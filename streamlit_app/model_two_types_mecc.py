@@ -3,20 +3,61 @@
 ##################################
 ### Packages
 ##################################
+import contextlib
 import mesa
-from mesa import Agent, Model
+from mesa import Model
 from mesa.time import RandomActivation
 #from mesa.space import MultiGrid
 from mesa.datacollection import DataCollector
 #import random
-import streamlit as st
+from relapse_schedule import RelapseSchedule
+from phase_profiler import NULL_PHASE
+
+##################################
+### Agent Base Class
+##################################
+
+## stands in for mesa's Agent as the base of the model's agents, with every attribute held in slots
+## mesa's Agent has no __slots__, so anything derived from it carries a per-instance dict however its
+## own attributes are declared; this class keeps the same attributes and methods and registers with
+## the model in the same way, so model.agents and the schedules work as with mesa's Agent
+class SlottedAgent:
+    ## the model's agent registry holds weak references to its agents
+    __slots__ = ('unique_id', 'model', 'pos', '__weakref__')
+
+    def __init__(self
+                 , unique_id
+                 , model):
+        self.unique_id = unique_id
+        self.model = model
+        self.pos = None
+
+        self.model.register_agent(self)
+
+    ## Removes the agent from the model
+    def remove(self):
+        with contextlib.suppress(KeyError):
+            self.model.deregister_agent(self)
+
+    def step(self):
+        pass
+
+    def advance(self):
+        pass
+
+    @property
+    def random(self):
+        return self.model.random
 
 ##################################
 ### Person Agent Class
 ##################################
 
 ## creates a class of person agent
-class PersonAgent(Agent):
+## attributes are held in slots rather than a per-instance dict to keep large populations small
+class PersonAgent(SlottedAgent):
+    __slots__ = ('visit_prob', 'interventions_received')
+
     def __init__(self
                  , unique_id
                  , model
@@ -29,23 +70,39 @@ class PersonAgent(Agent):
         ## Reporting variables
         self.interventions_received = 0
 
+    ## Adds (sign=1) or removes (sign=-1) this agent's state from the model's running counters
+    def update_model_counters(self, sign):
+        pass
+
+    ## Records an intervention made to this person by a service
+    def receive_intervention(self):
+        self.interventions_received += 1
+
     ## Action to make a visit to a service
     def move(self):
-        if self.random.uniform(0,1) < self.visit_prob:
+        if self.model.uniform('visit', self) < self.visit_prob:
             ## randomly selects a service agent
-            ServiceAgent_list = [agent for agent in self.model.schedule.agents if isinstance(agent, ServiceAgent)]
+            ServiceAgent_list = self.model.service_agents
             if ServiceAgent_list:
-                    visited_service = self.random.choice(ServiceAgent_list)
+                    visited_service = self.model.choice('service', self, ServiceAgent_list)
                     ## runs the chosen service's have contact function
                     visited_service.have_contact(self)
 
     ## Defines actions at each step
     def step(self):
-        self.move()
+        profiler = self.model.profiler
+        if profiler is None:
+            self.move()
+        else:
+            with profiler.phase('visit'):
+                self.move()
 
 
 ## creates a subclass of person agent for the smoking model
 class SmokeModel_PersonAgent(PersonAgent):
+    __slots__ = ('smoker', 'never_smoked', 'base_smoke_relapse_prob', 'quit_attempt_prob'
+                 , 'relapse_schedule', 'quit_attempts', 'months_smoke_free')
+
     def __init__(self
                  , unique_id
                  , model
@@ -55,38 +112,86 @@ class SmokeModel_PersonAgent(PersonAgent):
         super().__init__(unique_id, model, visit_prob)
 
         ## Smoking properties
-        self.smoker = self.random.uniform(0, 1) < initial_smoking_prob ## randomise whether a smoker
+        self.smoker = self.model.uniform('initial_smoking', self) < initial_smoking_prob ## randomise whether a smoker
         self.never_smoked = not self.smoker ## Track if they've never smoked
         self.base_smoke_relapse_prob = base_smoke_relapse_prob
         self.quit_attempt_prob = quit_attempt_prob
 
+        ## Relapse chance by months smoke free, shared with the model unless this agent has its own base chance,
+        ## in which case it keeps the model's decay and run length
+        relapse_schedule = getattr(model, 'relapse_schedule', None)
+        if relapse_schedule is None:
+            relapse_schedule = RelapseSchedule(base_smoke_relapse_prob)
+        elif relapse_schedule.base_smoke_relapse_prob != base_smoke_relapse_prob:
+            relapse_schedule = RelapseSchedule(base_smoke_relapse_prob
+                                               , num_steps = len(relapse_schedule) - 1
+                                               , decay = relapse_schedule.decay)
+        self.relapse_schedule = relapse_schedule
+
         ## Smoking Reporting variables
         self.quit_attempts = 0
         self.months_smoke_free = 0
 
+    ## Adds (sign=1) or removes (sign=-1) this agent's state from the model's running counters
+    def update_model_counters(self, sign):
+        model = self.model
+        model.number_smoking += sign * self.smoker
+        model.number_never_smoked += sign * self.never_smoked
+        model.total_quit_attempts += sign * self.quit_attempts
+        if not self.smoker:
+            model.total_months_smoke_free += sign * self.months_smoke_free
+            if not self.never_smoked:
+                model.total_quit_smoking += sign * self.quit_attempts
+        if not self.never_smoked and self.interventions_received > 0:
+            model.smokers_with_interventions += sign
+
+    ## Records an intervention and counts the person once they first have one as a smoker
+    def receive_intervention(self):
+        super().receive_intervention()
+        if self.interventions_received == 1 and not self.never_smoked:
+            self.model.smokers_with_interventions += 1
+
     ## Action to have a change of quitting smoking
     def attempt_quit(self):
-        if self.smoker and self.random.uniform(0, 1) < self.quit_attempt_prob:
+        if self.smoker and self.model.uniform('quit', self) < self.quit_attempt_prob:
             self.smoker = False
             self.quit_attempts += 1
             self.months_smoke_free = 0
             self.never_smoked = False  ## They've now smoked and quit
 
+            ## Update running counters for the new ex-smoker
+            self.model.number_smoking -= 1
+            self.model.total_quit_attempts += 1
+            self.model.total_quit_smoking += self.quit_attempts
+
     ## Action to update smoking status
     def update_smoking_status(self):
         if not self.smoker and not self.never_smoked:  ## Only ex-smokers can relapse
             self.months_smoke_free += 1
+            self.model.total_months_smoke_free += 1
             ## Recidivism rate decreases as months smoke-free increases
-            recidivism_prob = self.base_smoke_relapse_prob * (0.95 ** self.months_smoke_free)
-            if self.random.uniform(0, 1) < recidivism_prob:
+            recidivism_prob = self.relapse_schedule.prob(self.months_smoke_free)
+            if self.model.uniform('relapse', self) < recidivism_prob:
+                ## Update running counters for the relapsed smoker
+                self.model.number_smoking += 1
+                self.model.total_quit_smoking -= self.quit_attempts
+                self.model.total_months_smoke_free -= self.months_smoke_free
+
                 self.smoker = True
                 self.months_smoke_free = 0
 
     ## Defines actions at each step
     def step(self):
         super().step()
-        self.attempt_quit()
-        self.update_smoking_status()
+        profiler = self.model.profiler
+        if profiler is None:
+            self.attempt_quit()
+            self.update_smoking_status()
+        else:
+            with profiler.phase('quit'):
+                self.attempt_quit()
+            with profiler.phase('relapse'):
+                self.update_smoking_status()
 
 
 
@@ -96,7 +201,10 @@ class SmokeModel_PersonAgent(PersonAgent):
 ##################################
 
 ## creates a class of service agent
-class ServiceAgent(Agent):
+class ServiceAgent(SlottedAgent):
+    __slots__ = ('mecc_effect', 'base_make_intervention_prob', 'mecc_trained'
+                 , 'contacts_made', 'interventions_made')
+
     def __init__(self
                  , unique_id
                  , model
@@ -115,6 +223,11 @@ class ServiceAgent(Agent):
         ## Reporting variables
         self.contacts_made = 0
         self.interventions_made = 0
+
+    ## Adds (sign=1) or removes (sign=-1) this agent's state from the model's running counters
+    def update_model_counters(self, sign):
+        self.model.total_contacts += sign * self.contacts_made
+        self.model.total_interventions += sign * self.interventions_made
     
     ## Property for probability of making an intervention
     @property
@@ -128,17 +241,19 @@ class ServiceAgent(Agent):
     def have_contact(self, PersonAgent):
         ## adds one to the service contact count
         self.contacts_made += 1
-        intervention_rand = self.random.uniform(0, 1)
+        self.model.total_contacts += 1
+        intervention_rand = self.model.uniform('intervention', PersonAgent)
         ## for checking outputs
         #st.write(f'chance intervention {intervention_rand}\n\n' +
         #         f' mecc_effect {self.mecc_effect}\n\n'
         #         f' base_make_intervention_prob {self.base_make_intervention_prob}\n\n'
         #         f' make_intervention_prob {self.make_intervention_prob}\n\n-----')
         if intervention_rand < self.make_intervention_prob:
-            PersonAgent.interventions_received += 1
+            PersonAgent.receive_intervention()
             self.perform_intervention(PersonAgent)
             ## adds 1 to the intervention count
             self.interventions_made += 1
+            self.model.total_interventions += 1
     
     # Placeholder for performing an intervention; can be overridden by subclasses
     def perform_intervention(self, PersonAgent):
@@ -150,6 +265,8 @@ class ServiceAgent(Agent):
 
 ## creates a subclass of service agent for smoking model
 class SmokeModel_ServiceAgent(ServiceAgent):
+    __slots__ = ('intervention_effect',)
+
     def __init__(self
                  , unique_id
                  , model
@@ -175,6 +292,57 @@ class SmokeModel_ServiceAgent(ServiceAgent):
 
 
 
+##################################
+### Schedule Class
+##################################
+
+## creates a random activation schedule that keeps a typed registry of its agents
+## so person and service agents can be found without scanning the whole schedule
+class Registry_RandomActivation(RandomActivation):
+    def __init__(self, model, agents=None):
+        ## Registry of agents by type, kept in step with add and remove
+        self.person_agents = []
+        self.service_agents = []
+
+        super().__init__(model)
+        for agent in agents or []:
+            self.add(agent)
+
+    ## Returns the registry list an agent belongs in
+    def registry_for(self, agent):
+        if isinstance(agent, PersonAgent):
+            return self.person_agents
+        if isinstance(agent, ServiceAgent):
+            return self.service_agents
+        return None
+
+    def add(self, agent):
+        super().add(agent)
+        registry = self.registry_for(agent)
+        if registry is not None:
+            registry.append(agent)
+            agent.update_model_counters(1)
+
+    def remove(self, agent):
+        super().remove(agent)
+        registry = self.registry_for(agent)
+        if registry is not None:
+            registry.remove(agent)
+            agent.update_model_counters(-1)
+
+    ## Times the shuffle and the agent steps separately when the model is being profiled
+    def do_each(self, method, shuffle=False):
+        profiler = getattr(self.model, 'profiler', None)
+        if profiler is None:
+            return super().do_each(method, shuffle)
+        if shuffle:
+            with profiler.phase('shuffle'):
+                self._agents.shuffle(inplace=True)
+        with profiler.phase('agent_steps'):
+            self._agents.do(method)
+
+
+
 ##################################
 ### Model Class
 ##################################
@@ -188,12 +356,16 @@ class MECC_Model(Model):
                 , base_make_intervention_prob 
                 , visit_prob
                 , mecc_trained = False
-                , seed = None):
+                , seed = None
+                , debug_counters = False
+                , common_random_numbers = None
+                , profiler = None):
         super().__init__()  # Properly initialize the Model class
 
         ## Set the seed for reproducibility
-        #if seed_value is not None:
-        #    random.seed(seed_value)  
+        ## every agent draws from self.random, so seeding it here seeds the whole model
+        ## (mesa only picks up a seed passed by keyword, so it is reset explicitly)
+        self.reset_randomizer(seed)
 
         ## numbers of agents
         ## Convert dictionary values if they're dictionaries
@@ -211,40 +383,148 @@ class MECC_Model(Model):
         
         ## Flag for whether model uncludes MECC training
         self.mecc_trained = mecc_trained
+
+        ## Running counters updated by agents as their state changes
+        ## so each reporter is O(1) rather than a scan of every agent
+        self.number_smoking = 0
+        self.number_never_smoked = 0
+        self.total_quit_attempts = 0
+        self.total_quit_smoking = 0
+        self.total_contacts = 0
+        self.total_interventions = 0
+        self.smokers_with_interventions = 0
+        self.total_months_smoke_free = 0
+
+        ## Flag to cross-check the running counters against full agent scans each step
+        self.debug_counters = debug_counters
+
+        ## Shared uniform streams for comparing arms, or None to draw from self.random
+        self.common_random_numbers = common_random_numbers
+
+        ## Optional PhaseProfiler timing each phase of a step, or None for no timing
+        self.profiler = profiler
         
         ## Schedule
-        self.schedule = RandomActivation(self)
+        self.schedule = Registry_RandomActivation(self)
         #self.grid = MultiGrid(self.width, self.height, True)
         
         ## Data collector for metrics
         self.datacollector = DataCollector(
             model_reporters={
-                "Total Contacts": calculate_total_contacts,
-                "Total Interventions": calculate_total_interventions
+                name: reporters[0] for name, reporters in self.reporter_pairs().items()
             },
             agent_reporters={}
         )
-        
+
         ## Create person agents
         for i in range(self.N_people):
-            a = PersonAgent(unique_id = i
-                            , model = self
-                            , visit_prob = self.visit_prob)
-            self.schedule.add(a)
-            
+            self.schedule.add(self.create_person_agent(unique_id = i))
+
         ## Create service agents
         for i in range(self.N_service):
-            a = ServiceAgent(unique_id = i + self.N_people
-                             , model = self
-                             , base_make_intervention_prob = self.base_make_intervention_prob
-                             , mecc_effect = self.mecc_effect
-                             , mecc_trained = self.mecc_trained)
-            self.schedule.add(a)
+            self.schedule.add(self.create_service_agent(unique_id = i + self.N_people))
+
+    ##################################
+    ### Construction Hooks
+    ### subclasses override these so each population is built exactly once
+    ##################################
+
+    ## Returns the (running counter, full scan) reporters for each metric
+    def reporter_pairs(self):
+        return GENERIC_REPORTERS
+
+    ## Creates one person agent
+    def create_person_agent(self, unique_id):
+        return PersonAgent(unique_id = unique_id
+                           , model = self
+                           , visit_prob = self.visit_prob)
+
+    ## Creates one service agent
+    def create_service_agent(self, unique_id):
+        return ServiceAgent(unique_id = unique_id
+                            , model = self
+                            , base_make_intervention_prob = self.base_make_intervention_prob
+                            , mecc_effect = self.mecc_effect
+                            , mecc_trained = self.mecc_trained)
+
+    ##################################
+    ### Random Draws
+    ##################################
+
+    ## Returns a uniform draw for a person, from the shared streams if the model has them
+    def uniform(self, stream, person):
+        if self.common_random_numbers is None:
+            return self.random.uniform(0, 1)
+        return self.common_random_numbers.uniform(stream, self.schedule.steps, person.unique_id)
+
+    ## Returns a random choice for a person, from the shared streams if the model has them
+    def choice(self, stream, person, options):
+        if self.common_random_numbers is None:
+            return self.random.choice(options)
+        return options[int(self.uniform(stream, person) * len(options))]
+
+    ## Person agents currently in the schedule
+    @property
+    def person_agents(self):
+        return self.schedule.person_agents
+
+    ## Service agents currently in the schedule
+    @property
+    def service_agents(self):
+        return self.schedule.service_agents
+
+    ##################################
+    ### Agent Registry
+    ##################################
+
+    ## mesa registers each agent in its dict of agents and again in two weakly keyed AgentSets, one of
+    ## all agents and one per type; agents are only kept in the dict here, and the AgentSets are built
+    ## from it when asked for, as the model finds its agents through the schedule's registry instead
+    def register_agent(self, agent):
+        self._agents[agent] = None
+
+    def deregister_agent(self, agent):
+        del self._agents[agent]
+
+    ## All agents registered with the model
+    @property
+    def agents(self):
+        return mesa.agent.AgentSet(self._agents, self)
+
+    ## Registered agents grouped by their class
+    @property
+    def agents_by_type(self):
+        agents_by_type = {}
+        for agent in self._agents:
+            agents_by_type.setdefault(type(agent), []).append(agent)
+        return {agent_type: mesa.agent.AgentSet(agents, self) for agent_type, agents in agents_by_type.items()}
+
+    @property
+    def agent_types(self):
+        return list(dict.fromkeys(type(agent) for agent in self._agents))
+
+    ## Raises an error if any running counter disagrees with a full scan of the agents
+    def check_counters(self):
+        for name, (counter_reporter, scan_reporter) in self.reporter_pairs().items():
+            counted = counter_reporter(self)
+            scanned = scan_reporter(self)
+            if counted != scanned:
+                raise RuntimeError(f"Running counter for '{name}' is {counted} but a full scan gives {scanned}")
+
+    ## Returns a context that times a phase of the step if the model is being profiled
+    def phase(self, name):
+        return NULL_PHASE if self.profiler is None else self.profiler.phase(name)
 
     ## Define actions at each step
     def step(self):
-        self.datacollector.collect(self)
-        self.schedule.step()
+        with self.phase('step'):
+            if self.debug_counters:
+                with self.phase('check_counters'):
+                    self.check_counters()
+            with self.phase('collect'):
+                self.datacollector.collect(self)
+            with self.phase('schedule'):
+                self.schedule.step()
 
 
 ## creates a subclass of model for smoking
@@ -260,99 +540,131 @@ class SmokeModel_MECC_Model(MECC_Model):
                 , intervention_effect
                 , initial_smoking_prob 
                 , quit_attempt_prob
-                , base_smoke_relapse_prob):
-        super().__init__( N_people
-                , N_service
-                , mecc_effect
-                , base_make_intervention_prob 
-                , visit_prob
-                , mecc_trained     
-                , seed )  # Properly initialize the MECC_Model class
+                , base_smoke_relapse_prob
+                , debug_counters = False
+                , common_random_numbers = None
+                , relapse_schedule = None
+                , profiler = None):
 
-        ## smoking features for person agents
+        ## smoking features for person agents, set before the base class builds the agents
         ## Convert dictionary values if they're dictionaries
         self.initial_smoking_prob = initial_smoking_prob['value'] if isinstance(initial_smoking_prob, dict) else initial_smoking_prob
         self.quit_attempt_prob = quit_attempt_prob['value'] if isinstance(quit_attempt_prob, dict) else quit_attempt_prob
         self.base_smoke_relapse_prob = base_smoke_relapse_prob['value'] if isinstance(base_smoke_relapse_prob, dict) else base_smoke_relapse_prob
         self.intervention_effect = intervention_effect['value'] if isinstance(intervention_effect, dict) else intervention_effect
 
-        
-        ## Overwrite Data collector for metrics
-        self.datacollector = DataCollector(
-            model_reporters={
-                "Total Smoking": calculate_number_smoking,
-                "Total Not Smoking": calculate_number_not_smoking,
-                "Total Quit Attempts": calculate_total_quit_attempts,
-                "Total Quit Smoking": calculate_total_quit_smoking,
-                "Total Contacts": calculate_total_contacts,
-                "Total Interventions": calculate_total_interventions,
-                "Smokers With an Intervention": calculate_smoker_with_interventions,
-                "Average Months Smoke Free": calculate_average_months_smoke_free
-            },
-            agent_reporters={}
-        )
-        
-        ## Reset Schedule to overwrite for agents
-        self.schedule = RandomActivation(self)
+        ## Relapse chance by months smoke free, shared by every person agent
+        self.relapse_schedule = relapse_schedule if relapse_schedule is not None else RelapseSchedule(self.base_smoke_relapse_prob)
 
-        ## Create person agents
-        for i in range(self.N_people):
-            a = SmokeModel_PersonAgent(unique_id = i
-                            , model = self
-                            , initial_smoking_prob = self.initial_smoking_prob
-                            , quit_attempt_prob  = self.quit_attempt_prob
-                            , base_smoke_relapse_prob = self.base_smoke_relapse_prob
-                            , visit_prob = self.visit_prob)
-            self.schedule.add(a)
-            
-        ## Create service agents
-        for i in range(self.N_service):
-            a = SmokeModel_ServiceAgent(unique_id = i + self.N_people
-                             , model = self
-                             , base_make_intervention_prob = self.base_make_intervention_prob
-                             , mecc_effect = self.mecc_effect
-                             , intervention_effect = self.intervention_effect
-                             , mecc_trained = self.mecc_trained)
-            self.schedule.add(a)
+        super().__init__( N_people
+                , N_service
+                , mecc_effect
+                , base_make_intervention_prob 
+                , visit_prob
+                , mecc_trained     
+                , seed
+                , debug_counters
+                , common_random_numbers
+                , profiler )  # Properly initialize the MECC_Model class
+
+    ## Smoking model metrics
+    def reporter_pairs(self):
+        return SMOKE_REPORTERS
+
+    ## Creates one smoking model person agent
+    def create_person_agent(self, unique_id):
+        return SmokeModel_PersonAgent(unique_id = unique_id
+                                      , model = self
+                                      , initial_smoking_prob = self.initial_smoking_prob
+                                      , quit_attempt_prob  = self.quit_attempt_prob
+                                      , base_smoke_relapse_prob = self.base_smoke_relapse_prob
+                                      , visit_prob = self.visit_prob)
+
+    ## Creates one smoking model service agent
+    def create_service_agent(self, unique_id):
+        return SmokeModel_ServiceAgent(unique_id = unique_id
+                                       , model = self
+                                       , base_make_intervention_prob = self.base_make_intervention_prob
+                                       , mecc_effect = self.mecc_effect
+                                       , intervention_effect = self.intervention_effect
+                                       , mecc_trained = self.mecc_trained)
 
 ##################################
 ### Metric Outputs
 ##################################
 
 ## creates metrics used by model to report stats
+## the calculate functions scan every agent; the report functions read the model's running counters
 def calculate_number_smoking(model):
-    return sum(1 for agent in model.schedule.agents 
-              if isinstance(agent, PersonAgent) and agent.smoker)
+    return sum(1 for agent in model.person_agents
+              if agent.smoker)
 
 def calculate_number_not_smoking(model):
-    return sum(1 for agent in model.schedule.agents 
-              if isinstance(agent, PersonAgent) and not agent.smoker)
+    return sum(1 for agent in model.person_agents
+              if not agent.smoker)
 
 def calculate_total_quit_attempts(model):
-    return sum(agent.quit_attempts for agent in model.schedule.agents 
-              if isinstance(agent, PersonAgent))
+    return sum(agent.quit_attempts for agent in model.person_agents)
 
 def calculate_total_quit_smoking(model):
-    return sum(agent.quit_attempts for agent in model.schedule.agents 
-              if isinstance(agent, PersonAgent)
-                and not agent.never_smoked
+    return sum(agent.quit_attempts for agent in model.person_agents
+              if not agent.never_smoked
                 and not agent.smoker )
 
 def calculate_total_contacts(model):
-    return sum(agent.contacts_made for agent in model.schedule.agents 
-              if isinstance(agent, ServiceAgent))
+    return sum(agent.contacts_made for agent in model.service_agents)
 
 def calculate_total_interventions(model):
-    return sum(agent.interventions_made for agent in model.schedule.agents 
-              if isinstance(agent, ServiceAgent))
+    return sum(agent.interventions_made for agent in model.service_agents)
 
 def calculate_smoker_with_interventions(model):
-    return sum(1 for agent in model.schedule.agents 
-              if isinstance(agent, PersonAgent)
-                and not agent.never_smoked
+    return sum(1 for agent in model.person_agents
+              if not agent.never_smoked
                 and agent.interventions_received > 0)
 
 def calculate_average_months_smoke_free(model):
-    smoke_free_months = [agent.months_smoke_free for agent in model.schedule.agents 
-                      if isinstance(agent, PersonAgent) and not agent.smoker]
-    return sum(smoke_free_months) / len(smoke_free_months) if smoke_free_months else 0
\ No newline at end of file
+    smoke_free_months = [agent.months_smoke_free for agent in model.person_agents
+                      if not agent.smoker]
+    return sum(smoke_free_months) / len(smoke_free_months) if smoke_free_months else 0
+
+def report_number_smoking(model):
+    return model.number_smoking
+
+def report_number_not_smoking(model):
+    return len(model.person_agents) - model.number_smoking
+
+def report_total_quit_attempts(model):
+    return model.total_quit_attempts
+
+def report_total_quit_smoking(model):
+    return model.total_quit_smoking
+
+def report_total_contacts(model):
+    return model.total_contacts
+
+def report_total_interventions(model):
+    return model.total_interventions
+
+def report_smoker_with_interventions(model):
+    return model.smokers_with_interventions
+
+def report_average_months_smoke_free(model):
+    number_not_smoking = len(model.person_agents) - model.number_smoking
+    return model.total_months_smoke_free / number_not_smoking if number_not_smoking else 0
+
+## pairs of (running counter, full scan) reporters for each model
+GENERIC_REPORTERS = {
+    "Total Contacts": (report_total_contacts, calculate_total_contacts),
+    "Total Interventions": (report_total_interventions, calculate_total_interventions)
+}
+
+SMOKE_REPORTERS = {
+    "Total Smoking": (report_number_smoking, calculate_number_smoking),
+    "Total Not Smoking": (report_number_not_smoking, calculate_number_not_smoking),
+    "Total Quit Attempts": (report_total_quit_attempts, calculate_total_quit_attempts),
+    "Total Quit Smoking": (report_total_quit_smoking, calculate_total_quit_smoking),
+    "Total Contacts": (report_total_contacts, calculate_total_contacts),
+    "Total Interventions": (report_total_interventions, calculate_total_interventions),
+    "Smokers With an Intervention": (report_smoker_with_interventions, calculate_smoker_with_interventions),
+    "Average Months Smoke Free": (report_average_months_smoke_free, calculate_average_months_smoke_free)
+}
@@ -0,0 +1,313 @@
+# model_vectorized_mecc.py
+
+##################################
+### Packages
+##################################
+import numpy as np
+from mesa import Model
+from mesa.datacollection import DataCollector
+from relapse_schedule import RelapseSchedule
+
+##################################
+### Population Array Classes
+##################################
+
+## holds the person agent attributes as one NumPy array per attribute
+## index i in every array is the person with unique_id i
+class PersonArrays:
+    def __init__(self
+                 , N_people
+                 , visit_prob):
+
+        ## Visit properties
+        self.visit_prob = np.full(N_people, visit_prob, dtype=np.float64)
+
+        ## Reporting variables
+        self.interventions_received = np.zeros(N_people, dtype=np.int64)
+
+
+## adds the smoking attributes for the smoking model
+class SmokeModel_PersonArrays(PersonArrays):
+    def __init__(self
+                 , N_people
+                 , visit_prob
+                 , quit_attempt_prob
+                 , smoker):
+        super().__init__(N_people, visit_prob)
+
+        ## Smoking properties
+        self.smoker = smoker
+        self.never_smoked = ~smoker ## Track if they've never smoked
+        self.quit_attempt_prob = np.full(N_people, quit_attempt_prob, dtype=np.float64)
+
+        ## Smoking Reporting variables
+        self.quit_attempts = np.zeros(N_people, dtype=np.int64)
+        self.months_smoke_free = np.zeros(N_people, dtype=np.int64)
+
+
+## holds the service agent attributes as one NumPy array per attribute
+class ServiceArrays:
+    def __init__(self
+                 , N_service
+                 , mecc_effect
+                 , base_make_intervention_prob
+                 , mecc_trained=False):
+
+        ## Intervention
+        self.mecc_trained = np.full(N_service, mecc_trained, dtype=bool)
+        self.make_intervention_prob = np.where(self.mecc_trained
+                                               , mecc_effect
+                                               , base_make_intervention_prob)
+
+        ## Reporting variables
+        self.contacts_made = np.zeros(N_service, dtype=np.int64)
+        self.interventions_made = np.zeros(N_service, dtype=np.int64)
+
+
+##################################
+### Model Class
+##################################
+
+## creates an array-backed version of MECC_Model
+## the whole population is advanced in one batched step rather than one agent at a time
+class Vectorized_MECC_Model(Model):
+    def __init__(self
+                , N_people
+                , N_service
+                , mecc_effect
+                , base_make_intervention_prob
+                , visit_prob
+                , mecc_trained = False
+                , seed = None
+                , common_random_numbers = None):
+        super().__init__()
+
+        ## Random number generator for all batched draws
+        self.rng = np.random.default_rng(seed)
+
+        ## Shared uniform streams for comparing arms, or None to draw from self.rng
+        self.common_random_numbers = common_random_numbers
+        self.month = 0
+
+        ## numbers of agents
+        ## Convert dictionary values if they're dictionaries
+        self.N_people = N_people['value'] if isinstance(N_people, dict) else N_people
+        self.N_service = N_service['value'] if isinstance(N_service, dict) else N_service
+
+        ## other features for people
+        ## Convert dictionary values if they're dictionaries
+        self.visit_prob = visit_prob['value'] if isinstance(visit_prob, dict) else visit_prob
+
+        ## intervention features for services
+        ## Convert dictionary values if they're dictionaries
+        self.base_make_intervention_prob = base_make_intervention_prob['value'] if isinstance(base_make_intervention_prob, dict) else base_make_intervention_prob
+        self.mecc_effect = mecc_effect['value'] if isinstance(mecc_effect, dict) else mecc_effect
+
+        ## Flag for whether model uncludes MECC training
+        self.mecc_trained = mecc_trained
+
+        ## Data collector for metrics
+        self.datacollector = DataCollector(
+            model_reporters=self.model_reporters(),
+            agent_reporters={}
+        )
+
+        ## Create people and services
+        self.people = self.create_people()
+        self.services = self.create_services()
+
+    ##################################
+    ### Construction Hooks
+    ### subclasses override these so each population is built exactly once
+    ##################################
+
+    ## Returns the metrics collected each step
+    def model_reporters(self):
+        return {
+            "Total Contacts": vectorized_total_contacts,
+            "Total Interventions": vectorized_total_interventions
+        }
+
+    ## Creates the people arrays
+    def create_people(self):
+        return PersonArrays(N_people = self.N_people
+                            , visit_prob = self.visit_prob)
+
+    ## Creates the service arrays
+    def create_services(self):
+        return ServiceArrays(N_service = self.N_service
+                             , base_make_intervention_prob = self.base_make_intervention_prob
+                             , mecc_effect = self.mecc_effect
+                             , mecc_trained = self.mecc_trained)
+
+    ##################################
+    ### Random Draws
+    ##################################
+
+    ## Returns uniform draws for the given people, from the shared streams if the model has them
+    def uniform(self, stream, people=None):
+        if self.common_random_numbers is None:
+            return self.rng.random(self.N_people if people is None else people.size)
+        if stream == 'initial_smoking':
+            draws = self.common_random_numbers.initial_smoking()
+        else:
+            draws = self.common_random_numbers.month(self.month)[stream]
+        return draws if people is None else draws[people]
+
+    ## Every person has a chance to visit a randomly chosen service
+    def move(self):
+        visitors = np.flatnonzero(self.uniform('visit') < self.people.visit_prob)
+        if self.N_service == 0 or visitors.size == 0:
+            return
+
+        ## randomly selects a service for each visit
+        if self.common_random_numbers is None:
+            visited_service = self.rng.integers(0, self.N_service, size=visitors.size)
+        else:
+            visited_service = (self.uniform('service', visitors) * self.N_service).astype(np.int64)
+        intervened = (self.uniform('intervention', visitors)
+                      < self.services.make_intervention_prob[visited_service])
+
+        ## adds to the service contact and intervention counts
+        self.services.contacts_made += np.bincount(visited_service, minlength=self.N_service)
+        self.services.interventions_made += np.bincount(visited_service[intervened]
+                                                        , minlength=self.N_service)
+
+        ## each person visits at most once per step so the indices are unique
+        receivers = visitors[intervened]
+        self.people.interventions_received[receivers] += 1
+        self.perform_intervention(receivers)
+
+    # Placeholder for performing interventions; can be overridden by subclasses
+    def perform_intervention(self, receivers):
+        pass
+
+    ## Actions taken by the population each month; can be extended by subclasses
+    def advance(self):
+        self.move()
+
+    ## Define actions at each step
+    def step(self):
+        self.datacollector.collect(self)
+        self.advance()
+        self.month += 1
+
+
+## creates a subclass of the array-backed model for smoking
+class Vectorized_SmokeModel_MECC_Model(Vectorized_MECC_Model):
+    def __init__(self
+                , N_people
+                , N_service
+                , mecc_effect
+                , base_make_intervention_prob
+                , visit_prob
+                , mecc_trained
+                , seed
+                , intervention_effect
+                , initial_smoking_prob
+                , quit_attempt_prob
+                , base_smoke_relapse_prob
+                , common_random_numbers = None
+                , relapse_schedule = None):
+
+        ## smoking features for people, set before the base class builds the arrays
+        ## Convert dictionary values if they're dictionaries
+        self.initial_smoking_prob = initial_smoking_prob['value'] if isinstance(initial_smoking_prob, dict) else initial_smoking_prob
+        self.quit_attempt_prob = quit_attempt_prob['value'] if isinstance(quit_attempt_prob, dict) else quit_attempt_prob
+        self.base_smoke_relapse_prob = base_smoke_relapse_prob['value'] if isinstance(base_smoke_relapse_prob, dict) else base_smoke_relapse_prob
+        self.intervention_effect = intervention_effect['value'] if isinstance(intervention_effect, dict) else intervention_effect
+
+        ## Relapse chance by months smoke free
+        self.relapse_schedule = relapse_schedule if relapse_schedule is not None else RelapseSchedule(self.base_smoke_relapse_prob)
+
+        super().__init__( N_people
+                , N_service
+                , mecc_effect
+                , base_make_intervention_prob
+                , visit_prob
+                , mecc_trained
+                , seed
+                , common_random_numbers )
+
+    ## Smoking model metrics
+    def model_reporters(self):
+        return {
+            "Total Smoking": vectorized_number_smoking,
+            "Total Not Smoking": vectorized_number_not_smoking,
+            "Total Quit Attempts": vectorized_total_quit_attempts,
+            "Total Quit Smoking": vectorized_total_quit_smoking,
+            "Total Contacts": vectorized_total_contacts,
+            "Total Interventions": vectorized_total_interventions,
+            "Smokers With an Intervention": vectorized_smoker_with_interventions,
+            "Average Months Smoke Free": vectorized_average_months_smoke_free
+        }
+
+    ## Creates the people arrays with the smoking attributes
+    def create_people(self):
+        return SmokeModel_PersonArrays(
+            N_people = self.N_people
+            , visit_prob = self.visit_prob
+            , quit_attempt_prob = self.quit_attempt_prob
+            , smoker = self.uniform('initial_smoking') < self.initial_smoking_prob) ## randomise who smokes
+
+    # Override to perform smoking-specific interventions
+    def perform_intervention(self, receivers):
+        self.people.quit_attempt_prob[receivers] *= self.intervention_effect
+
+    ## Every smoker has a chance of quitting smoking
+    def attempt_quit(self):
+        people = self.people
+        quitters = people.smoker & (self.uniform('quit') < people.quit_attempt_prob)
+        people.smoker[quitters] = False
+        people.quit_attempts[quitters] += 1
+        people.months_smoke_free[quitters] = 0
+        people.never_smoked[quitters] = False  ## They've now smoked and quit
+
+    ## Every ex-smoker has a chance of relapsing
+    def update_smoking_status(self):
+        people = self.people
+        ex_smokers = np.flatnonzero(~people.smoker & ~people.never_smoked)  ## Only ex-smokers can relapse
+        people.months_smoke_free[ex_smokers] += 1
+        ## Recidivism rate decreases as months smoke-free increases
+        recidivism_prob = self.relapse_schedule[people.months_smoke_free[ex_smokers]]
+        relapsed = ex_smokers[self.uniform('relapse', ex_smokers) < recidivism_prob]
+        people.smoker[relapsed] = True
+        people.months_smoke_free[relapsed] = 0
+
+    ## Actions taken by the population each month
+    def advance(self):
+        super().advance()
+        self.attempt_quit()
+        self.update_smoking_status()
+
+##################################
+### Metric Outputs
+##################################
+
+## creates the same metrics as the agent model from the population arrays
+def vectorized_number_smoking(model):
+    return int(np.count_nonzero(model.people.smoker))
+
+def vectorized_number_not_smoking(model):
+    return int(model.N_people - np.count_nonzero(model.people.smoker))
+
+def vectorized_total_quit_attempts(model):
+    return int(model.people.quit_attempts.sum())
+
+def vectorized_total_quit_smoking(model):
+    people = model.people
+    return int(people.quit_attempts[~people.never_smoked & ~people.smoker].sum())
+
+def vectorized_total_contacts(model):
+    return int(model.services.contacts_made.sum())
+
+def vectorized_total_interventions(model):
+    return int(model.services.interventions_made.sum())
+
+def vectorized_smoker_with_interventions(model):
+    people = model.people
+    return int(np.count_nonzero(~people.never_smoked & (people.interventions_received > 0)))
+
+def vectorized_average_months_smoke_free(model):
+    smoke_free_months = model.people.months_smoke_free[~model.people.smoker]
+    return float(smoke_free_months.mean()) if smoke_free_months.size else 0
@@ -0,0 +1,274 @@
+## monte_carlo_runner.py
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from simulation_functions import create_MECC_model, run_simulation
+from common_random_numbers import CommonRandomNumbers
+from running_statistics import RunningStatistics
+from worker_processes import worker_context
+
+##################################
+### Monte Carlo Functions
+##################################
+
+## Function to create a seed for each iteration
+def iteration_seeds(base_seed, iterations):
+    """Spawn an independent, non-overlapping seed for each iteration from a base seed"""
+    children = np.random.SeedSequence(base_seed).spawn(iterations)
+    ## 63 bits so the seeds fit in an int64 'seed' column
+    return [int(child.generate_state(1, dtype=np.uint64)[0] >> 1) for child in children]
+
+## Function to run one iteration of both arms for a seed
+def run_iteration(model_parameters
+                  ,seed
+                  ,model_type = 'Generic'
+                  ,engine = 'Agent'
+                  ,common_random_numbers = False):
+    """Run the no MECC and MECC models for one seed and return their data.
+
+    With common_random_numbers both arms share the same uniform streams for
+    visits, initial smoking, quits and relapses, so the intervention decision
+    is the only difference between them.
+    """
+    iteration_parameters = {**model_parameters, "model_seed": int(seed)}
+    shared_streams = (CommonRandomNumbers(int(seed), model_parameters["N_people"])
+                      if common_random_numbers else None)
+
+    iteration_data = []
+    for mecc_trained in [False, True]:
+        model = create_MECC_model(
+            model_parameters=iteration_parameters,
+            model_type=model_type,
+            mecc_trained=mecc_trained,
+            engine=engine,
+            common_random_numbers=shared_streams
+        )
+        data = run_simulation(model, model_parameters["num_steps"])
+        data['seed'] = seed
+        data = data.reset_index(names='month')
+        iteration_data.append(data)
+
+    data_no_mecc, data_mecc = iteration_data
+    return data_no_mecc, data_mecc
+
+## Function to stream iterations back as they complete
+def iter_monte_carlo(model_parameters
+                     ,iterations
+                     ,model_type = 'Generic'
+                     ,engine = 'Agent'
+                     ,max_workers = None
+                     ,common_random_numbers = False):
+    """Yield (iteration, data_no_mecc, data_mecc) for each iteration as it completes.
+
+    Each iteration's seed is spawned from model_parameters["model_seed"], and
+    iterations are spread across a process pool; max_workers=1 runs them in
+    this process. Each iteration depends only on its seed, so results are
+    the same whatever the number of workers.
+    """
+    seeds = iteration_seeds(model_parameters["model_seed"], iterations)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    if max_workers == 1:
+        for iteration, seed in enumerate(seeds):
+            yield (iteration, *run_iteration(model_parameters, seed, model_type, engine, common_random_numbers))
+        return
+
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(seeds) or 1), mp_context=worker_context()) as executor:
+        futures = {
+            executor.submit(run_iteration, model_parameters, seed, model_type, engine, common_random_numbers): iteration
+            for iteration, seed in enumerate(seeds)
+        }
+        for future in as_completed(futures):
+            yield (futures[future], *future.result())
+
+## Function to run all iterations and combine them
+def run_monte_carlo(model_parameters
+                    ,iterations
+                    ,model_type = 'Generic'
+                    ,engine = 'Agent'
+                    ,max_workers = None
+                    ,progress_callback = None
+                    ,common_random_numbers = False):
+    """Run all iterations and return the concatenated no MECC and MECC data.
+
+    progress_callback, if given, is called with the number of completed
+    iterations after each one finishes.
+    """
+    results = {}
+    for completed, (iteration, data_no_mecc, data_mecc) in enumerate(
+            iter_monte_carlo(model_parameters, iterations, model_type, engine, max_workers
+                             , common_random_numbers), start=1):
+        results[iteration] = (data_no_mecc, data_mecc)
+        if progress_callback is not None:
+            progress_callback(completed)
+
+    ## order by iteration so the output does not depend on completion order
+    order = sorted(results)
+    data_no_mecc = pd.concat([results[iteration][0] for iteration in order]).reset_index(drop=True)
+    data_mecc = pd.concat([results[iteration][1] for iteration in order]).reset_index(drop=True)
+    return data_no_mecc, data_mecc
+
+## Function to summarise iterations as they complete without keeping them
+def aggregate_monte_carlo(model_parameters
+                          ,iterations
+                          ,model_type = 'Generic'
+                          ,engine = 'Agent'
+                          ,max_workers = None
+                          ,progress_callback = None
+                          ,common_random_numbers = False
+                          ,statistics = None):
+    """Run all iterations and return running statistics for the no MECC and MECC arms.
+
+    Each iteration is added to the statistics as soon as it completes and then
+    dropped, so memory does not grow with the number of iterations. statistics,
+    if given, is a (no MECC, MECC) pair of RunningStatistics to add to, which
+    lets progress_callback(completed) read them for a live chart.
+    """
+    statistics_no_mecc, statistics_mecc = statistics or (RunningStatistics(), RunningStatistics())
+    for completed, (iteration, data_no_mecc, data_mecc) in enumerate(
+            iter_monte_carlo(model_parameters, iterations, model_type, engine, max_workers
+                             , common_random_numbers), start=1):
+        statistics_no_mecc.update(data_no_mecc)
+        statistics_mecc.update(data_mecc)
+        if progress_callback is not None:
+            progress_callback(completed)
+    return statistics_no_mecc, statistics_mecc
+
+##################################
+### Adaptive Monte Carlo Functions
+##################################
+
+## headline metrics whose final month confidence intervals decide when to stop
+HEADLINE_METRICS = ['Total Interventions']
+
+## Function to measure the precision of the headline metrics
+def headline_precision(statistics_no_mecc
+                       ,statistics_mecc
+                       ,statistics_difference
+                       ,metrics = HEADLINE_METRICS
+                       ,confidence = 0.95):
+    """Return the final month mean and confidence interval half width of each headline metric.
+
+    Each metric is reported for both arms and as the MECC improvement, the
+    per-iteration difference between the arms. relative_half_width is the
+    half width as a fraction of the absolute mean.
+    """
+    precision = {}
+    for label, statistics in [('No MECC', statistics_no_mecc)
+                              , ('MECC Trained', statistics_mecc)
+                              , ('MECC Improvement', statistics_difference)]:
+        half_widths = statistics.half_width(confidence)
+        for metric in metrics:
+            column = statistics.columns.index(metric)
+            mean = statistics.mean[-1, column]
+            half_width = half_widths[-1, column]
+            if half_width == 0:
+                relative_half_width = 0.0
+            elif mean == 0:
+                relative_half_width = np.inf
+            else:
+                relative_half_width = half_width / abs(mean)
+            precision[f"{metric} ({label})"] = {
+                'mean': float(mean),
+                'half_width': float(half_width),
+                'relative_half_width': float(relative_half_width)
+            }
+    return precision
+
+## Function to stream iterations back in order, stopping when asked
+def iter_monte_carlo_in_order(model_parameters
+                              ,max_iterations
+                              ,model_type = 'Generic'
+                              ,engine = 'Agent'
+                              ,max_workers = None
+                              ,common_random_numbers = False):
+    """Yield (iteration, data_no_mecc, data_mecc) in iteration order.
+
+    Only a few iterations per worker are queued ahead of the one being
+    yielded, so closing the generator early cancels the rest. Seeds are the
+    first iterations of iteration_seeds(model_seed, max_iterations), which
+    are the same seeds a fixed run of that many iterations uses.
+    """
+    seeds = iteration_seeds(model_parameters["model_seed"], max_iterations)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    if max_workers == 1:
+        for iteration, seed in enumerate(seeds):
+            yield (iteration, *run_iteration(model_parameters, seed, model_type, engine, common_random_numbers))
+        return
+
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(seeds) or 1), mp_context=worker_context()) as executor:
+        futures = {}
+        try:
+            for iteration in range(len(seeds)):
+                ## keeps two iterations per worker queued so no worker waits
+                for queued in range(len(futures) + iteration, min(iteration + 2 * max_workers, len(seeds))):
+                    futures[queued] = executor.submit(run_iteration, model_parameters, seeds[queued]
+                                                      , model_type, engine, common_random_numbers)
+                yield (iteration, *futures.pop(iteration).result())
+        finally:
+            for future in futures.values():
+                future.cancel()
+
+## Function to run iterations until the headline metrics are precise enough
+def adaptive_monte_carlo(model_parameters
+                         ,target_precision = 0.05
+                         ,confidence = 0.95
+                         ,min_iterations = 10
+                         ,max_iterations = 1000
+                         ,metrics = HEADLINE_METRICS
+                         ,model_type = 'Generic'
+                         ,engine = 'Agent'
+                         ,max_workers = None
+                         ,progress_callback = None
+                         ,common_random_numbers = False
+                         ,statistics = None):
+    """Run iterations until every headline confidence interval is narrow enough.
+
+    Stops at the first iteration count from min_iterations on at which each
+    headline metric's final month half width, for both arms and the MECC
+    improvement, is at most target_precision times its mean, or at
+    max_iterations. Iterations are added in order, so the stopping point
+    does not depend on the number of workers. target_precision=None always
+    runs max_iterations.
+
+    Returns (statistics_no_mecc, statistics_mecc, precision), where precision
+    has the number of 'iterations' run, whether the target was 'converged' on,
+    and the headline_precision 'metrics'. statistics, if given, is a
+    (no MECC, MECC) pair of RunningStatistics to add to, for a live chart.
+    """
+    statistics_no_mecc, statistics_mecc = statistics or (RunningStatistics(), RunningStatistics())
+    statistics_difference = RunningStatistics()
+
+    def measure():
+        return headline_precision(statistics_no_mecc, statistics_mecc, statistics_difference, metrics, confidence)
+
+    converged = False
+    iterations = iter_monte_carlo_in_order(model_parameters, max_iterations, model_type, engine, max_workers
+                                           , common_random_numbers)
+    try:
+        for completed, (iteration, data_no_mecc, data_mecc) in enumerate(iterations, start=1):
+            statistics_no_mecc.update(data_no_mecc)
+            statistics_mecc.update(data_mecc)
+            ## both arms share a month column, so the difference of the rest is the MECC improvement
+            difference = data_mecc.drop(columns=['month', 'seed']) - data_no_mecc.drop(columns=['month', 'seed'])
+            statistics_difference.update(difference.assign(month=data_mecc['month']))
+            if progress_callback is not None:
+                progress_callback(completed)
+
+            if target_precision is not None and completed >= max(min_iterations, 2):
+                if all(value['relative_half_width'] <= target_precision for value in measure().values()):
+                    converged = True
+                    break
+    finally:
+        iterations.close()
+
+    precision = {
+        'iterations': len(statistics_difference),
+        'converged': converged,
+        'confidence': confidence,
+        'target_precision': target_precision,
+        'metrics': measure()
+    }
+    return statistics_no_mecc, statistics_mecc, precision
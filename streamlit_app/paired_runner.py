@@ -0,0 +1,161 @@
+## paired_runner.py
+import queue
+import traceback
+from simulation_functions import create_MECC_model, run_simulation_step
+from simulation_results import SimulationResults
+from worker_processes import worker_context
+
+##################################
+### Paired Scenario Functions
+##################################
+
+## the two arms of a comparison and whether each is MECC trained
+ARMS = {'no_mecc': False, 'mecc': True}
+
+## Function to step one arm and yield a snapshot for each month
+def arm_snapshots(model_parameters
+                  ,arm
+                  ,model_type = 'Generic'
+                  ,engine = 'Agent'):
+    """Yield (arm, month, row) for each month of one arm"""
+    model = create_MECC_model(
+        model_parameters=model_parameters,
+        model_type=model_type,
+        mecc_trained=ARMS[arm],
+        engine=engine
+    )
+    for month in range(model_parameters["num_steps"]):
+        yield arm, month, run_simulation_step(model)
+
+## Function run by each worker process
+def run_arm(model_parameters
+            ,arm
+            ,model_type
+            ,engine
+            ,snapshot_queue):
+    """Put each month's snapshot of one arm on the queue.
+
+    A failure is sent as (arm, None, traceback) so the UI thread can raise it.
+    """
+    try:
+        for snapshot in arm_snapshots(model_parameters, arm, model_type, engine):
+            snapshot_queue.put(snapshot)
+    except Exception:
+        snapshot_queue.put((arm, None, traceback.format_exc()))
+
+##################################
+### Paired Scenario Runner
+##################################
+
+## runs the no MECC and MECC arms side by side in worker processes
+## the UI thread only reads finished monthly snapshots off a queue, so the
+## total wall time is that of the slower arm rather than the sum of both
+class PairedScenarioRunner:
+    def __init__(self
+                 , model_parameters
+                 , model_type = 'Generic'
+                 , engine = 'Agent'
+                 , parallel = True
+                 , poll_interval = 1.0):
+        self.model_parameters = model_parameters
+        self.model_type = model_type
+        self.engine = engine
+        self.num_steps = model_parameters["num_steps"]
+
+        ## parallel=False steps the arms in turn in this process
+        self.parallel = parallel
+        self.poll_interval = poll_interval
+        self.workers = []
+
+        ## buffers of the months received so far, created from the first row of each arm
+        self.results = {arm: None for arm in ARMS}
+
+    @property
+    def results_no_mecc(self):
+        return self.results['no_mecc']
+
+    @property
+    def results_mecc(self):
+        return self.results['mecc']
+
+    ## Starts a worker process for each arm
+    def start(self):
+        if self.parallel:
+            context = worker_context()
+            self.snapshot_queue = context.Queue()
+            self.workers = [
+                context.Process(target=run_arm
+                                , args=(self.model_parameters, arm, self.model_type, self.engine, self.snapshot_queue)
+                                , daemon=True)
+                for arm in ARMS
+            ]
+            for worker in self.workers:
+                worker.start()
+        else:
+            self.serial_arms = [arm_snapshots(self.model_parameters, arm, self.model_type, self.engine)
+                                for arm in ARMS]
+            self.serial_turn = 0
+        return self
+
+    ## Stops any workers still running
+    def stop(self):
+        for worker in self.workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+        self.workers = []
+
+    ## Returns the next snapshot from either arm
+    def receive(self):
+        if not self.parallel:
+            ## takes turns between the arms so both advance together
+            arm_iterator = self.serial_arms[self.serial_turn % len(self.serial_arms)]
+            self.serial_turn += 1
+            return next(arm_iterator)
+
+        while True:
+            try:
+                return self.snapshot_queue.get(timeout=self.poll_interval)
+            except queue.Empty:
+                ## a worker that died without reporting would otherwise block forever
+                for worker in self.workers:
+                    if worker.exitcode not in (None, 0):
+                        raise RuntimeError(f"Simulation worker exited with code {worker.exitcode}")
+
+    ## Yields (month, row_no_mecc, row_mecc) once both arms have finished a month
+    def snapshots(self):
+        """Yield each month in order as soon as both arms have reached it.
+
+        The rows are also appended to results_no_mecc and results_mecc.
+        """
+        if not self.workers and not hasattr(self, 'serial_arms'):
+            self.start()
+
+        pending = {arm: {} for arm in ARMS}
+        try:
+            for month in range(self.num_steps):
+                while any(month not in pending[arm] for arm in ARMS):
+                    arm, arm_month, row = self.receive()
+                    if arm_month is None:
+                        raise RuntimeError(f"The {arm} simulation failed:\n{row}")
+                    pending[arm][arm_month] = row
+
+                rows = {arm: pending[arm].pop(month) for arm in ARMS}
+                for arm, row in rows.items():
+                    if self.results[arm] is None:
+                        self.results[arm] = SimulationResults(row.keys(), self.num_steps)
+                    self.results[arm].append(row)
+                yield month, rows['no_mecc'], rows['mecc']
+        finally:
+            self.stop()
+
+## Function to run both arms and return their data
+def run_paired_simulation(model_parameters
+                          ,model_type = 'Generic'
+                          ,engine = 'Agent'
+                          ,parallel = True):
+    """Run the no MECC and MECC arms together and return their data"""
+    runner = PairedScenarioRunner(model_parameters, model_type, engine, parallel)
+    for _ in runner.snapshots():
+        pass
+    return runner.results_no_mecc.to_dataframe(), runner.results_mecc.to_dataframe()
@@ -60,6 +60,12 @@ with tab1:
             st.session_state.animation_speed = 0.1
         st.session_state.animation_speed = st.slider("Animation Speed (seconds)", 0)
 
+        if 'precompute_replay' not in st.session_state:
+            st.session_state.precompute_replay = True
+        st.session_state.precompute_replay = st.checkbox("Simulate First, Then Animate"
+                                                         , st.session_state.precompute_replay
+                                                         , help="Runs the whole simulation before animating it, so the final statistics are ready straight away and the animation can be skipped or scrubbed through")
+
     ## Logic Diagram
     with st.expander("Click here to view the logic diagram"):
         #col1a, col2a, col3a = st.columns(3)
@@ -93,6 +99,10 @@ with tab2:
         st.session_state.base_smoke_relapse_prob = st.slider("Base Smoking Relapse per Month", 0.00, 1.00, st.session_state.base_smoke_relapse_prob)
         st.markdown("*Relapse chance decreases over time of not smoking*")
 
+        if 'relapse_decay' not in st.session_state:
+            st.session_state.relapse_decay = 0.95
+        st.session_state.relapse_decay = st.slider("Relapse Chance Kept per Smoke-Free Month", 0.00, 1.00, st.session_state.relapse_decay)
+
     with col5:
         st.markdown("#### Service")
 
@@ -117,6 +127,8 @@ with tab2:
 
         st.write(f"Animation Speed (seconds): :blue-background[{st.session_state.animation_speed}]")
 
+        st.write(f"Simulate First, Then Animate: :blue-background[{st.session_state.precompute_replay}]")
+
     ## Logic Diagram
     with st.expander("Click here to view the logic diagram"):
        #col4a, col5a, col6a = st.columns(3)
@@ -153,11 +165,30 @@ with tab3:
 
         if 'iterations' not in st.session_state:
             st.session_state.iterations = 100
-        st.session_state.iterations = st.slider("Number of Reruns"
+        if 'adaptive_stopping' not in st.session_state:
+            st.session_state.adaptive_stopping = False
+        st.session_state.adaptive_stopping = st.checkbox("Stop Reruns Once Precise Enough"
+                                                         , st.session_state.adaptive_stopping
+                                                         , help="Keeps rerunning until the 95% confidence intervals on the final month's interventions and MECC improvement are within the target precision, up to the number of reruns")
+
+        st.session_state.iterations = st.slider("Maximum Number of Reruns" if st.session_state.adaptive_stopping else "Number of Reruns"
                                                 , 100, 1000
                                                 , st.session_state.iterations
                                                 , step=100)
 
+        if 'target_precision' not in st.session_state:
+            st.session_state.target_precision = 5
+        if st.session_state.adaptive_stopping:
+            st.session_state.target_precision = st.slider("Target Precision (± % of the Mean)"
+                                                          , 1, 20
+                                                          , st.session_state.target_precision)
+
+        if 'common_random_numbers' not in st.session_state:
+            st.session_state.common_random_numbers = False
+        st.session_state.common_random_numbers = st.checkbox("Use Common Random Numbers"
+                                                             , st.session_state.common_random_numbers
+                                                             , help="Both arms share the same random draws so only the intervention decision differs, which needs fewer reruns for the same precision")
+
         st.write(f"Number of Months to Simulate: :blue-background[{st.session_state.num_steps}]")
 
         st.write(f"Animation Speed (seconds): :blue-background[{st.session_state.animation_speed}]")
@@ -0,0 +1,127 @@
+## phase_profiler.py
+import json
+import time
+from contextlib import nullcontext
+
+##################################
+### Phase Profiler
+##################################
+
+## shared do-nothing context used when a model has no profiler
+NULL_PHASE = nullcontext()
+
+## times one entry into a phase and hands the result to the profiler
+class Phase:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, self.start, time.perf_counter_ns())
+        return False
+
+## records cumulative wall time and call counts for each phase of a model step
+## phases nest, so a phase's time includes the phases run inside it:
+##   step > check_counters, collect, schedule > shuffle, agent_steps > visit, quit, relapse
+class PhaseProfiler:
+    def __init__(self
+                 , trace = False
+                 , max_trace_events = 1_000_000):
+        ## running totals in nanoseconds and call counts by phase
+        self.total_ns = {}
+        self.calls = {}
+
+        ## individual (phase, start, end) events, only kept if trace is on
+        self.trace = trace
+        self.max_trace_events = max_trace_events
+        self.events = []
+        self.dropped_events = 0
+        self.origin_ns = time.perf_counter_ns()
+
+    ## Returns a context that times one run of a phase
+    def phase(self, name):
+        return Phase(self, name)
+
+    ## Adds one run of a phase to the totals
+    def record(self, name, start_ns, end_ns):
+        self.total_ns[name] = self.total_ns.get(name, 0) + (end_ns - start_ns)
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self.trace:
+            if len(self.events) < self.max_trace_events:
+                self.events.append((name, start_ns, end_ns))
+            else:
+                self.dropped_events += 1
+
+    ## Clears everything recorded so far
+    def reset(self):
+        self.total_ns.clear()
+        self.calls.clear()
+        self.events.clear()
+        self.dropped_events = 0
+        self.origin_ns = time.perf_counter_ns()
+
+    ## Returns a dictionary of calls, total and mean seconds for each phase, slowest first
+    def summary(self):
+        return {
+            name: {
+                'calls': self.calls[name],
+                'total_seconds': total / 1e9,
+                'mean_seconds': total / 1e9 / self.calls[name]
+            }
+            for name, total in sorted(self.total_ns.items(), key=lambda item: -item[1])
+        }
+
+    ## Writes the trace events in Chrome trace format (chrome://tracing or Perfetto)
+    def write_chrome_trace(self, path):
+        trace_events = [
+            {
+                'name': name,
+                'ph': 'X',
+                'ts': (start - self.origin_ns) / 1000,
+                'dur': (end - start) / 1000,
+                'pid': 1,
+                'tid': 1
+            }
+            for name, start, end in self.events
+        ]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f)
+
+    ## Writes the trace events as a Speedscope evented profile (https://www.speedscope.app)
+    def write_speedscope(self, path, name = 'MECC model'):
+        frames = {phase: i for i, phase in enumerate(dict.fromkeys(phase for phase, _, _ in self.events))}
+
+        ## replays the events on a stack so every open is matched by a close in nesting order
+        speedscope_events = []
+        stack = []
+        for phase, start, end in sorted(self.events, key=lambda event: (event[1], -event[2])):
+            while stack and stack[-1][2] <= start:
+                closed = stack.pop()
+                speedscope_events.append({'type': 'C', 'frame': frames[closed[0]], 'at': closed[2] - self.origin_ns})
+            speedscope_events.append({'type': 'O', 'frame': frames[phase], 'at': start - self.origin_ns})
+            stack.append((phase, start, end))
+        while stack:
+            closed = stack.pop()
+            speedscope_events.append({'type': 'C', 'frame': frames[closed[0]], 'at': closed[2] - self.origin_ns})
+
+        profile = {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': [{'name': phase} for phase in frames]},
+            'profiles': [{
+                'type': 'evented',
+                'name': name,
+                'unit': 'nanoseconds',
+                'startValue': speedscope_events[0]['at'] if speedscope_events else 0,
+                'endValue': speedscope_events[-1]['at'] if speedscope_events else 0,
+                'events': speedscope_events
+            }],
+            'exporter': 'phase_profiler.py'
+        }
+        with open(path, 'w') as f:
+            json.dump(profile, f)
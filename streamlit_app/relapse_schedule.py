@@ -0,0 +1,45 @@
+## relapse_schedule.py
+import numpy as np
+
+##################################
+### Relapse Schedule
+##################################
+
+## fraction of the relapse chance kept for each extra month smoke free
+DEFAULT_RELAPSE_DECAY = 0.95
+
+## creates a lookup table of the monthly relapse chance by months smoke free
+## relapse chance = base_smoke_relapse_prob * decay ** months_smoke_free,
+## worked out once per run instead of once per ex-smoker per month
+class RelapseSchedule:
+    def __init__(self
+                 , base_smoke_relapse_prob
+                 , num_steps = 120
+                 , decay = DEFAULT_RELAPSE_DECAY):
+        self.base_smoke_relapse_prob = base_smoke_relapse_prob
+        self.decay = decay
+
+        ## months_smoke_free can be at most the number of months simulated
+        self.extend(int(num_steps) + 1)
+
+    def __len__(self):
+        return len(self.probs_list)
+
+    ## Works out the table up to a number of months
+    def extend(self, months):
+        ## worked out in Python so the values match the agent model's float power exactly
+        self.probs_list = [self.base_smoke_relapse_prob * (self.decay ** month) for month in range(months)]
+        self.probs = np.array(self.probs_list, dtype=np.float64)
+
+    ## Returns the relapse chance for one person, for the agent engine
+    def prob(self, months_smoke_free):
+        if months_smoke_free >= len(self.probs_list):
+            self.extend(max(2 * len(self.probs_list), months_smoke_free + 1))
+        return self.probs_list[months_smoke_free]
+
+    ## Returns the relapse chance for an array of months smoke free, for the array engines
+    def __getitem__(self, months_smoke_free):
+        months_smoke_free = np.asarray(months_smoke_free)
+        if months_smoke_free.size and months_smoke_free.max() >= len(self.probs_list):
+            self.extend(max(2 * len(self.probs_list), int(months_smoke_free.max()) + 1))
+        return self.probs[months_smoke_free]
@@ -0,0 +1,174 @@
+## report_service.py
+import os
+import shutil
+import hashlib
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from artifact_store import get_artifact_store
+
+##################################
+### Report Keys
+##################################
+
+## Function to hash a report's inputs
+def report_key(qmd_path, input_paths):
+    """Return a hash of the report source and the contents of the files it reads"""
+    report_hash = hashlib.sha256()
+    for path in [qmd_path, *input_paths]:
+        with open(path, 'rb') as f:
+            contents = f.read()
+        ## each file's length goes in first, so bytes moving from one file to the next change the hash
+        report_hash.update(len(contents).to_bytes(8, 'little'))
+        report_hash.update(contents)
+    return report_hash.hexdigest()
+
+##################################
+### Report Service
+##################################
+
+## files the reports need alongside the .qmd when a copy is rendered elsewhere
+REPORT_SUPPORT_FILES = ['NHS_report_theme.css']
+
+## renders Quarto reports on background threads so the page is not blocked while Quarto runs
+## a copy of the .qmd is rendered in the directory holding its input files, so renders for different
+## runs share no files and can run at the same time; the report is saved there under a name made from
+## the hash of its inputs, so a page asking again for the same inputs gets the saved HTML
+## given an artifact store, the directory is pinned from the request until the render finishes,
+## so the store's cleanup cannot remove the files Quarto is reading
+class ReportService:
+    def __init__(self
+                 , quarto_command = None
+                 , max_workers = None
+                 , artifact_store = None):
+        ## the same QUARTO_PATH variable quarto_render_func reads, otherwise quarto on the PATH
+        self.quarto_command = quarto_command or os.getenv("QUARTO_PATH") or "quarto"
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1
+                                           , thread_name_prefix='quarto-render')
+        self.artifact_store = artifact_store
+        self.renders = {}
+        self.lock = threading.Lock()
+
+    ## Path the report for one set of inputs is saved to, next to the inputs
+    def html_path(self, qmd_path, input_paths, key):
+        report_name = os.path.splitext(os.path.basename(qmd_path))[0]
+        return os.path.join(os.path.dirname(input_paths[0]), f"{report_name}_{key[:16]}.html")
+
+    ## Runs Quarto, on a worker thread
+    def render(self, qmd_path, input_paths, key):
+        data_dir = os.path.abspath(os.path.dirname(input_paths[0]))
+        app_dir = os.path.dirname(os.path.abspath(qmd_path))
+        render_path = os.path.join(data_dir, os.path.basename(qmd_path))
+        if data_dir != app_dir:
+            shutil.copy(qmd_path, render_path)
+            for filename in REPORT_SUPPORT_FILES:
+                if os.path.exists(os.path.join(app_dir, filename)):
+                    shutil.copy(os.path.join(app_dir, filename), data_dir)
+
+        try:
+            ## the report's parameters point it at the copied inputs and at the app's modules
+            ## the copy is still inside the app's Quarto project, so its output-dir is overridden
+            ## to keep the report in the run directory
+            result = subprocess.run([self.quarto_command
+                                     , "render"
+                                     , render_path
+                                     , "--to"
+                                     , "html"
+                                     , "--output-dir"
+                                     , data_dir
+                                     , "-P"
+                                     , "data_dir:."
+                                     , "-P"
+                                     , f"app_dir:{app_dir}"]
+                                    , cwd=data_dir
+                                    , capture_output=True
+                                    , text=True)
+        except FileNotFoundError:
+            raise RuntimeError(f"Quarto could not be found at '{self.quarto_command}'")
+
+        rendered_path = os.path.splitext(render_path)[0] + '.html'
+        if result.returncode != 0 or not os.path.exists(rendered_path):
+            raise RuntimeError(result.stderr.strip() or f"Quarto exited with code {result.returncode}")
+
+        ## the inputs may have been rewritten while Quarto was reading them
+        ## the render is forgotten rather than kept as failed, so these inputs can be asked for again
+        if report_key(qmd_path, input_paths) != key:
+            os.remove(rendered_path)
+            with self.lock:
+                self.renders.pop(key, None)
+            raise RuntimeError("The report inputs changed while it was rendering")
+
+        html_path = self.html_path(qmd_path, input_paths, key)
+        os.replace(rendered_path, html_path)
+        return html_path
+
+    ## Renders a report whose directory was pinned when it was requested, then unpins it
+    def render_pinned(self, qmd_path, input_paths, key):
+        try:
+            return self.render(qmd_path, input_paths, key)
+        finally:
+            if self.artifact_store is not None:
+                self.artifact_store.unpin(os.path.dirname(input_paths[0]))
+
+    ## Returns the status of the report for the current inputs, starting a render if there is none
+    def request(self, qmd_path, input_paths):
+        """Return a dictionary with the report's status, key, html_path and message.
+
+        input_paths must all be in one directory, which the report is rendered in.
+
+        status is 'ready' once html_path holds the report, 'rendering' while
+        Quarto runs in the background, or 'failed' with the reason in message.
+        A failed render is reported once, and asking again renders it again.
+        """
+        key = report_key(qmd_path, input_paths)
+        html_path = self.html_path(qmd_path, input_paths, key)
+        if os.path.exists(html_path):
+            return {'status': 'ready', 'key': key, 'html_path': html_path, 'message': None}
+
+        with self.lock:
+            if key not in self.renders:
+                ## pinned before the render is queued, and unpinned by it once Quarto is done
+                if self.artifact_store is not None:
+                    self.artifact_store.pin(os.path.dirname(input_paths[0]))
+                self.renders[key] = self.executor.submit(self.render_pinned, qmd_path, list(input_paths), key)
+            render = self.renders[key]
+
+        return self.status(key, render)
+
+    ## Waits for a requested report to finish rendering and returns its status
+    def wait(self, key, timeout = None):
+        with self.lock:
+            render = self.renders[key]
+        render.exception(timeout)
+        return self.status(key, render)
+
+    ## Returns whether a render for a key is still running, without starting one or taking its result
+    def rendering(self, key):
+        with self.lock:
+            render = self.renders.get(key)
+        return render is not None and not render.done()
+
+    def status(self, key, render):
+        if not render.done():
+            return {'status': 'rendering', 'key': key, 'html_path': None, 'message': None}
+        if render.exception() is not None:
+            ## forgotten once reported, so the next request tries again, e.g. after Quarto is installed
+            with self.lock:
+                if self.renders.get(key) is render:
+                    del self.renders[key]
+            return {'status': 'failed', 'key': key, 'html_path': None, 'message': str(render.exception())}
+        return {'status': 'ready', 'key': key, 'html_path': render.result(), 'message': None}
+
+## one service for the whole app, so every session shares its workers
+## created under a lock, so sessions starting together cannot each create their own
+_shared_service = None
+_shared_service_lock = threading.Lock()
+
+def get_report_service():
+    """Return the process-wide report service"""
+    global _shared_service
+    with _shared_service_lock:
+        if _shared_service is None:
+            _shared_service = ReportService(artifact_store=get_artifact_store())
+    return _shared_service
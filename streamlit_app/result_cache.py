@@ -0,0 +1,210 @@
+## result_cache.py
+import os
+import json
+import contextlib
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+##################################
+### Cache Keys
+##################################
+
+## files whose contents decide the model results
+## a change to any of them gives a new code version, so older cached results are not reused
+MODEL_CODE_FILES = [
+    'common_random_numbers.py',
+    'model_cohort_mecc.py',
+    'model_count_mecc.py',
+    'model_two_types_mecc.py',
+    'model_vectorized_mecc.py',
+    'monte_carlo_runner.py',
+    'paired_runner.py',
+    'relapse_schedule.py',
+    'running_statistics.py',
+    'simulation_functions.py',
+    'simulation_results.py'
+]
+
+## parameters that only change how results are shown, not the results themselves
+IGNORED_PARAMETERS = {'animation_speed'}
+
+## Function to hash the model code
+def model_code_version():
+    """Return a short hash of the model source files"""
+    code_hash = hashlib.sha256()
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    for filename in MODEL_CODE_FILES:
+        with open(os.path.join(app_dir, filename), 'rb') as f:
+            code_hash.update(f.read())
+    return code_hash.hexdigest()[:16]
+
+MODEL_CODE_VERSION = model_code_version()
+
+## Function to create a cache key
+def cache_key(model_parameters
+              ,model_type = 'Generic'
+              ,mecc_trained = False
+              ,engine = 'Agent'
+              ,**extra):
+    """Return a canonical hash of everything that decides a simulation's results.
+
+    model_parameters includes the seed as "model_seed"; any extra keyword
+    arguments (e.g. iterations) are added to the key.
+    """
+    key_data = {
+        'parameters': {name: value for name, value in model_parameters.items()
+                       if name not in IGNORED_PARAMETERS},
+        'model_type': model_type,
+        'mecc_trained': bool(mecc_trained),
+        'engine': engine,
+        'code_version': MODEL_CODE_VERSION,
+        'extra': extra
+    }
+    ## sorted keys and numpy values as plain Python values make the JSON canonical
+    canonical = json.dumps(key_data, sort_keys=True, separators=(',', ':')
+                           , default=lambda value: value.item() if isinstance(value, np.generic) else str(value))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+##################################
+### Result Cache
+##################################
+
+## creates a two tier cache of simulation result DataFrames
+## an in-memory LRU tier in front of an on-disk tier with size-based eviction
+class ResultCache:
+    def __init__(self
+                 , cache_dir = None
+                 , memory_items = 64
+                 , max_disk_bytes = 500 * 1024 * 1024):
+        ## in-memory tier, least recently used first
+        ## the cache is shared by every session's thread, so the tier and the stats are only changed under the lock
+        self.memory = OrderedDict()
+        self.memory_items = memory_items
+        self.lock = threading.Lock()
+
+        ## on-disk tier, written as Parquet
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+        ## counts of where requests were served from
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+    def __contains__(self, key):
+        return key in self.memory or (self.cache_dir is not None and os.path.exists(self.disk_path(key)))
+
+    ## Path of a cached result on disk
+    def disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    ## Returns a copy of the cached DataFrame, or None if the key is not cached
+    def get(self, key):
+        with self.lock:
+            data = self.memory.get(key)
+            if data is not None:
+                self.memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return data.copy()
+
+        ## read outside the lock, so other sessions are not held up by the disk
+        try:
+            data = self.read_disk(key) if self.cache_dir is not None else None
+            ## touch the file so disk eviction is least recently used
+            if data is not None:
+                os.utime(self.disk_path(key))
+        except FileNotFoundError:
+            ## not cached, or evicted by another session while being read
+            data = None
+
+        if data is not None:
+            self.remember(key, data)
+            with self.lock:
+                self.stats['disk_hits'] += 1
+            return data.copy()
+
+        with self.lock:
+            self.stats['misses'] += 1
+        return None
+
+    ## Stores a DataFrame in both tiers
+    def put(self, key, data):
+        data = data.copy()
+        self.remember(key, data)
+        if self.cache_dir is not None:
+            self.write_disk(key, data)
+            self.evict_disk()
+
+    ## Returns the cached DataFrame, running and caching the simulation if it is missing
+    def get_or_run(self, key, run_function):
+        data = self.get(key)
+        if data is None:
+            data = run_function()
+            self.put(key, data)
+        return data
+
+    ## Adds a DataFrame to the in-memory tier, dropping the least recently used beyond the limit
+    def remember(self, key, data):
+        with self.lock:
+            self.memory[key] = data
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_items:
+                self.memory.popitem(last=False)
+
+    def write_disk(self, key, data):
+        ## writes to a temporary file first so a reader never sees a partial file
+        path = self.disk_path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        data.to_parquet(temp_path, index=True)
+        os.replace(temp_path, path)
+
+    def read_disk(self, key):
+        return pd.read_parquet(self.disk_path(key))
+
+    ## Removes the least recently used files until the disk tier is within its size limit
+    def evict_disk(self):
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.parquet'):
+                path = os.path.join(self.cache_dir, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    ## evicted by another session in the meantime
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_disk_bytes:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            total_bytes -= size
+
+    ## Empties both tiers
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+        if self.cache_dir is not None:
+            for filename in os.listdir(self.cache_dir):
+                if filename.endswith('.parquet'):
+                    os.remove(os.path.join(self.cache_dir, filename))
+
+## one cache shared by every session in the app's process
+## created under a lock, so sessions starting together cannot each create their own
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+## Function to get the app's shared result cache
+def get_result_cache():
+    """Return the process-wide cache stored under streamlit_app/cache"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+            _shared_cache = ResultCache(cache_dir=cache_dir)
+    return _shared_cache
@@ -0,0 +1,101 @@
+## results_store.py
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+##################################
+### Results Schema
+##################################
+
+## columns every stored results table starts with, before the model's reporters
+INDEX_COLUMNS = ['month', 'seed']
+
+## file formats results can be stored in, by file extension
+## csv is only for exporting, as it loses the column types and has to be parsed to be read back
+RESULTS_FORMATS = ['arrow', 'parquet', 'csv']
+
+## Function to build the schema of a results table
+def results_schema(data):
+    """Return the Arrow schema for data: month and seed, then each reporter in order.
+
+    Reporters with an integer dtype are stored as int64 and the rest as float64.
+    """
+    fields = [pa.field(column, pa.int64(), nullable=False) for column in INDEX_COLUMNS]
+    for column in data.columns:
+        if column in INDEX_COLUMNS:
+            continue
+        dtype = pa.int64() if pd.api.types.is_integer_dtype(data[column]) else pa.float64()
+        fields.append(pa.field(column, dtype, nullable=False))
+    return pa.schema(fields)
+
+## Function to convert results to an Arrow table
+def results_table(data, seed = None):
+    """Return data as an Arrow table with the results schema.
+
+    Single runs have no month or seed columns: month is taken from the index,
+    which is the step as in the DataCollector, and seed must be given.
+    """
+    columns = {}
+    if 'month' not in data.columns:
+        columns['month'] = data.index.to_numpy(dtype=np.int64)
+    if 'seed' not in data.columns:
+        if seed is None:
+            raise ValueError("results without a seed column need the seed they were run with")
+        columns['seed'] = np.full(len(data), seed, dtype=np.int64)
+    data = data.assign(**columns)
+
+    schema = results_schema(data)
+    return pa.Table.from_pandas(data[schema.names], schema=schema, preserve_index=False)
+
+##################################
+### Writing and Reading Results
+##################################
+
+## Function to write results as an Arrow IPC file in memory
+def results_bytes(data, seed = None):
+    """Return the Arrow IPC file for data as bytes, e.g. to save with other run files"""
+    table = results_table(data, seed)
+    sink = pa.BufferOutputStream()
+    with ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+## Function to write results to a file
+def write_results(data, path, seed = None):
+    """Write data in the format given by the path's extension and return the path"""
+    output_format = os.path.splitext(path)[1].lstrip('.')
+    if output_format == 'arrow':
+        with open(path, 'wb') as f:
+            f.write(results_bytes(data, seed))
+    elif output_format == 'parquet':
+        pq.write_table(results_table(data, seed), path)
+    elif output_format == 'csv':
+        results_table(data, seed).to_pandas().to_csv(path, index=False)
+    else:
+        raise ValueError(f"results can be written as {', '.join(RESULTS_FORMATS)}, not '{output_format}'")
+    return path
+
+## Function to read stored results as an Arrow table
+def read_results_table(path):
+    """Return the Arrow table in an .arrow or .parquet file.
+
+    Arrow files are memory-mapped, so the table's columns are read from the
+    file as they are used rather than copied into memory first.
+    """
+    if path.endswith('.arrow'):
+        return ipc.open_file(pa.memory_map(path)).read_all()
+    return pq.read_table(path, memory_map=True)
+
+## Function to read stored results as a DataFrame
+def read_results(path):
+    """Return the results in an .arrow, .parquet or exported .csv file as a DataFrame.
+
+    Columns read from Arrow files share the mapped memory instead of being
+    copied where pandas allows, so they are read-only.
+    """
+    if path.endswith('.csv'):
+        return pd.read_csv(path)
+    return read_results_table(path).to_pandas(split_blocks=True)
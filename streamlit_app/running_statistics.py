@@ -0,0 +1,154 @@
+## running_statistics.py
+import math
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+
+##################################
+### Running Statistics
+##################################
+
+## statistics kept for every month and reporter, in the order of the summary columns
+STATISTICS = ['mean', 'std', 'min', 'max']
+
+## Function to find the two-sided Student's t critical value
+def t_critical(confidence, degrees_of_freedom):
+    """Return the t value leaving (1 - confidence) / 2 in each tail.
+
+    Exact for 1 and 2 degrees of freedom, otherwise a Cornish-Fisher expansion
+    of the normal quantile (Abramowitz and Stegun 26.7.5), good to about 0.01
+    from 3 degrees of freedom, so scipy is not needed.
+    """
+    p = (1 + confidence) / 2
+    v = degrees_of_freedom
+    if v == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if v == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = NormalDist().inv_cdf(p)
+    return (z
+            + (z**3 + z) / (4 * v)
+            + (5*z**5 + 16*z**3 + 3*z) / (96 * v**2)
+            + (3*z**7 + 19*z**5 + 17*z**3 - 15*z) / (384 * v**3)
+            + (79*z**9 + 776*z**7 + 1482*z**5 - 1920*z**3 - 945*z) / (92160 * v**4))
+
+## creates an online summary of Monte Carlo iterations, one (month x reporter) table at a time
+## the mean and variance are updated with Welford's method and the min and max as running extremes,
+## so memory depends on the number of months and reporters, not the number of iterations
+class RunningStatistics:
+    def __init__(self
+                 , quantile_sample_size = 0
+                 , seed = None):
+        self.count = 0
+        self.months = None
+        self.columns = None
+
+        ## running mean, sum of squared differences from the mean, and extremes
+        self.mean = None
+        self.m2 = None
+        self.min = None
+        self.max = None
+
+        ## a uniform reservoir of whole iterations kept for approximate quantiles, off if 0
+        self.quantile_sample_size = quantile_sample_size
+        self.sample = None
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.count
+
+    ## Adds one iteration's data, with a month column and a column for each reporter
+    def update(self, data):
+        if self.count == 0:
+            self.months = data['month'].to_numpy()
+            self.columns = [column for column in data.columns if column not in ('month', 'seed')]
+            shape = (len(self.months), len(self.columns))
+            self.mean = np.zeros(shape)
+            self.m2 = np.zeros(shape)
+            self.min = np.full(shape, np.inf)
+            self.max = np.full(shape, -np.inf)
+            if self.quantile_sample_size:
+                self.sample = np.empty((self.quantile_sample_size, *shape))
+        elif not np.array_equal(data['month'].to_numpy(), self.months):
+            raise ValueError("Every iteration must report the same months")
+
+        values = data[self.columns].to_numpy(dtype=np.float64)
+        self.count += 1
+        delta = values - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (values - self.mean)
+        np.minimum(self.min, values, out=self.min)
+        np.maximum(self.max, values, out=self.max)
+
+        if self.quantile_sample_size:
+            ## keeps each iteration with equal chance (reservoir sampling)
+            if self.count <= self.quantile_sample_size:
+                self.sample[self.count - 1] = values
+            else:
+                slot = self.rng.integers(self.count)
+                if slot < self.quantile_sample_size:
+                    self.sample[slot] = values
+        return self
+
+    ## Sample standard deviation (ddof=1), NaN until there are two iterations, as in pandas
+    def std(self):
+        if self.count < 2:
+            return np.full_like(self.mean, np.nan)
+        return np.sqrt(self.m2 / (self.count - 1))
+
+    ## Half width of the confidence interval on each mean, NaN until there are two iterations
+    def half_width(self, confidence = 0.95):
+        if self.count < 2:
+            return np.full_like(self.mean, np.nan)
+        return t_critical(confidence, self.count - 1) * self.std() / np.sqrt(self.count)
+
+    ## Builds a DataFrame of one statistic with the month as the last column, as groupby().agg() gives
+    def to_frame(self, values):
+        frame = pd.DataFrame(values, columns=self.columns)
+        frame['month'] = self.months
+        return frame
+
+    ## Returns (mean, std, min, max) DataFrames, the same layout as the figures' groupby aggregates
+    def aggregates(self):
+        if self.count == 0:
+            raise ValueError("No iterations have been added")
+        return (self.to_frame(self.mean)
+                , self.to_frame(self.std())
+                , self.to_frame(self.min)
+                , self.to_frame(self.max))
+
+    ## Approximate quantile of each month and reporter from the reservoir of iterations
+    def quantile(self, q):
+        if not self.quantile_sample_size:
+            raise ValueError("Quantiles need a quantile_sample_size above 0")
+        if self.count == 0:
+            raise ValueError("No iterations have been added")
+        kept = min(self.count, self.quantile_sample_size)
+        return self.to_frame(np.quantile(self.sample[:kept], q, axis=0))
+
+    ## Returns the statistics as one flat DataFrame, e.g. for the result cache
+    def summary(self):
+        """Return a row per month with the iteration count and a '<reporter> <statistic>' column for each pair"""
+        summary = pd.DataFrame({'month': self.months, 'iterations': self.count})
+        for statistic, values in zip(STATISTICS, [self.mean, self.std(), self.min, self.max]):
+            for i, column in enumerate(self.columns):
+                summary[f"{column} {statistic}"] = values[:, i]
+        return summary
+
+    ## Rebuilds the running statistics from a summary, so more iterations can be added to it
+    @classmethod
+    def from_summary(cls, summary):
+        statistics = cls()
+        statistics.count = int(summary['iterations'].iloc[0])
+        statistics.months = summary['month'].to_numpy()
+        statistics.columns = [column[:-len(' mean')] for column in summary.columns if column.endswith(' mean')]
+
+        def values(statistic):
+            return summary[[f"{column} {statistic}" for column in statistics.columns]].to_numpy(dtype=np.float64)
+
+        statistics.mean = values('mean')
+        std = values('std') if statistics.count > 1 else np.zeros_like(statistics.mean)
+        statistics.m2 = std ** 2 * (statistics.count - 1)
+        statistics.min = values('min')
+        statistics.max = values('max')
+        return statistics
@@ -0,0 +1,96 @@
+## simulation_functions.py
+## model creation and running, kept free of streamlit and plotly so the models can run headless
+from model_two_types_mecc import MECC_Model,SmokeModel_MECC_Model
+from model_vectorized_mecc import Vectorized_MECC_Model,Vectorized_SmokeModel_MECC_Model
+from model_count_mecc import Count_MECC_Model
+from model_cohort_mecc import Cohort_SmokeModel_MECC_Model
+from simulation_results import SimulationResults
+from relapse_schedule import RelapseSchedule, DEFAULT_RELAPSE_DECAY
+
+##################################
+### Model Functions
+##################################
+
+## Model classes for each engine
+## 'Agent' steps each person as a mesa agent, 'Vectorized' steps the whole population as NumPy arrays
+## 'Count' samples each month's totals directly (generic model only)
+## and 'Cohort' advances buckets of people with identical state (smoking model only)
+MODEL_ENGINES = {
+    'Agent': {'Generic': MECC_Model, 'Smoke': SmokeModel_MECC_Model},
+    'Vectorized': {'Generic': Vectorized_MECC_Model, 'Smoke': Vectorized_SmokeModel_MECC_Model},
+    'Count': {'Generic': Count_MECC_Model},
+    'Cohort': {'Smoke': Cohort_SmokeModel_MECC_Model}
+}
+
+## Function to create a model
+def create_MECC_model(model_parameters
+                      ,model_type = 'Generic'
+                      ,mecc_trained = False
+                      ,engine = 'Agent'
+                      ,common_random_numbers = None):
+    if engine not in MODEL_ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of {list(MODEL_ENGINES)}")
+    model_classes = MODEL_ENGINES[engine]
+    if model_type not in model_classes:
+        raise ValueError(f"The '{engine}' engine does not support the '{model_type}' model, expected one of {list(model_classes)}")
+
+    if model_type == 'Generic':
+        model = model_classes['Generic'](
+            seed=model_parameters["model_seed"],
+            N_people=model_parameters["N_people"],
+            N_service=model_parameters["N_service"],
+            base_make_intervention_prob=model_parameters["base_make_intervention_prob"],
+            visit_prob=model_parameters["visit_prob"],
+            mecc_effect=model_parameters["mecc_effect"],            
+            mecc_trained=mecc_trained,
+            common_random_numbers=common_random_numbers)
+        
+    elif model_type == 'Smoke':
+        ## the schedule is built here, so its parameters are unwrapped here as the models do for their own
+        ## Convert dictionary values if they're dictionaries
+        base_smoke_relapse_prob = model_parameters["base_smoke_relapse_prob"]
+        base_smoke_relapse_prob = base_smoke_relapse_prob['value'] if isinstance(base_smoke_relapse_prob, dict) else base_smoke_relapse_prob
+        num_steps = model_parameters.get("num_steps", 120)
+        num_steps = num_steps['value'] if isinstance(num_steps, dict) else num_steps
+        relapse_decay = model_parameters.get("relapse_decay", DEFAULT_RELAPSE_DECAY)
+        relapse_decay = relapse_decay['value'] if isinstance(relapse_decay, dict) else relapse_decay
+
+        model = model_classes['Smoke'](
+            seed=model_parameters["model_seed"],
+            N_people=model_parameters["N_people"],
+            N_service=model_parameters["N_service"],
+            initial_smoking_prob=model_parameters["initial_smoking_prob"],
+            base_make_intervention_prob=model_parameters["base_make_intervention_prob"],
+            quit_attempt_prob=model_parameters["quit_attempt_prob"],
+            visit_prob=model_parameters["visit_prob"],
+            base_smoke_relapse_prob = model_parameters["base_smoke_relapse_prob"],
+            intervention_effect=model_parameters["intervention_effect"],  
+            mecc_effect=model_parameters["mecc_effect"],            
+            mecc_trained=mecc_trained,
+            common_random_numbers=common_random_numbers,
+            relapse_schedule=RelapseSchedule(
+                base_smoke_relapse_prob=base_smoke_relapse_prob,
+                num_steps=num_steps,
+                decay=relapse_decay))   
+    return model
+
+## Function to run simulation steps
+def run_simulation_step(model, results=None):
+    """Run one step of the simulation and return the latest row of data.
+
+    The row is also appended in place to the results buffer if one is given,
+    so the full history never has to be rebuilt as a DataFrame each step.
+    """
+    model.step()
+    row = {name: values[-1] for name, values in model.datacollector.model_vars.items()}
+    if results is not None:
+        results.append(row)
+    return row
+
+## Function to run a whole simulation
+def run_simulation(model, num_steps):
+    """Run the simulation for num_steps and return the collected data"""
+    results = SimulationResults.from_model(model, num_steps)
+    for step in range(num_steps):
+        run_simulation_step(model, results)
+    return results.to_dataframe()
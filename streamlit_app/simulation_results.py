@@ -0,0 +1,74 @@
+## simulation_results.py
+import numpy as np
+import pandas as pd
+
+##################################
+### Results Buffer
+##################################
+
+## creates a preallocated columnar buffer of model reporter rows
+## each step's row is written in place and a DataFrame is only built when asked for
+class SimulationResults:
+    def __init__(self
+                 , columns
+                 , num_steps):
+        self.columns = list(columns)
+        self.num_rows = 0
+
+        ## one array per reporter, typed from the first row appended
+        self.capacity = max(int(num_steps), 1)
+        self.data = {}
+
+    ## Creates a buffer with a column for each of a model's reporters
+    @classmethod
+    def from_model(cls, model, num_steps):
+        return cls(model.datacollector.model_reporters.keys(), num_steps)
+
+    def __len__(self):
+        return self.num_rows
+
+    ## Adds one row of reporter values to the end of the buffer
+    def append(self, row):
+        if not self.data:
+            for column in self.columns:
+                dtype = np.float64 if isinstance(row[column], float) else np.int64
+                self.data[column] = np.zeros(self.capacity, dtype=dtype)
+
+        ## doubles the buffer if the run goes past the expected number of steps
+        if self.num_rows == self.capacity:
+            self.capacity *= 2
+            for column, values in self.data.items():
+                grown = np.zeros(self.capacity, dtype=values.dtype)
+                grown[:self.num_rows] = values[:self.num_rows]
+                self.data[column] = grown
+
+        for column in self.columns:
+            value = row[column]
+            ## switches an integer column to float if a fractional value arrives
+            if isinstance(value, float) and self.data[column].dtype != np.float64:
+                self.data[column] = self.data[column].astype(np.float64)
+            self.data[column][self.num_rows] = value
+        self.num_rows += 1
+
+    ## Returns the most recent row as a dictionary
+    def latest(self):
+        if self.num_rows == 0:
+            return {}
+        return {column: self.data[column][self.num_rows - 1].item() for column in self.columns}
+
+    ## Returns one column of the rows recorded so far
+    def column(self, name):
+        return self.data[name][:self.num_rows]
+
+    ## Builds a DataFrame of the rows recorded so far, indexed by step like the DataCollector
+    def to_dataframe(self):
+        if self.num_rows == 0:
+            return pd.DataFrame(columns=self.columns)
+        return pd.DataFrame({column: self.column(column) for column in self.columns})
+
+    ## Returns a DataFrame over the buffer's arrays for the rows recorded so far, without copying them
+    ## it is only valid until the next row is appended, e.g. to draw the month just simulated
+    def view(self):
+        if self.num_rows == 0:
+            return pd.DataFrame(columns=self.columns)
+        return pd.DataFrame({column: self.column(column) for column in self.columns}, copy=False)
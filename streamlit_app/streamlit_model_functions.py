@@ -2,51 +2,12 @@
 import pandas as pd
 #import numpy as np
 #import streamlit as st
-from model_two_types_mecc import MECC_Model,SmokeModel_MECC_Model
+## the model functions live in simulation_functions so they can be used without plotly
+from simulation_functions import MODEL_ENGINES, create_MECC_model, run_simulation_step, run_simulation
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 #import time
 
-##################################
-### Model Functions
-##################################
-
-## Function to create a model
-def create_MECC_model(model_parameters
-                      ,model_type = 'Generic'
-                      ,mecc_trained = False):
-    if model_type == 'Generic':
-        model = MECC_Model(
-            seed=model_parameters["model_seed"],
-            N_people=model_parameters["N_people"],
-            N_service=model_parameters["N_service"],
-            base_make_intervention_prob=model_parameters["base_make_intervention_prob"],
-            visit_prob=model_parameters["visit_prob"],
-            mecc_effect=model_parameters["mecc_effect"],            
-            mecc_trained=mecc_trained)
-        
-    elif model_type == 'Smoke':
-        model = SmokeModel_MECC_Model(
-            seed=model_parameters["model_seed"],
-            N_people=model_parameters["N_people"],
-            N_service=model_parameters["N_service"],
-            initial_smoking_prob=model_parameters["initial_smoking_prob"],
-            base_make_intervention_prob=model_parameters["base_make_intervention_prob"],
-            quit_attempt_prob=model_parameters["quit_attempt_prob"],
-            visit_prob=model_parameters["visit_prob"],
-            base_smoke_relapse_prob = model_parameters["base_smoke_relapse_prob"],
-            intervention_effect=model_parameters["intervention_effect"],  
-            mecc_effect=model_parameters["mecc_effect"],            
-            mecc_trained=mecc_trained)   
-    return model
-
-## Function to run simulation steps
-def run_simulation_step(model):
-    """Run one step of the simulation and return current data"""
-    model.step()
-    data = model.datacollector.get_model_vars_dataframe()
-    return data
-
 
 
 ##################################
@@ -352,6 +313,7 @@ def create_population_figure(results_no_mecc, results_mecc, step):
         go.Scatter(
             x=results_no_mecc.index[:step+1], 
             y=results_no_mecc['Total Smoking'][:step+1], 
+            meta=dict(arm='no_mecc', column='Total Smoking'),
             name="Smoking (No MECC Training)", 
             line=dict(color="red", dash='solid')
         ),
@@ -361,6 +323,7 @@ def create_population_figure(results_no_mecc, results_mecc, step):
         go.Scatter(
             x=results_no_mecc.index[:step+1], 
             y=results_no_mecc['Total Not Smoking'][:step+1], 
+            meta=dict(arm='no_mecc', column='Total Not Smoking'),
             name="Not Smoking (No MECC Training)", 
             line=dict(color="green", dash='solid')
         ),
@@ -372,6 +335,7 @@ def create_population_figure(results_no_mecc, results_mecc, step):
         go.Scatter(
             x=results_mecc.index[:step+1], 
             y=results_mecc['Total Smoking'][:step+1], 
+            meta=dict(arm='mecc', column='Total Smoking'),
             name="Smoking (MECC Trained)", 
             line=dict(color="red", dash='dot')
         ),
@@ -381,6 +345,7 @@ def create_population_figure(results_no_mecc, results_mecc, step):
         go.Scatter(
             x=results_mecc.index[:step+1], 
             y=results_mecc['Total Not Smoking'][:step+1], 
+            meta=dict(arm='mecc', column='Total Not Smoking'),
             name="Not Smoking (MECC Trained)", 
             line=dict(color="green", dash='dot')
         ),
@@ -453,6 +418,7 @@ def create_intervention_figure(results_no_mecc, results_mecc, step):
         go.Scatter(
             x=results_no_mecc.index[:step+1],
             y=results_no_mecc['Total Contacts'][:step+1],
+            meta=dict(arm='no_mecc', column='Total Contacts'),
             name="Contacts (No MECC Training)",
             line=dict(color="grey", dash='solid')
         ),
@@ -462,6 +428,7 @@ def create_intervention_figure(results_no_mecc, results_mecc, step):
         go.Scatter(
             x=results_no_mecc.index[:step+1],
             y=results_no_mecc['Total Interventions'][:step+1],
+            meta=dict(arm='no_mecc', column='Total Interventions'),
             name="Interventions (No MECC Training)",
             line=dict(color="blue", dash='solid')
         ),
@@ -472,6 +439,7 @@ def create_intervention_figure(results_no_mecc, results_mecc, step):
             go.Scatter(
                 x=results_no_mecc.index[:step+1],
                 y=results_no_mecc['Total Quit Attempts'][:step+1],
+                meta=dict(arm='no_mecc', column='Total Quit Attempts'),
                 name="Quit Attempts (No MECC Training)",
                 line=dict(color="purple", dash='solid')
             ),
@@ -483,6 +451,7 @@ def create_intervention_figure(results_no_mecc, results_mecc, step):
         go.Scatter(
             x=results_mecc.index[:step+1],
             y=results_mecc['Total Contacts'][:step+1],
+            meta=dict(arm='mecc', column='Total Contacts'),
             name="Contacts (MECC Trained)",
             line=dict(color="grey", dash='dot')
         ),
@@ -493,6 +462,7 @@ def create_intervention_figure(results_no_mecc, results_mecc, step):
         go.Scatter(
             x=results_mecc.index[:step+1],
             y=results_mecc['Total Interventions'][:step+1],
+            meta=dict(arm='mecc', column='Total Interventions'),
             name="Interventions (MECC Trained)",
             line=dict(color="blue", dash='dot')
         ),
@@ -503,6 +473,7 @@ def create_intervention_figure(results_no_mecc, results_mecc, step):
             go.Scatter(
                 x=results_mecc.index[:step+1],
                 y=results_mecc['Total Quit Attempts'][:step+1],
+                meta=dict(arm='mecc', column='Total Quit Attempts'),
                 name="Quit Attempts (MECC Trained)",
                 line=dict(color="purple", dash='dot')
             ),
@@ -566,8 +537,16 @@ def create_multi_intervention_figure(results_no_mecc, results_mecc):
 
         return mean_cols, std_cols, min_cols, max_cols
 
-    no_mecc_mean, no_mecc_std, no_mecc_min, no_mecc_max = compute_aggregates(results_no_mecc)
-    mecc_mean, mecc_std, mecc_min, mecc_max = compute_aggregates(results_mecc)
+    return create_aggregate_intervention_figure(compute_aggregates(results_no_mecc)
+                                                , compute_aggregates(results_mecc))
+
+def create_aggregate_intervention_figure(aggregates_no_mecc, aggregates_mecc):
+    """
+    Create the side-by-side aggregate comparison figures from (mean, std, min, max)
+    DataFrames with a month column, e.g. from RunningStatistics.aggregates().
+    """
+    no_mecc_mean, no_mecc_std, no_mecc_min, no_mecc_max = aggregates_no_mecc
+    mecc_mean, mecc_std, mecc_min, mecc_max = aggregates_mecc
 
     fig = make_subplots(
         rows=1,
@@ -682,6 +661,9 @@ def create_multi_intervention_figure(results_no_mecc, results_mecc):
 ## Success Metrics Figure
 ##########################################
 
+## columns shown as bars in the metrics figure
+METRICS_FIGURE_COLUMNS = ['Total Interventions', 'Total Quit Attempts', 'Total Quit Smoking']
+
 def create_metrics_figure(results_no_mecc, results_mecc, step):
     """Create side-by-side comparison figures"""
     fig = make_subplots(
@@ -710,6 +692,7 @@ def create_metrics_figure(results_no_mecc, results_mecc, step):
         go.Bar(
             x=['Interventions', 'Quit Attempts','Current Quits'],# 'Success Rate (%)'],
             y=[current_interventions_no_mecc, current_quit_attempts_no_mecc,current_quits_no_mecc],#, success_rate_no_mecc],
+            meta=dict(arm='no_mecc', columns=METRICS_FIGURE_COLUMNS),
             name='No MECC Training',
             marker_color='rgba(135, 206, 250, 0.8)'
         ),
@@ -720,6 +703,7 @@ def create_metrics_figure(results_no_mecc, results_mecc, step):
         go.Bar(
             x=['Interventions', 'Quit Attempts','Current Quits'],# 'Success Rate (%)'],
             y=[current_interventions_mecc, current_quit_attempts_mecc,current_quits_mecc],#, success_rate_mecc],
+            meta=dict(arm='mecc', columns=METRICS_FIGURE_COLUMNS),
             name='MECC Trained',
             marker_color='rgba(0, 0, 139, 0.8)'
         ),
@@ -756,3 +740,22 @@ def create_metrics_figure(results_no_mecc, results_mecc, step):
 
     return fig
 
+
+
+## Function to refresh a figure's data in place
+def update_figure_data(fig, results_no_mecc, results_mecc, step):
+    """Replace the data of each trace of a figure with the results up to step.
+
+    Works on figures from create_population_figure, create_intervention_figure
+    and create_metrics_figure, whose traces record the arm and columns they
+    show in their meta, so the subplots and layout are only built once.
+    """
+    results = {'no_mecc': results_no_mecc, 'mecc': results_mecc}
+    for trace in fig.data:
+        data = results[trace.meta['arm']]
+        if 'columns' in trace.meta:
+            trace.y = [data[column].iloc[step] for column in trace.meta['columns']]
+        else:
+            trace.x = data.index[:step+1]
+            trace.y = data[trace.meta['column']][:step+1]
+    return fig
@@ -0,0 +1,271 @@
+## sweep_runner.py
+"""Sweep MECC model parameters over a grid or Latin hypercube design.
+
+The base parameters come from a session_data.json style file and the swept
+parameters replace them at each design point. Run from the repository root:
+
+    python streamlit_app/sweep_runner.py base.json --grid mecc_effect=0.5,0.7,0.9 --grid visit_prob=0.1,0.2 --replicates 5
+    python streamlit_app/sweep_runner.py base.json --lhs mecc_effect=0.5:0.9 --lhs intervention_effect=1:2 --samples 20 --model Smoke
+
+Every (point, seed) job is written to <output-dir>/jobs/ as soon as it
+finishes, so an interrupted sweep run again with the same arguments only runs
+the jobs that are missing. The combined results are written to
+<output-dir>/sweep_results.parquet as one long table with a row for each
+point, seed, arm, month and metric.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from simulation_functions import MODEL_ENGINES
+from monte_carlo_runner import iteration_seeds, run_iteration
+from batch_runner import load_parameters, infer_model_type, check_parameters
+from worker_processes import worker_context
+
+##################################
+### Design Functions
+##################################
+
+## columns the long results table is indexed by, after the swept parameters
+INDEX_COLUMNS = ['point', 'seed', 'arm', 'month', 'metric']
+
+## Function to expand a grid into design points
+def expand_grid(grid):
+    """Return a list of parameter dictionaries, one for every combination of the grid values"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+## Function to sample design points from a Latin hypercube
+def latin_hypercube(ranges, samples, seed = None):
+    """Return samples parameter dictionaries spread over ranges of (low, high) pairs.
+
+    Each range is cut into samples equal strata and every stratum is sampled
+    exactly once, with the strata shuffled independently for each parameter.
+    """
+    rng = np.random.default_rng(seed)
+    points = [{} for _ in range(samples)]
+    for name, (low, high) in ranges.items():
+        strata = (rng.permutation(samples) + rng.uniform(size=samples)) / samples
+        for point, value in zip(points, low + strata * (high - low)):
+            point[name] = float(value)
+    return points
+
+##################################
+### Job Functions
+##################################
+
+## Function to run one design point for one seed
+def run_sweep_job(model_parameters
+                  ,point_number
+                  ,point
+                  ,seed
+                  ,model_type = 'Generic'
+                  ,engine = 'Agent'):
+    """Run both arms at one design point for one seed and return them as a long table"""
+    data_no_mecc, data_mecc = run_iteration({**model_parameters, **point}, seed, model_type, engine)
+
+    arm_data = []
+    for arm, data in [('no_mecc', data_no_mecc), ('mecc', data_mecc)]:
+        long_data = data.melt(id_vars=['month', 'seed'], var_name='metric', value_name='value')
+        long_data.insert(0, 'arm', arm)
+        arm_data.append(long_data)
+
+    job_data = pd.concat(arm_data, ignore_index=True)
+    job_data.insert(0, 'point', point_number)
+    for name, value in point.items():
+        job_data[name] = value
+    job_data['value'] = job_data['value'].astype(np.float64)
+    return job_data
+
+##################################
+### Sweep Runner
+##################################
+
+## runs every (point, seed) job of a design on a process pool
+## each finished job is saved to its own file, so a rerun skips the jobs already done
+class SweepRunner:
+    def __init__(self
+                 , model_parameters
+                 , points
+                 , output_dir
+                 , replicates = 1
+                 , model_type = 'Generic'
+                 , engine = 'Agent'):
+        self.model_parameters = model_parameters
+        self.points = points
+        self.output_dir = output_dir
+        self.model_type = model_type
+        self.engine = engine
+        self.swept_parameters = list(dict.fromkeys(name for point in points for name in point))
+
+        ## every point uses the same seeds, so differences between points are not down to the seed alone
+        self.seeds = iteration_seeds(model_parameters["model_seed"], replicates)
+
+        check_parameters({**model_parameters, **(points[0] if points else {})}, model_type)
+
+    @property
+    def jobs_dir(self):
+        return os.path.join(self.output_dir, 'jobs')
+
+    ## Every (point number, seed) pair in the design
+    def jobs(self):
+        return [(point_number, seed) for point_number in range(len(self.points)) for seed in self.seeds]
+
+    ## Path of one job's results
+    def job_path(self, point_number, seed):
+        return os.path.join(self.jobs_dir, f"point_{point_number}_seed_{seed}.parquet")
+
+    ## Jobs with no results on disk yet
+    def pending_jobs(self):
+        return [job for job in self.jobs() if not os.path.exists(self.job_path(*job))]
+
+    ## Writes the design, or checks it matches the one an earlier run started
+    def write_design(self):
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        design = {
+            'model_parameters': self.model_parameters,
+            'points': self.points,
+            'seeds': self.seeds,
+            'model_type': self.model_type,
+            'engine': self.engine
+        }
+        ## a JSON round trip so the comparison sees the same types as the saved file
+        design = json.loads(json.dumps(design))
+        design_path = os.path.join(self.output_dir, 'design.json')
+        if os.path.exists(design_path):
+            with open(design_path) as f:
+                if json.load(f) != design:
+                    raise ValueError(f"{self.output_dir} holds a different sweep, use a new output directory to start another")
+        else:
+            with open(design_path, 'w') as f:
+                json.dump(design, f, indent=4)
+
+    def write_job(self, point_number, seed, job_data):
+        ## writes to a temporary file first so an interrupted write is never taken as finished
+        path = self.job_path(point_number, seed)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        job_data.to_parquet(temp_path, index=False)
+        os.replace(temp_path, path)
+
+    def read_job(self, point_number, seed):
+        return pd.read_parquet(self.job_path(point_number, seed))
+
+    ## Runs the missing jobs, yielding (completed, total) after each one
+    def iter_run(self, max_workers = None):
+        """Run every job without saved results and yield progress as each finishes.
+
+        max_workers=1 runs the jobs in this process.
+        """
+        self.write_design()
+        total = len(self.jobs())
+        pending = self.pending_jobs()
+        completed = total - len(pending)
+        max_workers = max_workers or os.cpu_count() or 1
+
+        if max_workers == 1:
+            for point_number, seed in pending:
+                job_data = run_sweep_job(self.model_parameters, point_number, self.points[point_number]
+                                         , seed, self.model_type, self.engine)
+                self.write_job(point_number, seed, job_data)
+                completed += 1
+                yield completed, total
+            return
+
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(pending) or 1), mp_context=worker_context()) as executor:
+            futures = {
+                executor.submit(run_sweep_job, self.model_parameters, point_number, self.points[point_number]
+                                , seed, self.model_type, self.engine): (point_number, seed)
+                for point_number, seed in pending
+            }
+            for future in as_completed(futures):
+                self.write_job(*futures[future], future.result())
+                completed += 1
+                yield completed, total
+
+    ## Combines every saved job into one long table
+    def results(self):
+        """Return the long results table, ordered by point, seed, arm and month"""
+        missing = self.pending_jobs()
+        if missing:
+            raise RuntimeError(f"{len(missing)} sweep jobs have not been run yet")
+        if not self.points:
+            return pd.DataFrame(columns=INDEX_COLUMNS[:1] + self.swept_parameters + INDEX_COLUMNS[1:] + ['value'])
+
+        data = pd.concat([self.read_job(*job) for job in self.jobs()], ignore_index=True)
+        data = data[INDEX_COLUMNS[:1] + self.swept_parameters + INDEX_COLUMNS[1:] + ['value']]
+        ## keeps the no MECC arm first, as it is everywhere else
+        data['arm'] = pd.Categorical(data['arm'], categories=['no_mecc', 'mecc'])
+        return data.sort_values(['point', 'seed', 'arm', 'month'], kind='stable').reset_index(drop=True)
+
+    ## Runs the missing jobs and returns the combined results
+    def run(self, max_workers = None, progress_callback = None):
+        for completed, total in self.iter_run(max_workers):
+            if progress_callback is not None:
+                progress_callback(completed, total)
+        return self.results()
+
+##################################
+### Command Line
+##################################
+
+## Function to read NAME=VALUES options
+def parse_assignment(option, separator):
+    """Split 'name=a<separator>b...' into the name and its values read as JSON numbers"""
+    if '=' not in option:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUES, got '{option}'")
+    name, values = option.split('=', 1)
+    try:
+        return name, [json.loads(value) for value in values.split(separator)]
+    except json.JSONDecodeError:
+        raise argparse.ArgumentTypeError(f"could not read the values in '{option}'")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('parameter_file', help="session_data.json style file of base parameters")
+    parser.add_argument('--grid', action='append', default=[], type=lambda option: parse_assignment(option, ',')
+                        , metavar='NAME=V1,V2,...', help="values of one swept parameter, repeat for each parameter")
+    parser.add_argument('--lhs', action='append', default=[], type=lambda option: parse_assignment(option, ':')
+                        , metavar='NAME=LOW:HIGH', help="range of one Latin hypercube parameter, repeat for each parameter")
+    parser.add_argument('--samples', type=int, default=10, help="Latin hypercube points")
+    parser.add_argument('--design-seed', type=int, default=0, help="seed for the Latin hypercube")
+    parser.add_argument('--replicates', type=int, default=1, help="seeds run at each point")
+    parser.add_argument('--model', choices=['Generic', 'Smoke']
+                        , help="model to run, worked out from the parameters if not given")
+    parser.add_argument('--engine', choices=list(MODEL_ENGINES), default='Agent')
+    parser.add_argument('--workers', type=int, help="worker processes, defaults to every core")
+    parser.add_argument('--output-dir', default='sweep_outputs')
+    args = parser.parse_args(argv)
+
+    if bool(args.grid) == bool(args.lhs):
+        parser.error("give either --grid or --lhs parameters")
+    if args.grid:
+        points = expand_grid(dict(args.grid))
+    else:
+        if any(len(values) != 2 for _, values in args.lhs):
+            parser.error("--lhs ranges are written NAME=LOW:HIGH")
+        points = latin_hypercube(dict(args.lhs), args.samples, args.design_seed)
+
+    model_parameters = load_parameters(args.parameter_file)
+    start = time.perf_counter()
+    try:
+        runner = SweepRunner(model_parameters, points, args.output_dir, args.replicates
+                             , model_type=args.model or infer_model_type(model_parameters), engine=args.engine)
+        skipped = len(runner.jobs()) - len(runner.pending_jobs())
+        if skipped:
+            print(f"Resuming: {skipped} of {len(runner.jobs())} jobs already done", file=sys.stderr)
+        data = runner.run(args.workers
+                          , progress_callback=lambda completed, total: print(f"{completed}/{total} jobs", file=sys.stderr))
+    except (ValueError, ImportError) as error:
+        parser.exit(1, f"{error}\n")
+
+    path = os.path.join(args.output_dir, "sweep_results.parquet")
+    data.to_parquet(path, index=False)
+    print(f"Wrote {len(data)} rows to {path} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+## worker_processes.py
+import multiprocessing
+
+##################################
+### Worker Process Functions
+##################################
+
+## worker processes are always started with 'spawn', whatever start method the process has been set to
+## (mesa's batchrunner sets one for the whole process when it is imported); spawn starts each worker as a
+## fresh interpreter, which is safe from Streamlit's server threads where fork is not
+
+## a spawned worker imports the parent's main script again, as __mp_main__, before it starts work. Under
+## Streamlit that is app.py, which only runs the app when it is not imported that way; everything the
+## workers run lives in importable modules, so they need nothing else from the main script.
+
+## Function to get the context worker processes are started from
+def worker_context():
+    """Return the multiprocessing context to create worker processes, pools and queues with.
+
+    Pass it as ProcessPoolExecutor(mp_context=...) or use its Process and
+    Queue, so the start method is never taken from the process-wide setting.
+    """
+    return multiprocessing.get_context('spawn')
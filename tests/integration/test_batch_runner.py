@@ -0,0 +1,109 @@
+import os
+import sys
+import json
+import subprocess
+import pandas as pd
+import pytest
+from streamlit_app.batch_runner import main, run_scenario, infer_model_type
+from streamlit_app.results_store import read_results
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'streamlit_app')
+
+@pytest.fixture
+def session_data(smoke_model_params):
+    ## same schema as the session_data.json written by the smoking page
+    parameters = {**smoke_model_params, "model_seed": 42, "num_steps": 6, "animation_speed": 0.1}
+    del parameters["seed"], parameters["mecc_trained"]
+    return parameters
+
+def write_json(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f)
+    return str(path)
+
+def test_smoke_run_writes_csv(session_data, tmp_path):
+    """Test that a smoking scenario exports both arms and the parameters as CSV"""
+    parameter_file = write_json(tmp_path / "scenario.json", session_data)
+    main([parameter_file, "--format", "csv", "--output-dir", str(tmp_path / "out"), "--workers", "1"])
+
+    output_dir = tmp_path / "out" / "scenario"
+    data_no_mecc = pd.read_csv(output_dir / "data_no_mecc.csv")
+    data_mecc = pd.read_csv(output_dir / "data_mecc.csv")
+    assert len(data_no_mecc) == len(data_mecc) == session_data["num_steps"]
+    assert "Total Smoking" in data_mecc.columns
+    assert json.loads((output_dir / "session_data.json").read_text()) == session_data
+
+def test_run_writes_arrow_by_default(session_data, tmp_path):
+    """Test that results are written as Arrow files with month, seed and typed reporter columns"""
+    parameter_file = write_json(tmp_path / "scenario.json", session_data)
+    main([parameter_file, "--output-dir", str(tmp_path / "out"), "--workers", "1"])
+
+    data_mecc = read_results(str(tmp_path / "out" / "scenario" / "data_mecc.arrow"))
+    assert list(data_mecc.columns[:2]) == ["month", "seed"]
+    assert data_mecc["month"].tolist() == list(range(session_data["num_steps"]))
+    assert (data_mecc["seed"] == session_data["model_seed"]).all()
+    assert data_mecc["Total Smoking"].dtype == "int64"
+
+def test_monte_carlo_run_writes_parquet(session_data, tmp_path):
+    """Test that a Monte Carlo scenario writes every iteration as Parquet"""
+    parameter_file = write_json(tmp_path / "mc.json", session_data)
+    main([parameter_file, "--model", "MonteCarlo", "--iterations", "3", "--workers", "2"
+          , "--format", "parquet", "--output-dir", str(tmp_path / "out")])
+
+    data_mecc = pd.read_parquet(tmp_path / "out" / "mc" / "mc_data_mecc.parquet")
+    assert len(data_mecc) == 3 * session_data["num_steps"]
+    assert data_mecc["seed"].nunique() == 3
+
+def test_model_inferred_from_parameters(session_data):
+    """Test that the smoking model is picked only when its parameters are present"""
+    generic_parameters = {name: value for name, value in session_data.items()
+                          if name not in ["initial_smoking_prob", "quit_attempt_prob"]}
+
+    assert infer_model_type(session_data) == 'Smoke'
+    assert infer_model_type(generic_parameters) == 'Generic'
+
+def test_missing_parameters_rejected(session_data, tmp_path):
+    """Test that a parameter file missing a model parameter is reported"""
+    del session_data["visit_prob"]
+
+    with pytest.raises(ValueError, match="visit_prob"):
+        run_scenario(session_data, tmp_path, model='Generic', max_workers=1)
+
+def test_does_not_import_streamlit_or_plotly():
+    """Test that the batch runner can start without streamlit or plotly"""
+    check = ("import sys, batch_runner; "
+             "loaded = [name for name in ('streamlit', 'plotly') if name in sys.modules]; "
+             "assert not loaded, loaded")
+    subprocess.run([sys.executable, "-c", check], cwd=APP_DIR, check=True)
+
+def test_failed_file_does_not_stop_others(session_data, tmp_path, capsys):
+    """Test that a failing parameter file is reported, the others still run, and the exit code is 1"""
+    broken = dict(session_data)
+    del broken["visit_prob"]
+    parameter_files = [write_json(tmp_path / "broken.json", broken)
+                       , str(tmp_path / "missing.json")
+                       , write_json(tmp_path / "scenario.json", session_data)]
+
+    with pytest.raises(SystemExit) as exit_info:
+        main([*parameter_files, "--output-dir", str(tmp_path / "out"), "--workers", "1"])
+
+    assert exit_info.value.code == 1
+    assert (tmp_path / "out" / "scenario" / "data_mecc.arrow").exists()
+    errors = capsys.readouterr().err
+    assert "broken.json: " in errors and "visit_prob" in errors
+    assert "2 of 3 parameter files failed" in errors
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_model_failure_does_not_stop_others(session_data, tmp_path, capsys, workers):
+    """Test that a parameter file the model itself fails on is reported and the others still run"""
+    parameter_files = [write_json(tmp_path / "bad_value.json", {**session_data, "N_people": "50"})
+                       , write_json(tmp_path / "scenario.json", session_data)]
+
+    with pytest.raises(SystemExit) as exit_info:
+        main([*parameter_files, "--output-dir", str(tmp_path / "out"), "--workers", workers])
+
+    assert exit_info.value.code == 1
+    assert (tmp_path / "out" / "scenario" / "data_mecc.arrow").exists()
+    errors = capsys.readouterr().err
+    assert "bad_value.json: " in errors
+    assert "1 of 2 parameter files failed" in errors
@@ -0,0 +1,49 @@
+import pytest
+from bench.run_benchmarks import run_benchmarks, compare_to_baseline, baseline_mismatches
+
+@pytest.fixture
+def tiny_settings():
+    return {
+        'sizes': [20],
+        'num_steps': 2,
+        'iterations': 1,
+        'max_monte_carlo_people': 20
+    }
+
+def test_benchmarks_cover_every_phase(tiny_settings):
+    """Test that the suite times construction, step, collection, Monte Carlo and the figures"""
+    results = run_benchmarks(tiny_settings, progress=lambda message: None)
+
+    for name in ['construct', 'step', 'collect', 'get_model_vars_dataframe', 'intervention_figure']:
+        assert f"Agent/Generic/{name}/N=20" in results
+        assert f"Agent/Smoke/{name}/N=20" in results
+    assert "Agent/Smoke/metrics_figure/N=20" in results
+    assert "Agent/Generic/monte_carlo/N=20" in results
+    assert "Agent/Generic/multi_intervention_figure/N=20" in results
+    assert all(timing['median'] >= 0 and timing['repeats'] >= 1 for timing in results.values())
+
+def test_compare_to_baseline():
+    """Test that only slowdowns beyond the tolerance and noise floor count as regressions"""
+    baseline = {
+        'slower': {'median': 0.010},
+        'noise': {'median': 0.0001},
+        'faster': {'median': 0.010}
+    }
+    results = {
+        'slower': {'median': 0.030},
+        'noise': {'median': 0.0005},
+        'faster': {'median': 0.005},
+        'new': {'median': 1.0}
+    }
+
+    regressions = compare_to_baseline(results, baseline, tolerance=1.5)
+    assert [name for name, *_ in regressions] == ['slower']
+
+def test_baseline_mismatches():
+    """Test that differences in settings and machine are reported separately"""
+    output = {'settings': {'sizes': [50], 'num_steps': 3}, 'environment': {'python': '3.11.7', 'cpu_count': 8}}
+    same_machine = {'settings': {'sizes': [50], 'num_steps': 3}, 'environment': {'python': '3.11.7', 'cpu_count': 8}}
+    other_machine = {'settings': {'sizes': [50], 'num_steps': 12}, 'environment': {'python': '3.11.7', 'cpu_count': 1}}
+
+    assert baseline_mismatches(output, same_machine) == ([], [])
+    assert baseline_mismatches(output, other_machine) == (['num_steps'], ['cpu_count'])
@@ -0,0 +1,77 @@
+import pytest
+import numpy as np
+from streamlit_app.model_two_types_mecc import SmokeModel_MECC_Model
+from streamlit_app.model_cohort_mecc import Cohort_SmokeModel_MECC_Model
+from streamlit_app.streamlit_model_functions import create_MECC_model
+
+## Validation that the cohort engine and the agent engine agree in distribution
+
+NUM_STEPS = 8
+
+@pytest.fixture
+def cohort_params(smoke_model_params):
+    params = {**smoke_model_params, "N_people": 40, "initial_smoking_prob": 0.5, "quit_attempt_prob": 0.2}
+    del params["mecc_trained"], params["seed"]
+    return params
+
+def final_rows(model_class, params, mecc_trained, seeds):
+    """Run one model per seed and return the final row of reporter values"""
+    rows = []
+    for seed in seeds:
+        model = model_class(**params, mecc_trained=mecc_trained, seed=seed)
+        for _ in range(NUM_STEPS):
+            model.step()
+        model.datacollector.collect(model)
+        rows.append(model.datacollector.get_model_vars_dataframe().iloc[-1])
+    return rows
+
+def ks_statistic(sample_a, sample_b):
+    """Two-sample Kolmogorov-Smirnov statistic"""
+    values = np.union1d(sample_a, sample_b)
+    cdf_a = np.searchsorted(np.sort(sample_a), values, side='right') / len(sample_a)
+    cdf_b = np.searchsorted(np.sort(sample_b), values, side='right') / len(sample_b)
+    return np.abs(cdf_a - cdf_b).max()
+
+def test_same_reporter_columns(cohort_params):
+    """Test that the cohort engine reports the same columns as the agent engine"""
+    agent_model = SmokeModel_MECC_Model(**cohort_params, mecc_trained=True, seed=1)
+    cohort_model = Cohort_SmokeModel_MECC_Model(**cohort_params, mecc_trained=True, seed=1)
+    for _ in range(3):
+        agent_model.step()
+        cohort_model.step()
+
+    agent_data = agent_model.datacollector.get_model_vars_dataframe()
+    cohort_data = cohort_model.datacollector.get_model_vars_dataframe()
+    assert list(cohort_data.columns) == list(agent_data.columns)
+
+@pytest.mark.parametrize("mecc_trained", [False, True])
+def test_engines_agree_in_distribution(cohort_params, mecc_trained):
+    """Test that the final reporter values of the two engines come from the same distribution"""
+    agent_rows = final_rows(SmokeModel_MECC_Model, cohort_params, mecc_trained, range(300))
+    cohort_rows = final_rows(Cohort_SmokeModel_MECC_Model, cohort_params, mecc_trained, range(10_000, 11_500))
+
+    ## critical value at the 0.1% level
+    critical_value = 1.95 * np.sqrt((len(agent_rows) + len(cohort_rows)) / (len(agent_rows) * len(cohort_rows)))
+    for column in agent_rows[0].index:
+        agent_values = np.array([row[column] for row in agent_rows])
+        cohort_values = np.array([row[column] for row in cohort_rows])
+        assert ks_statistic(agent_values, cohort_values) < critical_value, column
+
+def test_population_conserved(cohort_params):
+    """Test that the buckets always hold the whole population"""
+    model = Cohort_SmokeModel_MECC_Model(**cohort_params, mecc_trained=True, seed=3)
+    for _ in range(24):
+        model.step()
+        assert model.cohorts.count.sum() == cohort_params["N_people"]
+        assert (model.cohorts.count > 0).all()
+
+def test_buckets_scale_with_states_not_people(cohort_params):
+    """Test that a million people are held in far fewer buckets"""
+    params = {**cohort_params, "N_people": 1_000_000}
+    model = create_MECC_model({**params, "model_seed": 0}, model_type='Smoke'
+                              , mecc_trained=True, engine='Cohort')
+    for _ in range(24):
+        model.step()
+
+    assert len(model.cohorts) < 2_000
+    assert model.cohorts.count.sum() == params["N_people"]
@@ -0,0 +1,101 @@
+import pytest
+import numpy as np
+from streamlit_app.model_two_types_mecc import MECC_Model
+from streamlit_app.model_count_mecc import Count_MECC_Model
+from streamlit_app.common_random_numbers import CommonRandomNumbers
+from streamlit_app.streamlit_model_functions import create_MECC_model
+
+## Validation that the count engine and the agent engine agree in distribution
+
+NUM_STEPS = 6
+
+@pytest.fixture
+def validation_params():
+    return {
+        "N_people": 40,
+        "N_service": 2,
+        "mecc_effect": 0.8,
+        "base_make_intervention_prob": 0.3,
+        "visit_prob": 0.5
+    }
+
+def final_totals(model_class, params, mecc_trained, seeds):
+    """Run one model per seed and return the final contacts and interventions"""
+    totals = []
+    for seed in seeds:
+        model = model_class(**params, mecc_trained=mecc_trained, seed=seed)
+        for _ in range(NUM_STEPS):
+            model.step()
+        model.datacollector.collect(model)
+        data = model.datacollector.get_model_vars_dataframe()
+        totals.append((data["Total Contacts"].iloc[-1], data["Total Interventions"].iloc[-1]))
+    return np.array(totals)
+
+def ks_statistic(sample_a, sample_b):
+    """Two-sample Kolmogorov-Smirnov statistic"""
+    values = np.union1d(sample_a, sample_b)
+    cdf_a = np.searchsorted(np.sort(sample_a), values, side='right') / len(sample_a)
+    cdf_b = np.searchsorted(np.sort(sample_b), values, side='right') / len(sample_b)
+    return np.abs(cdf_a - cdf_b).max()
+
+def ks_critical_value(n, m, c_alpha=1.95):
+    """Critical value of the two-sample KS statistic at the 0.1% level"""
+    return c_alpha * np.sqrt((n + m) / (n * m))
+
+def test_same_reporter_columns(validation_params):
+    """Test that the count engine reports the same columns as the agent engine"""
+    agent_model = MECC_Model(**validation_params, seed=1)
+    count_model = Count_MECC_Model(**validation_params, seed=1)
+    for _ in range(3):
+        agent_model.step()
+        count_model.step()
+
+    agent_data = agent_model.datacollector.get_model_vars_dataframe()
+    count_data = count_model.datacollector.get_model_vars_dataframe()
+    assert list(count_data.columns) == list(agent_data.columns)
+    assert count_data.dtypes.equals(agent_data.dtypes)
+
+@pytest.mark.parametrize("mecc_trained", [False, True])
+def test_engines_agree_in_distribution(validation_params, mecc_trained):
+    """Test that the final totals of the two engines come from the same distribution"""
+    agent_totals = final_totals(MECC_Model, validation_params, mecc_trained, range(300))
+    count_totals = final_totals(Count_MECC_Model, validation_params, mecc_trained, range(10_000, 13_000))
+
+    critical_value = ks_critical_value(len(agent_totals), len(count_totals))
+    for column in range(2):
+        assert ks_statistic(agent_totals[:, column], count_totals[:, column]) < critical_value
+
+@pytest.mark.parametrize("mecc_trained", [False, True])
+def test_count_engine_matches_expected_moments(validation_params, mecc_trained):
+    """Test the count engine's totals against their binomial mean and variance"""
+    totals = final_totals(Count_MECC_Model, validation_params, mecc_trained, range(4000))
+
+    trials = validation_params["N_people"] * NUM_STEPS
+    intervention_prob = (validation_params["mecc_effect"] if mecc_trained
+                         else validation_params["base_make_intervention_prob"])
+    for column, prob in [(0, validation_params["visit_prob"])
+                         , (1, validation_params["visit_prob"] * intervention_prob)]:
+        expected_mean = trials * prob
+        expected_var = trials * prob * (1 - prob)
+        standard_error = np.sqrt(expected_var / len(totals))
+        assert abs(totals[:, column].mean() - expected_mean) < 4 * standard_error
+        assert totals[:, column].var(ddof=1) == pytest.approx(expected_var, rel=0.15)
+
+def test_cost_independent_of_population():
+    """Test that the count engine handles populations far beyond the agent engine"""
+    model = Count_MECC_Model(N_people=10**9, N_service=3, mecc_effect=0.8
+                             , base_make_intervention_prob=0.3, visit_prob=0.5, seed=0)
+    for _ in range(12):
+        model.step()
+
+    assert model.contacts_made.sum() == pytest.approx(12 * 10**9 * 0.5, rel=1e-3)
+    assert (model.interventions_made <= model.contacts_made).all()
+
+def test_unsupported_options_rejected(smoke_model_params, validation_params):
+    """Test that the count engine refuses the smoking model and common random numbers"""
+    parameters = {**smoke_model_params, "model_seed": 0}
+    with pytest.raises(ValueError):
+        create_MECC_model(parameters, model_type='Smoke', engine='Count')
+
+    with pytest.raises(ValueError):
+        Count_MECC_Model(**validation_params, common_random_numbers=CommonRandomNumbers(0, 40))
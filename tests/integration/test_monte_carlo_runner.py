@@ -0,0 +1,120 @@
+import pytest
+import numpy as np
+from streamlit_app.monte_carlo_runner import run_monte_carlo, iter_monte_carlo, iteration_seeds
+
+@pytest.fixture
+def monte_carlo_params():
+    return {
+        "model_seed": 0,
+        "N_people": 50,
+        "N_service": 1,
+        "visit_prob": 0.3,
+        "base_make_intervention_prob": 0.1,
+        "mecc_effect": 0.9,
+        "num_steps": 6,
+        "animation_speed": 0
+    }
+
+def test_output_layout(monte_carlo_params):
+    """Test that the combined data has a month and seed for every row"""
+    data_no_mecc, data_mecc = run_monte_carlo(monte_carlo_params, iterations=3, max_workers=1)
+
+    for data in [data_no_mecc, data_mecc]:
+        assert list(data.columns) == ["month", "Total Contacts", "Total Interventions", "seed"]
+        assert len(data) == 3 * monte_carlo_params["num_steps"]
+        assert data["seed"].unique().tolist() == iteration_seeds(0, 3)
+        assert data.groupby("seed")["month"].apply(list).tolist() == [list(range(6))] * 3
+
+def test_results_independent_of_worker_count(monte_carlo_params):
+    """Test that each seed gives the same results however many workers run it"""
+    serial_no_mecc, serial_mecc = run_monte_carlo(monte_carlo_params, iterations=4, max_workers=1)
+    parallel_no_mecc, parallel_mecc = run_monte_carlo(monte_carlo_params, iterations=4, max_workers=2)
+
+    assert serial_no_mecc.equals(parallel_no_mecc)
+    assert serial_mecc.equals(parallel_mecc)
+
+def test_progress_reported(monte_carlo_params):
+    """Test that progress is reported once per completed iteration"""
+    progress = []
+    run_monte_carlo(monte_carlo_params, iterations=3, max_workers=1, progress_callback=progress.append)
+
+    assert progress == [1, 2, 3]
+
+def test_smoke_model_iterations(monte_carlo_params):
+    """Test that the smoking model can be run by the Monte Carlo runner"""
+    params = {
+        **monte_carlo_params,
+        "initial_smoking_prob": 0.5,
+        "quit_attempt_prob": 0.1,
+        "base_smoke_relapse_prob": 0.1,
+        "intervention_effect": 1.5
+    }
+    completed = list(iter_monte_carlo(params, iterations=2, model_type='Smoke', max_workers=1))
+
+    assert [iteration for iteration, _, _ in completed] == [0, 1]
+    assert "Total Smoking" in completed[0][1].columns
+
+def test_iteration_seeds_independent():
+    """Test that spawned seeds are reproducible, distinct and depend on the base seed"""
+    seeds = iteration_seeds(42, 1000)
+
+    assert seeds == iteration_seeds(42, 1000)
+    assert len(set(seeds)) == 1000
+    assert seeds[:10] != iteration_seeds(43, 10)
+
+    # Spawning more iterations does not change the earlier seeds
+    assert iteration_seeds(42, 10) == seeds[:10]
+
+def test_iteration_reproducible_from_seed(monte_carlo_params):
+    """Test that an iteration can be rerun on its own from the recorded seed"""
+    from streamlit_app.monte_carlo_runner import run_iteration
+    data_no_mecc, _ = run_monte_carlo(monte_carlo_params, iterations=3, max_workers=1)
+
+    seed = data_no_mecc["seed"].iloc[-1]
+    rerun_no_mecc, _ = run_iteration(monte_carlo_params, seed)
+    assert (data_no_mecc[data_no_mecc["seed"] == seed].reset_index(drop=True)
+            .equals(rerun_no_mecc))
+
+def test_aggregate_matches_full_data(monte_carlo_params):
+    """Test that the streamed statistics match aggregating every iteration at the end"""
+    from streamlit_app.monte_carlo_runner import aggregate_monte_carlo
+
+    data_no_mecc, data_mecc = run_monte_carlo(monte_carlo_params, iterations=4, max_workers=2)
+    statistics_no_mecc, statistics_mecc = aggregate_monte_carlo(monte_carlo_params, iterations=4, max_workers=2)
+
+    for data, statistics in [(data_no_mecc, statistics_no_mecc), (data_mecc, statistics_mecc)]:
+        expected = data.groupby("month")["Total Interventions"].agg(["mean", "std", "min", "max"])
+        for statistic, frame in zip(["mean", "std", "min", "max"], statistics.aggregates()):
+            np.testing.assert_allclose(frame["Total Interventions"], expected[statistic])
+
+def test_adaptive_stops_once_precise(monte_carlo_params):
+    """Test that adaptive runs stop early at the same point whatever the number of workers"""
+    from streamlit_app.monte_carlo_runner import adaptive_monte_carlo
+
+    params = {**monte_carlo_params, "N_people": 200}
+    serial = adaptive_monte_carlo(params, target_precision=0.2, min_iterations=5, max_iterations=200, max_workers=1)
+    parallel = adaptive_monte_carlo(params, target_precision=0.2, min_iterations=5, max_iterations=200, max_workers=2)
+
+    precision = serial[2]
+    assert precision['converged']
+    assert 5 <= precision['iterations'] < 200
+    assert all(value['relative_half_width'] <= 0.2 for value in precision['metrics'].values())
+    assert parallel[2] == precision
+    assert len(serial[0]) == len(serial[1]) == precision['iterations']
+
+def test_adaptive_without_target_runs_every_iteration(monte_carlo_params):
+    """Test that with no target every iteration runs, matching a fixed run"""
+    from streamlit_app.monte_carlo_runner import adaptive_monte_carlo
+
+    statistics_no_mecc, statistics_mecc, precision = adaptive_monte_carlo(
+        monte_carlo_params, target_precision=None, max_iterations=4, max_workers=1)
+    _, data_mecc = run_monte_carlo(monte_carlo_params, iterations=4, max_workers=1)
+
+    assert precision['iterations'] == 4 and not precision['converged']
+    expected = data_mecc.groupby("month")["Total Interventions"].mean()
+    np.testing.assert_allclose(statistics_mecc.aggregates()[0]["Total Interventions"], expected)
+
+    improvement = precision['metrics']['Total Interventions (MECC Improvement)']['mean']
+    mean_no_mecc = precision['metrics']['Total Interventions (No MECC)']['mean']
+    mean_mecc = precision['metrics']['Total Interventions (MECC Trained)']['mean']
+    assert improvement == pytest.approx(mean_mecc - mean_no_mecc)
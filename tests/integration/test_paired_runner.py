@@ -0,0 +1,47 @@
+import pytest
+from streamlit_app.streamlit_model_functions import create_MECC_model, run_simulation
+from streamlit_app.paired_runner import PairedScenarioRunner, run_paired_simulation
+
+@pytest.fixture
+def paired_params(smoke_model_params):
+    return {
+        **smoke_model_params,
+        "model_seed": smoke_model_params["seed"],
+        "num_steps": 8
+    }
+
+def test_parallel_matches_sequential_runs(paired_params):
+    """Test that running the arms in worker processes gives the same data as running them one after the other"""
+    data_no_mecc, data_mecc = run_paired_simulation(paired_params, model_type='Smoke')
+
+    for data, mecc_trained in [(data_no_mecc, False), (data_mecc, True)]:
+        model = create_MECC_model(paired_params, model_type='Smoke', mecc_trained=mecc_trained)
+        expected = run_simulation(model, paired_params["num_steps"])
+        assert data.equals(expected)
+
+def test_serial_matches_parallel(paired_params):
+    """Test that the in-process fallback gives the same data as the worker processes"""
+    parallel = run_paired_simulation(paired_params, model_type='Smoke')
+    serial = run_paired_simulation(paired_params, model_type='Smoke', parallel=False)
+
+    assert parallel[0].equals(serial[0])
+    assert parallel[1].equals(serial[1])
+
+def test_snapshots_in_month_order(paired_params):
+    """Test that each month is published once, in order, with both arms' rows"""
+    runner = PairedScenarioRunner(paired_params, model_type='Smoke')
+    months = []
+    for month, row_no_mecc, row_mecc in runner.snapshots():
+        months.append(month)
+        assert len(runner.results_no_mecc) == len(runner.results_mecc) == month + 1
+        assert row_mecc == runner.results_mecc.latest()
+
+    assert months == list(range(paired_params["num_steps"]))
+    assert runner.workers == []
+
+def test_worker_error_raised(paired_params):
+    """Test that a failure in a worker is raised in the consuming thread"""
+    runner = PairedScenarioRunner(paired_params, model_type='Smoke', engine='Unknown')
+
+    with pytest.raises(RuntimeError, match="ValueError"):
+        list(runner.snapshots())
@@ -1,4 +1,5 @@
 import pytest
+import time
 import numpy as np
 from streamlit_app.model_two_types_mecc import (
     SmokeModel_MECC_Model,
@@ -58,3 +59,64 @@ def test_intervention_effect_scaling():
         f"Max contacts ({stats_5['max_contacts']}) should be close to expected ({expected_contacts_per_service})"
     assert abs(stats_5['min_contacts'] - expected_contacts_per_service) < expected_contacts_per_service, \
         f"Min contacts ({stats_5['min_contacts']}) should be close to expected ({expected_contacts_per_service})"
+
+def test_step_time_scales_linearly():
+    """Test that step time grows linearly, not quadratically, with population"""
+    def time_steps(n_people):
+        params = {
+            "N_people": n_people,
+            "N_service": 5,
+            "mecc_effect": 0.8,
+            "base_make_intervention_prob": 0.3,
+            "visit_prob": 1.0,  # Everyone visits so service lookup cost is maximised
+            "initial_smoking_prob": 0.5,
+            "quit_attempt_prob": 0.1,
+            "base_smoke_relapse_prob": 0.1,
+            "intervention_effect": 1.5,
+            "seed": 42,
+            "mecc_trained": True
+        }
+        model = SmokeModel_MECC_Model(**params)
+
+        # Best of several runs to reduce timing noise
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            model.step()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    time_small = time_steps(500)
+    time_large = time_steps(4000)
+
+    # 8x the people should take roughly 8x the time; quadratic growth would be 64x
+    assert time_large / time_small < 24, \
+        f"Step time grew {time_large / time_small:.1f}x for 8x the people"
+
+def test_registry_tracks_added_and_removed_agents():
+    """Test that the typed registry follows agents added to and removed from the schedule"""
+    params = {
+        "N_people": 10,
+        "N_service": 3,
+        "mecc_effect": 0.8,
+        "base_make_intervention_prob": 0.3,
+        "visit_prob": 1.0,
+        "initial_smoking_prob": 0.5,
+        "quit_attempt_prob": 0.1,
+        "base_smoke_relapse_prob": 0.1,
+        "intervention_effect": 1.5,
+        "seed": 42,
+        "mecc_trained": True
+    }
+    model = SmokeModel_MECC_Model(**params)
+    assert len(model.person_agents) == 10
+    assert len(model.service_agents) == 3
+
+    removed_service = model.service_agents[0]
+    model.schedule.remove(removed_service)
+    assert removed_service not in model.service_agents
+    assert len(model.service_agents) == 2
+
+    model.step()
+    assert removed_service.contacts_made == 0
+    assert sum(s.contacts_made for s in model.service_agents) == 10
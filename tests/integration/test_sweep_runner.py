@@ -0,0 +1,91 @@
+import json
+import pandas as pd
+import pytest
+from streamlit_app.sweep_runner import SweepRunner, expand_grid, latin_hypercube, main
+
+@pytest.fixture
+def sweep_params():
+    return {
+        "model_seed": 0,
+        "N_people": 50,
+        "N_service": 1,
+        "visit_prob": 0.3,
+        "base_make_intervention_prob": 0.1,
+        "mecc_effect": 0.9,
+        "num_steps": 4,
+        "animation_speed": 0
+    }
+
+def test_expand_grid():
+    """Test that a grid expands to every combination of its values"""
+    points = expand_grid({"mecc_effect": [0.5, 0.9], "visit_prob": [0.1, 0.2, 0.3]})
+
+    assert len(points) == 6
+    assert {"mecc_effect": 0.9, "visit_prob": 0.3} in points
+
+def test_latin_hypercube_strata():
+    """Test that every stratum of each range is sampled exactly once"""
+    points = latin_hypercube({"mecc_effect": (0.5, 0.9), "intervention_effect": (1, 2)}, samples=8, seed=1)
+
+    assert points == latin_hypercube({"mecc_effect": (0.5, 0.9), "intervention_effect": (1, 2)}, samples=8, seed=1)
+    strata = sorted(int((point["intervention_effect"] - 1) * 8) for point in points)
+    assert strata == list(range(8))
+    assert all(0.5 <= point["mecc_effect"] < 0.9 for point in points)
+
+def test_long_table_layout(sweep_params, tmp_path):
+    """Test that the results have a row for every point, seed, arm, month and metric"""
+    points = expand_grid({"mecc_effect": [0.5, 0.9]})
+    data = SweepRunner(sweep_params, points, tmp_path, replicates=2).run(max_workers=1)
+
+    assert list(data.columns) == ["point", "mecc_effect", "seed", "arm", "month", "metric", "value"]
+    assert len(data) == 2 * 2 * 2 * sweep_params["num_steps"] * 2
+    assert not data.duplicated(["point", "seed", "arm", "month", "metric"]).any()
+    assert data.groupby("point")["mecc_effect"].first().tolist() == [0.5, 0.9]
+
+def test_point_matches_monte_carlo_iteration(sweep_params, tmp_path):
+    """Test that a design point gives the same results as running its parameters directly"""
+    from streamlit_app.monte_carlo_runner import run_iteration
+
+    data = SweepRunner(sweep_params, [{"visit_prob": 0.6}], tmp_path).run(max_workers=1)
+    seed = data["seed"].iloc[0]
+    _, data_mecc = run_iteration({**sweep_params, "visit_prob": 0.6}, seed)
+
+    swept = data[(data["arm"] == "mecc") & (data["metric"] == "Total Interventions")]
+    assert swept["value"].tolist() == data_mecc["Total Interventions"].tolist()
+
+def test_resume_runs_only_missing_jobs(sweep_params, tmp_path):
+    """Test that a rerun skips finished jobs and gives the same table"""
+    points = expand_grid({"visit_prob": [0.1, 0.2, 0.3]})
+    runner = SweepRunner(sweep_params, points, tmp_path, replicates=2)
+
+    ## stops after two jobs, as if the sweep were interrupted
+    progress = runner.iter_run(max_workers=1)
+    next(progress), next(progress)
+    progress.close()
+    assert len(runner.pending_jobs()) == 4
+
+    completed = []
+    data = SweepRunner(sweep_params, points, tmp_path, replicates=2).run(
+        max_workers=2, progress_callback=lambda done, total: completed.append(done))
+
+    assert completed == [3, 4, 5, 6]
+    fresh = SweepRunner(sweep_params, points, tmp_path / "fresh", replicates=2).run(max_workers=1)
+    pd.testing.assert_frame_equal(data, fresh)
+
+def test_different_design_rejected(sweep_params, tmp_path):
+    """Test that an output directory cannot be reused for a different sweep"""
+    SweepRunner(sweep_params, expand_grid({"visit_prob": [0.1]}), tmp_path).run(max_workers=1)
+
+    with pytest.raises(ValueError, match="different sweep"):
+        SweepRunner(sweep_params, expand_grid({"visit_prob": [0.2]}), tmp_path).run(max_workers=1)
+
+def test_command_line(sweep_params, tmp_path):
+    """Test that the command line writes the combined results"""
+    parameter_file = tmp_path / "base.json"
+    parameter_file.write_text(json.dumps(sweep_params))
+    main([str(parameter_file), "--grid", "mecc_effect=0.5,0.9", "--grid", "visit_prob=0.1,0.2"
+          , "--workers", "1", "--output-dir", str(tmp_path / "out")])
+
+    data = pd.read_parquet(tmp_path / "out" / "sweep_results.parquet")
+    assert data["point"].nunique() == 4
+    assert set(data["metric"]) == {"Total Contacts", "Total Interventions"}
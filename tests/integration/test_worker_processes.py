@@ -0,0 +1,48 @@
+import os
+import sys
+import runpy
+import subprocess
+import pytest
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'streamlit_app')
+
+## a script guarded like app.py, counting each time its main part runs in a file next to it
+SCRIPT = """
+import os
+import sys
+if __name__ != '__mp_main__':
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'runs.txt'), 'a') as f:
+        f.write('run\\n')
+    sys.path.insert(0, {app_dir!r})
+    import multiprocessing
+    import mesa.batchrunner  ## sets a start method for the whole process, as importing mesa does in the app
+    multiprocessing.set_start_method({start_method!r}, force=True)
+    from paired_runner import run_paired_simulation
+    from monte_carlo_runner import run_monte_carlo, adaptive_monte_carlo
+
+    params = {{"model_seed": 0, "N_people": 20, "N_service": 1, "visit_prob": 0.3,
+              "base_make_intervention_prob": 0.1, "mecc_effect": 0.9, "num_steps": 3}}
+    run_paired_simulation(params)
+    run_monte_carlo(params, iterations=2, max_workers=2)
+    adaptive_monte_carlo(params, target_precision=None, max_iterations=2, max_workers=2)
+    print('finished')
+"""
+
+@pytest.mark.parametrize("start_method", ['spawn', 'fork'])
+def test_workers_do_not_rerun_app(tmp_path, start_method):
+    """Test that workers started from a script guarded like app.py do not run its main part again"""
+    script = tmp_path / "app.py"
+    script.write_text(SCRIPT.format(app_dir=os.path.abspath(APP_DIR), start_method=start_method))
+
+    result = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, timeout=300)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == 'finished'
+    assert (tmp_path / "runs.txt").read_text() == 'run\n'
+
+def test_app_not_run_when_imported_by_workers():
+    """Test that importing app.py the way a spawned worker does leaves the app unrun"""
+    app_globals = runpy.run_path(os.path.join(APP_DIR, 'app.py'), run_name='__mp_main__')
+
+    assert 'get_quarto' in app_globals
+    assert 'pg' not in app_globals
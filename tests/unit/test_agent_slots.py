@@ -0,0 +1,49 @@
+import mesa
+import pytest
+from bench.agent_memory import bytes_per_agent
+from streamlit_app.model_two_types_mecc import MECC_Model
+
+## a person agent built on mesa's Agent, which keeps its attributes in an instance dict
+class MesaPersonAgent(mesa.Agent):
+    def __init__(self, unique_id, model, visit_prob):
+        super().__init__(unique_id, model)
+        self.visit_prob = visit_prob
+        self.interventions_received = 0
+
+## the generic model with its people built and registered as mesa would do it, for comparison
+class MesaAgentModel(MECC_Model):
+    register_agent = mesa.Model.register_agent
+    deregister_agent = mesa.Model.deregister_agent
+
+    def create_person_agent(self, unique_id):
+        return MesaPersonAgent(unique_id, self, self.visit_prob)
+
+def test_agents_have_no_instance_dict(smoke_model):
+    """Test that agent state, including mesa's unique_id, model and pos, is held in slots"""
+    for agent in smoke_model.person_agents[:5] + smoke_model.service_agents:
+        assert not hasattr(agent, '__dict__')
+        assert agent.pos is None and agent.model is smoke_model
+
+def test_bytes_per_agent_below_mesa_agents():
+    """Test that the model's agents take well under the memory of the same agents built on mesa's Agent"""
+    slotted = bytes_per_agent('Generic', 2000, models={'Generic': MECC_Model})
+    mesa_agents = bytes_per_agent('Generic', 2000, models={'Generic': MesaAgentModel})
+    assert slotted < 0.75 * mesa_agents
+
+def test_agents_registered_with_model(smoke_model, smoke_model_params):
+    """Test that the model still lists its agents, by type, without mesa's weak registries"""
+    assert len(smoke_model.agents) == smoke_model_params['N_people'] + smoke_model_params['N_service']
+    assert sum(len(agents) for agents in smoke_model.agents_by_type.values()) == len(smoke_model.agents)
+
+    agent = smoke_model.person_agents[0]
+    agent.remove()
+    assert agent not in smoke_model.agents
+
+def test_attribute_api_unchanged(smoke_model):
+    """Test that agent attributes can still be read and set as before"""
+    agent = smoke_model.person_agents[0]
+    agent.quit_attempt_prob = 0.5
+    agent.months_smoke_free += 2
+
+    assert agent.quit_attempt_prob == 0.5
+    assert agent.months_smoke_free == 2
@@ -0,0 +1,54 @@
+import os
+import time
+import pytest
+from streamlit_app.artifact_store import ArtifactStore
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path / "sessions"), ttl=60, max_runs=3)
+
+def test_runs_saved_by_content(store):
+    """Test that identical files share a directory, and different files or sessions do not"""
+    first = store.save("session_a", {"data.csv": "month\n0\n", "session_data.json": b"{}"})
+    assert store.save("session_a", {"data.csv": "month\n0\n", "session_data.json": b"{}"}) == first
+    assert store.save("session_a", {"data.csv": "month\n1\n", "session_data.json": b"{}"}) != first
+    assert store.save("session_b", {"data.csv": "month\n0\n", "session_data.json": b"{}"}) != first
+
+    with open(os.path.join(first, "data.csv")) as f:
+        assert f.read() == "month\n0\n"
+    assert os.path.basename(os.path.dirname(first)) == "session_a"
+    assert not any(name.endswith(".tmp") for name in os.listdir(os.path.dirname(first)))
+
+def test_expired_runs_removed(store):
+    """Test that runs unused for longer than the TTL are removed along with their empty session"""
+    run_dir = store.save("session_a", {"data.csv": "0"})
+    os.utime(run_dir, (time.time() - 120, time.time() - 120))
+
+    assert store.cleanup() == [run_dir]
+    assert not os.path.exists(os.path.dirname(run_dir))
+
+def test_least_recently_used_removed(store):
+    """Test that beyond max_runs the least recently used runs go first, and touching a run keeps it"""
+    run_dirs = [store.save(f"session_{i}", {"data.csv": str(i)}) for i in range(3)]
+    for age, run_dir in zip([30, 20, 10], run_dirs):
+        os.utime(run_dir, (time.time() - age, time.time() - age))
+    store.touch(run_dirs[0])
+
+    newest = store.save("session_3", {"data.csv": "3"})
+
+    assert [os.path.exists(run_dir) for run_dir in run_dirs] == [True, False, True]
+    assert os.path.exists(newest)
+
+def test_pinned_runs_kept(store):
+    """Test that a pinned run is neither expired nor counted towards max_runs until it is unpinned"""
+    pinned = store.save("session_a", {"data.csv": "0"})
+    store.pin(pinned)
+    os.utime(pinned, (time.time() - 120, time.time() - 120))
+    others = [store.save(f"session_{i}", {"data.csv": str(i)}) for i in range(1, 4)]
+
+    assert os.path.exists(pinned) and all(os.path.exists(run_dir) for run_dir in others)
+
+    ## unpinning marks the run as just used, so the oldest of the others goes first
+    store.unpin(pinned)
+    assert store.cleanup() == [others[0]]
+    assert os.path.exists(pinned)
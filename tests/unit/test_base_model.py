@@ -159,3 +159,19 @@ def test_multiple_services():
     # Check that all services are being used
     service_agents = [a for a in model.schedule.agents if isinstance(a, ServiceAgent)]
     assert all(s.contacts_made > 0 for s in service_agents)
+
+def test_seed_reproducible():
+    """Test that the same seed gives the same run, whether passed by keyword or position"""
+    def run_model(*args, **kwargs):
+        model = MECC_Model(*args, **kwargs)
+        for _ in range(5):
+            model.step()
+        return model.datacollector.get_model_vars_dataframe()
+
+    keyword_run = run_model(N_people=200, N_service=2, mecc_effect=0.8
+                            , base_make_intervention_prob=0.3, visit_prob=0.5, seed=42)
+    positional_run = run_model(200, 2, 0.8, 0.3, 0.5, False, 42)
+    other_seed_run = run_model(200, 2, 0.8, 0.3, 0.5, False, 7)
+
+    assert keyword_run.equals(positional_run)
+    assert not keyword_run.equals(other_seed_run)
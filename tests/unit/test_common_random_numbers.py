@@ -0,0 +1,63 @@
+import pytest
+from streamlit_app.common_random_numbers import CommonRandomNumbers
+from streamlit_app.streamlit_model_functions import create_MECC_model, run_simulation
+from streamlit_app.monte_carlo_runner import run_monte_carlo
+
+@pytest.fixture
+def crn_params(smoke_model_params):
+    return {
+        **smoke_model_params,
+        "model_seed": smoke_model_params["seed"],
+        "initial_smoking_prob": 0.5,
+        "num_steps": 12
+    }
+
+def run_arm(params, mecc_trained, engine='Agent', model_type='Smoke'):
+    streams = CommonRandomNumbers(params["model_seed"], params["N_people"])
+    model = create_MECC_model(params, model_type=model_type, mecc_trained=mecc_trained
+                              , engine=engine, common_random_numbers=streams)
+    return run_simulation(model, params["num_steps"])
+
+def test_streams_reproducible():
+    """Test that two stream objects from the same seed give the same draws"""
+    first = CommonRandomNumbers(7, 20)
+    second = CommonRandomNumbers(7, 20)
+
+    assert (first.initial_smoking() == second.initial_smoking()).all()
+    assert first.uniform('quit', 5, 3) == second.uniform('quit', 5, 3)
+    assert first.uniform('quit', 5, 3) != first.uniform('quit', 6, 3)
+
+def test_arms_identical_when_intervention_probs_match(crn_params):
+    """Test that the arms only differ through the intervention decision"""
+    params = {**crn_params, "mecc_effect": crn_params["base_make_intervention_prob"]}
+
+    assert run_arm(params, False).equals(run_arm(params, True))
+
+def test_mecc_arm_never_makes_fewer_interventions(crn_params):
+    """Test that with shared draws every no MECC intervention also happens with MECC training"""
+    data_no_mecc = run_arm(crn_params, False, model_type='Generic')
+    data_mecc = run_arm(crn_params, True, model_type='Generic')
+
+    assert (data_no_mecc["Total Contacts"] == data_mecc["Total Contacts"]).all()
+    assert (data_mecc["Total Interventions"] >= data_no_mecc["Total Interventions"]).all()
+
+def test_agent_and_vectorized_engines_agree(crn_params):
+    """Test that both engines give the same data when they share the same draws"""
+    for mecc_trained in [False, True]:
+        agent_data = run_arm(crn_params, mecc_trained, engine='Agent')
+        vectorized_data = run_arm(crn_params, mecc_trained, engine='Vectorized')
+        assert agent_data.equals(vectorized_data)
+
+def test_reduces_variance_of_difference(crn_params):
+    """Test that common random numbers narrow the spread of the MECC effect on smoking"""
+    spreads = {}
+    for common_random_numbers in [False, True]:
+        data_no_mecc, data_mecc = run_monte_carlo(crn_params, iterations=30, model_type='Smoke'
+                                                  , engine='Vectorized', max_workers=1
+                                                  , common_random_numbers=common_random_numbers)
+        final_month = data_mecc["month"] == crn_params["num_steps"] - 1
+        difference = (data_mecc.loc[final_month, "Total Smoking"].to_numpy()
+                      - data_no_mecc.loc[final_month, "Total Smoking"].to_numpy())
+        spreads[common_random_numbers] = difference.std(ddof=1)
+
+    assert spreads[True] < spreads[False]
@@ -0,0 +1,97 @@
+import pytest
+from streamlit_app.model_two_types_mecc import SmokeModel_MECC_Model
+from streamlit_app.streamlit_model_functions import (
+    run_simulation,
+    create_population_figure,
+    create_intervention_figure,
+    create_metrics_figure,
+    update_figure_data
+)
+from streamlit_app.simulation_results import SimulationResults
+from streamlit_app.live_charts import LiveCharts
+
+@pytest.fixture
+def smoke_results(smoke_model_params):
+    return [run_simulation(SmokeModel_MECC_Model(**{**smoke_model_params, "mecc_trained": mecc_trained}), 12)
+            for mecc_trained in [False, True]]
+
+## stands in for a Streamlit placeholder, keeping each figure it is sent
+class RecordingPlaceholder:
+    def __init__(self):
+        self.figures = []
+
+    def plotly_chart(self, figure, **kwargs):
+        self.figures.append(figure.to_json())
+
+@pytest.mark.parametrize("create_figure", [create_population_figure, create_intervention_figure, create_metrics_figure])
+def test_updated_figure_matches_rebuilt(smoke_results, create_figure):
+    """Test that updating a figure's data gives the same figure as building it for that month"""
+    figure = create_figure(*smoke_results, 0)
+    for step in range(12):
+        update_figure_data(figure, *smoke_results, step)
+        assert figure.to_json() == create_figure(*smoke_results, step).to_json()
+
+def test_redraws_limited_to_frame_budget(smoke_results):
+    """Test that months arriving faster than the frame budget are skipped except the last"""
+    placeholder = RecordingPlaceholder()
+    live_charts = LiveCharts(frame_budget=60).add(placeholder, create_intervention_figure, num_steps=12)
+
+    for step in range(12):
+        live_charts.update(*smoke_results, step, force=step == 11)
+
+    assert live_charts.draws == 2 and live_charts.skipped == 10
+    assert len(placeholder.figures) == 2
+
+def test_every_month_drawn_without_budget(smoke_results):
+    """Test that every month is drawn with a zero frame budget, on a month axis fixed to the run"""
+    placeholder = RecordingPlaceholder()
+    live_charts = LiveCharts(frame_budget=0).add(placeholder, create_population_figure, num_steps=12)
+
+    for step in range(12):
+        live_charts.update(*smoke_results, step)
+
+    assert live_charts.draws == 12 and live_charts.skipped == 0
+    assert list(live_charts.charts[0]['figure'].layout.xaxis.range) == [0, 11]
+
+def test_replay_draws_from_start_month(smoke_results):
+    """Test that replaying a finished run draws each month from the start month with only that month's data"""
+    placeholder = RecordingPlaceholder()
+    live_charts = LiveCharts(frame_budget=0).add(placeholder, create_intervention_figure, num_steps=12)
+    months = []
+
+    live_charts.replay(*smoke_results, start=4, progress_callback=months.append)
+
+    assert months == list(range(4, 12))
+    assert len(placeholder.figures) == 8
+    assert placeholder.figures[0] == create_intervention_figure(smoke_results[0].iloc[:5], smoke_results[1].iloc[:5], 4) \
+        .update_xaxes(range=[0, 11]).to_json()
+
+def test_show_matches_replay(smoke_results):
+    """Test that jumping straight to a month draws the same figure as replaying up to it"""
+    replayed = RecordingPlaceholder()
+    LiveCharts(frame_budget=0).add(replayed, create_metrics_figure).replay(*smoke_results)
+
+    shown = RecordingPlaceholder()
+    live_charts = LiveCharts(frame_budget=60).add(shown, create_metrics_figure)
+    live_charts.show(*smoke_results, 0)
+    assert live_charts.show(*smoke_results, 11)
+
+    assert shown.figures[-1] == replayed.figures[-1]
+
+def test_buffers_only_read_when_drawn(smoke_results, monkeypatch):
+    """Test that a run's buffers are drawn like its DataFrames and are not read for skipped months"""
+    buffers = [SimulationResults(results.columns, 12) for results in smoke_results]
+    views = []
+    monkeypatch.setattr(SimulationResults, 'view', lambda self: views.append(self) or self.to_dataframe())
+
+    from_buffers = RecordingPlaceholder()
+    live_charts = LiveCharts(frame_budget=60).add(from_buffers, create_population_figure, num_steps=12)
+    for step in range(12):
+        for buffer, results in zip(buffers, smoke_results):
+            buffer.append({column: results[column].iloc[step] for column in results.columns})
+        live_charts.update(*buffers, step, force=step == 11)
+
+    assert len(views) == 2 * live_charts.draws == 4
+    from_frames = RecordingPlaceholder()
+    LiveCharts(frame_budget=0).add(from_frames, create_population_figure, num_steps=12).show(*smoke_results, 11)
+    assert from_buffers.figures[-1] == from_frames.figures[-1]
@@ -0,0 +1,64 @@
+import pytest
+from streamlit_app.model_two_types_mecc import (
+    MECC_Model,
+    SmokeModel_MECC_Model,
+    SMOKE_REPORTERS
+)
+
+def test_counters_match_full_scans(smoke_model_params):
+    """Test that the running counters agree with full agent scans every step"""
+    params = {
+        **smoke_model_params,
+        "initial_smoking_prob": 0.6,
+        "quit_attempt_prob": 0.3,
+        "base_smoke_relapse_prob": 0.4,
+        "debug_counters": True
+    }
+    model = SmokeModel_MECC_Model(**params)
+
+    # check_counters runs at the start of every step in debug mode
+    for _ in range(20):
+        model.step()
+    model.check_counters()
+
+def test_collected_data_matches_full_scans(smoke_model_params):
+    """Test that data collected from the counters matches the full scan functions"""
+    model = SmokeModel_MECC_Model(**smoke_model_params)
+    for _ in range(10):
+        model.step()
+
+    # Data is collected at the start of each step, so collect the current state
+    model.datacollector.collect(model)
+    data = model.datacollector.get_model_vars_dataframe()
+    for name, (_, scan_reporter) in SMOKE_REPORTERS.items():
+        assert data[name].iloc[-1] == scan_reporter(model), \
+            f"Collected '{name}' should match a full scan of the agents"
+
+def test_generic_counters(base_model_params):
+    """Test that contact and intervention counters work for the generic model"""
+    model = MECC_Model(**base_model_params, debug_counters=True)
+    for _ in range(5):
+        model.step()
+
+    assert model.total_contacts == sum(s.contacts_made for s in model.service_agents)
+    assert model.total_interventions == sum(s.interventions_made for s in model.service_agents)
+
+def test_counters_follow_removed_agents(smoke_model_params):
+    """Test that removing agents from the schedule takes them out of the counters"""
+    model = SmokeModel_MECC_Model(**smoke_model_params, debug_counters=True)
+    for _ in range(3):
+        model.step()
+
+    for agent in model.person_agents[:10]:
+        model.schedule.remove(agent)
+    model.schedule.remove(model.service_agents[0])
+
+    model.check_counters()
+
+def test_debug_mode_detects_drift(smoke_model_params):
+    """Test that debug mode raises when a counter drifts from the agent state"""
+    model = SmokeModel_MECC_Model(**smoke_model_params, debug_counters=True)
+    model.number_smoking += 1
+
+    with pytest.raises(RuntimeError):
+        model.step()
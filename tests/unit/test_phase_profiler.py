@@ -0,0 +1,79 @@
+import json
+import pytest
+from streamlit_app.model_two_types_mecc import SmokeModel_MECC_Model
+from streamlit_app.phase_profiler import PhaseProfiler
+
+NUM_STEPS = 3
+
+@pytest.fixture
+def profiled_model(smoke_model_params):
+    model = SmokeModel_MECC_Model(**smoke_model_params, profiler=PhaseProfiler(trace=True))
+    for _ in range(NUM_STEPS):
+        model.step()
+    return model
+
+def test_phase_call_counts(profiled_model, smoke_model_params):
+    """Test that each phase is counted once per step, or once per person per step"""
+    summary = profiled_model.profiler.summary()
+    people_steps = smoke_model_params["N_people"] * NUM_STEPS
+
+    for phase in ['step', 'collect', 'schedule', 'shuffle', 'agent_steps']:
+        assert summary[phase]['calls'] == NUM_STEPS
+    for phase in ['visit', 'quit', 'relapse']:
+        assert summary[phase]['calls'] == people_steps
+    assert 'check_counters' not in summary
+
+def test_nested_phases_within_step(profiled_model):
+    """Test that the time of the phases inside a step adds up to no more than the step"""
+    summary = profiled_model.profiler.summary()
+
+    assert summary['collect']['total_seconds'] + summary['schedule']['total_seconds'] <= summary['step']['total_seconds']
+    assert summary['shuffle']['total_seconds'] + summary['agent_steps']['total_seconds'] <= summary['schedule']['total_seconds']
+
+def test_profiling_does_not_change_results(smoke_model_params):
+    """Test that a profiled model gives the same data as an unprofiled one"""
+    data = []
+    for profiler in [None, PhaseProfiler()]:
+        model = SmokeModel_MECC_Model(**smoke_model_params, profiler=profiler)
+        for _ in range(NUM_STEPS):
+            model.step()
+        data.append(model.datacollector.get_model_vars_dataframe())
+
+    assert data[0].equals(data[1])
+
+def test_trace_exports(profiled_model, tmp_path):
+    """Test that the Chrome trace and Speedscope exports hold every event, correctly nested"""
+    profiler = profiled_model.profiler
+    chrome_path = tmp_path / "trace.json"
+    speedscope_path = tmp_path / "profile.speedscope.json"
+    profiler.write_chrome_trace(chrome_path)
+    profiler.write_speedscope(speedscope_path)
+
+    chrome = json.loads(chrome_path.read_text())
+    assert len(chrome['traceEvents']) == len(profiler.events)
+    assert all(event['ph'] == 'X' and event['dur'] >= 0 for event in chrome['traceEvents'])
+
+    speedscope = json.loads(speedscope_path.read_text())
+    events = speedscope['profiles'][0]['events']
+    assert len(events) == 2 * len(profiler.events)
+
+    ## every close matches the most recent open and times never go backwards
+    stack = []
+    for previous, event in zip([events[0]] + events, events):
+        assert event['at'] >= previous['at']
+        if event['type'] == 'O':
+            stack.append(event['frame'])
+        else:
+            assert stack.pop() == event['frame']
+    assert stack == []
+
+def test_trace_event_limit():
+    """Test that trace events beyond the limit are counted but not kept"""
+    profiler = PhaseProfiler(trace=True, max_trace_events=2)
+    for _ in range(5):
+        with profiler.phase('phase'):
+            pass
+
+    assert len(profiler.events) == 2
+    assert profiler.dropped_events == 3
+    assert profiler.summary()['phase']['calls'] == 5
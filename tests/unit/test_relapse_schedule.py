@@ -0,0 +1,74 @@
+import pytest
+import numpy as np
+from streamlit_app.relapse_schedule import RelapseSchedule
+from streamlit_app.streamlit_model_functions import create_MECC_model, run_simulation
+
+def test_matches_decay_formula():
+    """Test that the table holds base * decay ** months for every month"""
+    schedule = RelapseSchedule(0.3, num_steps=24, decay=0.9)
+
+    assert len(schedule) == 25
+    for months in range(25):
+        assert schedule.prob(months) == 0.3 * (0.9 ** months)
+    assert np.array_equal(schedule[np.arange(25)], schedule.probs)
+
+def test_extends_past_num_steps():
+    """Test that the table grows if a model runs for longer than expected"""
+    schedule = RelapseSchedule(0.3, num_steps=4)
+
+    assert schedule.prob(10) == 0.3 * (0.95 ** 10)
+    assert schedule[np.array([0, 30])][1] == 0.3 * (0.95 ** 30)
+
+def test_decay_configurable(smoke_model_params):
+    """Test that the decay factor from the model parameters changes the results"""
+    parameters = {**smoke_model_params, "model_seed": 3, "num_steps": 24
+                  , "initial_smoking_prob": 0.9, "quit_attempt_prob": 0.5}
+
+    results = {}
+    for decay in [0.95, 0.0]:
+        model = create_MECC_model({**parameters, "relapse_decay": decay}, model_type='Smoke')
+        assert model.relapse_schedule.decay == decay
+        results[decay] = run_simulation(model, parameters["num_steps"])
+
+    ## months smoke free are counted before the relapse chance is looked up, so an ex-smoker's first
+    ## lookup is already at one month; with a decay of 0 that chance is 0 and nobody ever relapses
+    assert (results[0.0]["Total Smoking"].diff().dropna() <= 0).all()
+    assert results[0.0]["Total Smoking"].iloc[-1] < results[0.95]["Total Smoking"].iloc[-1]
+
+@pytest.mark.parametrize("engine", ['Agent', 'Vectorized', 'Cohort'])
+def test_engines_share_schedule(smoke_model_params, engine):
+    """Test that every smoking engine reads its relapse chance from the model's schedule"""
+    parameters = {**smoke_model_params, "model_seed": 0, "num_steps": 12}
+    model = create_MECC_model(parameters, model_type='Smoke', engine=engine)
+
+    assert model.relapse_schedule.decay == 0.95
+    assert len(model.relapse_schedule) == parameters["num_steps"] + 1
+    if engine == 'Agent':
+        assert all(agent.relapse_schedule is model.relapse_schedule for agent in model.person_agents)
+
+def test_own_schedule_keeps_model_decay(smoke_model_params):
+    """Test that an agent with its own base relapse chance keeps the model's decay and run length"""
+    from streamlit_app.model_two_types_mecc import SmokeModel_PersonAgent
+    parameters = {**smoke_model_params, "model_seed": 0, "num_steps": 12, "relapse_decay": 0.5}
+    model = create_MECC_model(parameters, model_type='Smoke')
+
+    agent = SmokeModel_PersonAgent(unique_id = len(model.agents)
+                                   , model = model
+                                   , initial_smoking_prob = 0.5
+                                   , quit_attempt_prob = 0.1
+                                   , visit_prob = 0.1
+                                   , base_smoke_relapse_prob = 0.2)
+
+    assert agent.relapse_schedule is not model.relapse_schedule
+    assert agent.relapse_schedule.decay == 0.5
+    assert len(agent.relapse_schedule) == len(model.relapse_schedule)
+
+def test_dict_parameters_share_schedule(smoke_model_params):
+    """Test that parameters given as {'value': ...} dictionaries still give every agent the model's schedule"""
+    parameters = {**smoke_model_params, "model_seed": 0, "num_steps": {"value": 12}
+                  , "base_smoke_relapse_prob": {"value": smoke_model_params["base_smoke_relapse_prob"]}}
+    model = create_MECC_model(parameters, model_type='Smoke')
+
+    assert model.relapse_schedule.base_smoke_relapse_prob == smoke_model_params["base_smoke_relapse_prob"]
+    assert len(model.relapse_schedule) == 13
+    assert all(agent.relapse_schedule is model.relapse_schedule for agent in model.person_agents)
@@ -0,0 +1,172 @@
+import os
+import sys
+import stat
+import time
+import pytest
+from streamlit_app.report_service import ReportService, report_key
+from streamlit_app.artifact_store import ArtifactStore
+
+## stands in for quarto, writing the rendered report with its source and parameters into the --output-dir
+## given, or like the app's Quarto project into a downloads folder when none is given, and counting each
+## render in a file beside the .qmd; a .qmd of 'slow' takes a second to render,
+## and a fail_once file in the directory rendered in makes the next render fail
+FAKE_QUARTO = """#!{python}
+import os, sys, time
+qmd_path = sys.argv[2]
+parameters = [sys.argv[i + 1] for i, arg in enumerate(sys.argv) if arg == '-P']
+if '--output-dir' in sys.argv:
+    output_dir = sys.argv[sys.argv.index('--output-dir') + 1]
+else:
+    output_dir = os.path.join(os.path.dirname(qmd_path), 'downloads')
+    os.makedirs(output_dir, exist_ok=True)
+if open(qmd_path).read() == 'broken':
+    sys.exit('ERROR: could not render')
+if os.path.exists('fail_once'):
+    os.remove('fail_once')
+    sys.exit('ERROR: failed once')
+if open(qmd_path).read() == 'slow':
+    time.sleep(1)
+with open(os.path.join(os.path.dirname(qmd_path), 'renders.txt'), 'a') as f:
+    f.write('render\\n')
+with open(os.path.join(output_dir, os.path.basename(qmd_path).replace('.qmd', '.html')), 'w') as f:
+    f.write('<html>' + open(qmd_path).read() + ' ' + parameters[0] + '</html>')
+"""
+
+@pytest.fixture
+def report_files(tmp_path):
+    app_dir = tmp_path / "app"
+    app_dir.mkdir()
+    qmd_path = app_dir / "report.qmd"
+    qmd_path.write_text("report")
+    (app_dir / "NHS_report_theme.css").write_text("css")
+
+    run_dir = tmp_path / "run"
+    run_dir.mkdir()
+    data_path = run_dir / "data.csv"
+    data_path.write_text("month,value\n0,1\n")
+    return str(qmd_path), [str(data_path)]
+
+@pytest.fixture
+def service(tmp_path):
+    quarto = tmp_path / "quarto"
+    quarto.write_text(FAKE_QUARTO.format(python=sys.executable))
+    quarto.chmod(quarto.stat().st_mode | stat.S_IEXEC)
+    return ReportService(quarto_command=str(quarto))
+
+def renders(report_files):
+    with open(os.path.join(os.path.dirname(report_files[1][0]), 'renders.txt')) as f:
+        return len(f.readlines())
+
+def test_report_key_follows_inputs(report_files):
+    """Test that the key changes with any input file and not otherwise"""
+    qmd_path, input_paths = report_files
+    key = report_key(qmd_path, input_paths)
+    assert report_key(qmd_path, input_paths) == key
+
+    with open(input_paths[0], 'a') as f:
+        f.write("1,2\n")
+    assert report_key(qmd_path, input_paths) != key
+
+def test_rendered_report_reused(service, report_files):
+    """Test that a report renders in the background once and is then reused for the same inputs"""
+    first = service.request(*report_files)
+    assert first['status'] in ('rendering', 'ready')
+
+    ready = service.wait(first['key'], timeout=60)
+    assert ready['status'] == 'ready'
+    ## rendered from a copy next to the inputs, told to read them from there
+    assert os.path.dirname(ready['html_path']) == os.path.dirname(report_files[1][0])
+    with open(ready['html_path']) as f:
+        assert f.read() == '<html>report data_dir:.</html>'
+    assert os.path.exists(os.path.join(os.path.dirname(ready['html_path']), 'NHS_report_theme.css'))
+
+    assert service.request(*report_files) == ready
+    ## a fresh service still finds the saved report
+    assert ReportService(quarto_command=service.quarto_command).request(*report_files) == ready
+    assert renders(report_files) == 1
+
+def test_changed_inputs_render_again(service, report_files):
+    """Test that new input data gives a new report alongside the old one"""
+    qmd_path, input_paths = report_files
+    first = service.wait(service.request(qmd_path, input_paths)['key'], timeout=60)
+
+    with open(input_paths[0], 'a') as f:
+        f.write("1,2\n")
+    second = service.wait(service.request(qmd_path, input_paths)['key'], timeout=60)
+
+    assert second['status'] == 'ready' and second['html_path'] != first['html_path']
+    assert os.path.exists(first['html_path'])
+    assert renders(report_files) == 2
+
+def test_failed_render_reported(service, report_files):
+    """Test that Quarto's error is reported, without starting a new render while it is checked on"""
+    qmd_path, input_paths = report_files
+    with open(qmd_path, 'w') as f:
+        f.write('broken')
+
+    key = service.request(qmd_path, input_paths)['key']
+    with service.lock:
+        render = service.renders[key]
+    render.exception(timeout=60)
+    assert not service.rendering(key)
+
+    failed = service.request(qmd_path, input_paths)
+    assert failed['status'] == 'failed'
+    assert 'could not render' in failed['message']
+
+def test_failed_render_retried(service, report_files):
+    """Test that once a failure has been reported, asking again renders the report again"""
+    qmd_path, input_paths = report_files
+    open(os.path.join(os.path.dirname(input_paths[0]), 'fail_once'), 'w').close()
+
+    failed = service.wait(service.request(qmd_path, input_paths)['key'], timeout=60)
+    assert failed['status'] == 'failed' and 'failed once' in failed['message']
+
+    retried = service.wait(service.request(qmd_path, input_paths)['key'], timeout=60)
+    assert retried['status'] == 'ready'
+    assert renders(report_files) == 1
+
+def test_missing_quarto_reported(tmp_path, report_files):
+    """Test that a missing Quarto install is reported as a failed render"""
+    service = ReportService(quarto_command=str(tmp_path / "no_quarto"))
+    failed = service.wait(service.request(*report_files)['key'], timeout=60)
+    assert failed['status'] == 'failed'
+    assert 'could not be found' in failed['message']
+
+def test_runs_render_in_their_own_directories(service, report_files, tmp_path):
+    """Test that reports for runs in different directories are each rendered and saved in their own directory"""
+    qmd_path, input_paths = report_files
+    other_dir = tmp_path / "other_run"
+    other_dir.mkdir()
+    other_path = other_dir / "data.csv"
+    other_path.write_text("month,value\n0,2\n")
+
+    keys = [service.request(qmd_path, paths)['key'] for paths in [input_paths, [str(other_path)]]]
+    html_paths = [service.wait(key, timeout=60)['html_path'] for key in keys]
+
+    assert [os.path.dirname(path) for path in html_paths] == [os.path.dirname(input_paths[0]), str(other_dir)]
+
+def test_rendering_run_kept_by_store(service, report_files, tmp_path):
+    """Test that the store does not remove a run's directory while its report is rendering"""
+    qmd_path, _ = report_files
+    with open(qmd_path, 'w') as f:
+        f.write('slow')
+    store = ArtifactStore(str(tmp_path / "sessions"), ttl=60)
+    service.artifact_store = store
+    run_dir = store.save("session_a", {"data.csv": "month,value\n0,1\n"})
+
+    key = service.request(qmd_path, [os.path.join(run_dir, "data.csv")])['key']
+    assert store.cleanup(now=time.time() + 120) == []
+
+    assert service.wait(key, timeout=60)['status'] == 'ready'
+    assert store.pins == {}
+    assert store.cleanup(now=time.time() + 120) == [run_dir]
+
+def test_project_output_dir_overridden(service, report_files):
+    """Test that the report is rendered into the run directory rather than the Quarto project's output-dir"""
+    qmd_path, input_paths = report_files
+    ready = service.wait(service.request(qmd_path, input_paths)['key'], timeout=60)
+
+    assert ready['status'] == 'ready'
+    assert os.path.dirname(ready['html_path']) == os.path.dirname(input_paths[0])
+    assert not os.path.exists(os.path.join(os.path.dirname(input_paths[0]), 'downloads'))
@@ -0,0 +1,109 @@
+import os
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from streamlit_app.result_cache import ResultCache, cache_key
+
+@pytest.fixture
+def model_parameters():
+    return {
+        "model_seed": 42,
+        "N_people": 50,
+        "N_service": 1,
+        "visit_prob": 0.1,
+        "base_make_intervention_prob": 0.1,
+        "mecc_effect": 0.9,
+        "num_steps": 24,
+        "animation_speed": 0.1
+    }
+
+@pytest.fixture
+def results():
+    return pd.DataFrame({"Total Contacts": [0, 5, 11], "Total Interventions": [0, 1, 3]})
+
+def test_cache_key_canonical(model_parameters):
+    """Test that the key ignores parameter order and display-only settings"""
+    reordered = dict(reversed(list(model_parameters.items())))
+    slower = {**model_parameters, "animation_speed": 2.0}
+
+    assert cache_key(model_parameters) == cache_key(reordered)
+    assert cache_key(model_parameters) == cache_key(slower)
+
+def test_cache_key_changes_with_inputs(model_parameters):
+    """Test that the key changes with anything that changes the results"""
+    key = cache_key(model_parameters)
+
+    assert key != cache_key({**model_parameters, "model_seed": 43})
+    assert key != cache_key({**model_parameters, "visit_prob": 0.2})
+    assert key != cache_key(model_parameters, model_type='Smoke')
+    assert key != cache_key(model_parameters, mecc_trained=True)
+    assert key != cache_key(model_parameters, engine='Vectorized')
+    assert key != cache_key(model_parameters, iterations=100)
+
+def test_memory_tier_is_lru(results):
+    """Test that the in-memory tier drops the least recently used result"""
+    cache = ResultCache(memory_items=2)
+    cache.put("a", results)
+    cache.put("b", results)
+    cache.get("a")
+    cache.put("c", results)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.get("b") is None
+
+def test_disk_tier_round_trip(tmp_path, results):
+    """Test that results survive a new cache instance through the disk tier"""
+    ResultCache(cache_dir=str(tmp_path)).put("a", results)
+
+    new_cache = ResultCache(cache_dir=str(tmp_path))
+    assert new_cache.get("a").equals(results)
+    assert new_cache.stats["disk_hits"] == 1
+
+def test_disk_tier_evicts_by_size(tmp_path, results):
+    """Test that the disk tier stays within its size limit"""
+    cache = ResultCache(cache_dir=str(tmp_path), memory_items=1)
+    cache.put("a", results)
+    file_size = os.path.getsize(cache.disk_path("a"))
+
+    cache.max_disk_bytes = 2 * file_size
+    cache.put("b", results)
+    cache.put("c", results)
+
+    assert len(os.listdir(tmp_path)) == 2
+    assert not os.path.exists(cache.disk_path("a"))
+
+def test_cached_copy_is_independent(results):
+    """Test that changing a returned result does not change the cache"""
+    cache = ResultCache()
+    cache.put("a", results)
+    cache.get("a")["seed"] = 1
+
+    assert "seed" not in cache.get("a").columns
+
+def test_get_or_run_runs_once(results):
+    """Test that a cached result is not simulated again"""
+    cache = ResultCache()
+    calls = []
+    def run():
+        calls.append(1)
+        return results
+
+    cache.get_or_run("a", run)
+    cache.get_or_run("a", run)
+    assert len(calls) == 1
+
+def test_shared_between_threads(tmp_path, results):
+    """Test that sessions using the cache from several threads at once keep it consistent"""
+    cache = ResultCache(cache_dir=str(tmp_path), memory_items=4)
+
+    def use_cache(i):
+        key = f"key{i % 8}"
+        if cache.get(key) is None:
+            cache.put(key, results)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(use_cache, range(400)))
+
+    assert len(cache.memory) == 4
+    assert sum(cache.stats.values()) == 400
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+from streamlit_app.model_two_types_mecc import SmokeModel_MECC_Model
+from streamlit_app.simulation_functions import run_simulation
+from streamlit_app.results_store import results_schema, results_bytes, write_results, read_results
+
+@pytest.fixture
+def smoke_results(smoke_model_params):
+    return run_simulation(SmokeModel_MECC_Model(**smoke_model_params), 6)
+
+def test_schema_has_month_seed_and_reporters(smoke_results):
+    """Test that the schema puts month and seed first and keeps each reporter's type"""
+    schema = results_schema(smoke_results)
+
+    assert schema.names == ["month", "seed"] + list(smoke_results.columns)
+    assert schema.field("month").type == schema.field("seed").type == pa.int64()
+    assert schema.field("Total Smoking").type == pa.int64()
+
+@pytest.mark.parametrize("extension", ["arrow", "parquet", "csv"])
+def test_results_round_trip(smoke_results, tmp_path, extension):
+    """Test that results read back as written, with month from the step and the run's seed"""
+    path = write_results(smoke_results, str(tmp_path / f"data.{extension}"), seed=42)
+    data = read_results(path)
+
+    assert data["month"].tolist() == list(range(6))
+    assert (data["seed"] == 42).all()
+    pd.testing.assert_frame_equal(data[smoke_results.columns], smoke_results, check_dtype=extension != "csv")
+
+def test_arrow_read_without_copying(smoke_results, tmp_path):
+    """Test that columns read from an Arrow file are read-only views of the mapped file"""
+    data = read_results(write_results(smoke_results, str(tmp_path / "data.arrow"), seed=42))
+    assert not data["Total Smoking"].to_numpy().flags.writeable
+
+def test_monte_carlo_columns_kept(smoke_results):
+    """Test that results which already have month and seed columns keep them"""
+    stacked = pd.concat([smoke_results.assign(month=np.arange(6), seed=seed) for seed in [1, 2]], ignore_index=True)
+    data = pa.ipc.open_file(pa.BufferReader(results_bytes(stacked))).read_all().to_pandas()
+
+    assert data["seed"].tolist() == [1] * 6 + [2] * 6
+    assert data["month"].tolist() == list(range(6)) * 2
+
+def test_seed_required_for_single_runs(smoke_results):
+    """Test that a single run cannot be stored without its seed"""
+    with pytest.raises(ValueError, match="seed"):
+        results_bytes(smoke_results)
+
+def test_same_results_give_same_bytes(smoke_results):
+    """Test that the stored bytes only depend on the results, so run directories can be keyed on them"""
+    assert results_bytes(smoke_results, 42) == results_bytes(smoke_results.copy(), 42)
+    assert results_bytes(smoke_results, 42) != results_bytes(smoke_results, 43)
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+from streamlit_app.running_statistics import RunningStatistics, t_critical
+
+@pytest.fixture
+def iterations():
+    ## ten iterations of six months, laid out as the Monte Carlo runner returns them
+    rng = np.random.default_rng(3)
+    return [
+        pd.DataFrame({
+            "month": np.arange(6),
+            "Total Contacts": rng.integers(0, 100, 6).cumsum(),
+            "Total Interventions": rng.integers(0, 20, 6).cumsum(),
+            "seed": seed
+        })
+        for seed in range(10)
+    ]
+
+def test_matches_groupby(iterations):
+    """Test that the running statistics match the groupby aggregates of every iteration"""
+    statistics = RunningStatistics()
+    for data in iterations:
+        statistics.update(data)
+
+    expected = pd.concat(iterations).groupby("month").agg(["mean", "std", "min", "max"])
+    for statistic, frame in zip(["mean", "std", "min", "max"], statistics.aggregates()):
+        assert frame["month"].tolist() == list(range(6))
+        for column in ["Total Contacts", "Total Interventions"]:
+            np.testing.assert_allclose(frame[column], expected[(column, statistic)])
+    assert len(statistics) == 10
+
+def test_single_iteration_std_is_nan(iterations):
+    """Test that the standard deviation of one iteration is NaN, as in pandas"""
+    statistics = RunningStatistics().update(iterations[0])
+
+    assert statistics.aggregates()[1]["Total Contacts"].isna().all()
+
+def test_summary_round_trip(iterations):
+    """Test that statistics rebuilt from a summary carry on as if never stored"""
+    statistics = RunningStatistics()
+    for data in iterations[:5]:
+        statistics.update(data)
+    restored = RunningStatistics.from_summary(statistics.summary())
+    for data in iterations[5:]:
+        statistics.update(data)
+        restored.update(data)
+
+    for frame, restored_frame in zip(statistics.aggregates(), restored.aggregates()):
+        pd.testing.assert_frame_equal(frame, restored_frame)
+
+def test_quantiles_exact_while_reservoir_not_full(iterations):
+    """Test that quantiles are exact until more iterations arrive than the reservoir holds"""
+    statistics = RunningStatistics(quantile_sample_size=10, seed=0)
+    for data in iterations:
+        statistics.update(data)
+
+    expected = pd.concat(iterations).groupby("month")["Total Contacts"].quantile(0.9)
+    np.testing.assert_allclose(statistics.quantile(0.9)["Total Contacts"], expected)
+
+def test_mismatched_months_rejected(iterations):
+    """Test that an iteration with different months is rejected"""
+    statistics = RunningStatistics().update(iterations[0])
+
+    with pytest.raises(ValueError, match="same months"):
+        statistics.update(iterations[1].iloc[:3])
+
+def test_t_critical_values():
+    """Test the t critical values against published two-sided 95% and 99% values"""
+    for degrees_of_freedom, expected in [(1, 12.706), (2, 4.303), (4, 2.776), (9, 2.262), (29, 2.045)]:
+        assert t_critical(0.95, degrees_of_freedom) == pytest.approx(expected, abs=0.005)
+    assert t_critical(0.99, 9) == pytest.approx(3.250, abs=0.005)
+
+def test_half_width(iterations):
+    """Test the confidence interval half width on each mean"""
+    statistics = RunningStatistics()
+    for data in iterations:
+        statistics.update(data)
+
+    expected = 2.262 * statistics.std() / np.sqrt(10)
+    np.testing.assert_allclose(statistics.half_width(0.95), expected, rtol=1e-3)
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from streamlit_app.model_two_types_mecc import SmokeModel_MECC_Model
+from streamlit_app.simulation_results import SimulationResults
+from streamlit_app.streamlit_model_functions import run_simulation_step, run_simulation
+
+def test_buffer_matches_datacollector(smoke_model_params):
+    """Test that the results buffer holds the same data as the DataCollector"""
+    model = SmokeModel_MECC_Model(**smoke_model_params)
+    results = SimulationResults.from_model(model, 10)
+
+    for _ in range(10):
+        row = run_simulation_step(model, results)
+        assert row == results.latest()
+
+    expected = model.datacollector.get_model_vars_dataframe()
+    data = results.to_dataframe()
+    assert list(data.columns) == list(expected.columns)
+    assert (data.values == expected.values).all()
+    assert len(results) == 10
+
+def test_buffer_grows_past_capacity():
+    """Test that the buffer keeps rows beyond the expected number of steps"""
+    results = SimulationResults(["Total Contacts"], 2)
+    for i in range(5):
+        results.append({"Total Contacts": i})
+
+    assert results.column("Total Contacts").tolist() == [0, 1, 2, 3, 4]
+
+def test_integer_column_becomes_float():
+    """Test that a column switches to float when a fractional value arrives"""
+    results = SimulationResults(["Average Months Smoke Free"], 3)
+    results.append({"Average Months Smoke Free": 0})
+    results.append({"Average Months Smoke Free": 1.5})
+
+    assert results.column("Average Months Smoke Free").tolist() == [0.0, 1.5]
+
+def test_run_simulation(smoke_model_params):
+    """Test that a whole run returns one row per step"""
+    model = SmokeModel_MECC_Model(**smoke_model_params)
+    data = run_simulation(model, 12)
+
+    assert len(data) == 12
+    assert "Total Smoking" in data.columns
+
+def test_view_shares_buffer():
+    """Test that a view shows the rows so far without copying the buffer's arrays"""
+    results = SimulationResults(['a', 'b'], 4)
+    results.append({'a': 1, 'b': 0.5})
+    results.append({'a': 2, 'b': 1.5})
+
+    view = results.view()
+    assert view.equals(results.to_dataframe())
+    assert np.shares_memory(view['a'].to_numpy(), results.data['a'])
@@ -72,3 +72,35 @@ def test_metrics_collection():
             assert (values <= params['N_people']).all()
         elif metric in ["Total Contacts", "Total Interventions", "Smokers With an Intervention"]:
             assert (values <= params['N_people'] * 10).all()  # Allow for multiple contacts/interventions
+
+def test_agents_built_once(smoke_model_params):
+    """Test that the smoking model builds each agent exactly once"""
+    from streamlit_app.model_two_types_mecc import SmokeModel_PersonAgent, SmokeModel_ServiceAgent
+    model = SmokeModel_MECC_Model(**smoke_model_params)
+
+    # Every agent constructed registers with the model, so this counts all constructions
+    constructed = list(model.agents)
+    assert len(constructed) == smoke_model_params["N_people"] + smoke_model_params["N_service"]
+    assert all(isinstance(a, (SmokeModel_PersonAgent, SmokeModel_ServiceAgent)) for a in constructed)
+
+def test_subclass_factory_hooks(smoke_model_params):
+    """Test that a subclass can supply its own agents through the factory hooks"""
+    from streamlit_app.model_two_types_mecc import SmokeModel_PersonAgent
+
+    class NeverSmokerAgent(SmokeModel_PersonAgent):
+        pass
+
+    class NeverSmokerModel(SmokeModel_MECC_Model):
+        def create_person_agent(self, unique_id):
+            return NeverSmokerAgent(unique_id = unique_id
+                                    , model = self
+                                    , initial_smoking_prob = 0.0
+                                    , quit_attempt_prob = self.quit_attempt_prob
+                                    , base_smoke_relapse_prob = self.base_smoke_relapse_prob
+                                    , visit_prob = self.visit_prob)
+
+    model = NeverSmokerModel(**smoke_model_params, debug_counters=True)
+    model.step()
+
+    assert all(isinstance(a, NeverSmokerAgent) for a in model.person_agents)
+    assert model.datacollector.get_model_vars_dataframe()["Total Smoking"].iloc[-1] == 0
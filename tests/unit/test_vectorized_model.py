@@ -0,0 +1,97 @@
+import pytest
+import numpy as np
+from streamlit_app.model_two_types_mecc import MECC_Model, SmokeModel_MECC_Model
+from streamlit_app.model_vectorized_mecc import (
+    Vectorized_MECC_Model,
+    Vectorized_SmokeModel_MECC_Model
+)
+from streamlit_app.streamlit_model_functions import create_MECC_model
+
+def test_same_reporter_columns(base_model_params, smoke_model_params):
+    """Test that the vectorized engine reports the same columns as the agent engine"""
+    for agent_class, vectorized_class, params in [
+        (MECC_Model, Vectorized_MECC_Model, base_model_params),
+        (SmokeModel_MECC_Model, Vectorized_SmokeModel_MECC_Model, smoke_model_params)
+    ]:
+        agent_model = agent_class(**params)
+        vectorized_model = vectorized_class(**params)
+        for _ in range(3):
+            agent_model.step()
+            vectorized_model.step()
+
+        agent_data = agent_model.datacollector.get_model_vars_dataframe()
+        vectorized_data = vectorized_model.datacollector.get_model_vars_dataframe()
+        assert list(vectorized_data.columns) == list(agent_data.columns)
+        assert len(vectorized_data) == len(agent_data)
+
+def test_population_conserved(smoke_model_params):
+    """Test that smokers and non-smokers always add up to the population"""
+    model = Vectorized_SmokeModel_MECC_Model(**smoke_model_params)
+    for _ in range(12):
+        model.step()
+
+    data = model.datacollector.get_model_vars_dataframe()
+    assert ((data["Total Smoking"] + data["Total Not Smoking"]) == smoke_model_params["N_people"]).all()
+    assert (data["Total Contacts"] >= data["Total Interventions"]).all()
+    assert (data["Total Quit Attempts"] >= data["Total Quit Smoking"]).all()
+
+def test_certain_visits_and_interventions():
+    """Test that everyone visits and receives an intervention when both are certain"""
+    model = Vectorized_MECC_Model(N_people=100
+                                  , N_service=3
+                                  , mecc_effect=1.0
+                                  , base_make_intervention_prob=0.0
+                                  , visit_prob=1.0
+                                  , mecc_trained=True
+                                  , seed=42)
+    model.step()
+
+    assert model.services.contacts_made.sum() == 100
+    assert model.services.interventions_made.sum() == 100
+    assert (model.services.contacts_made > 0).all()
+    assert (model.people.interventions_received == 1).all()
+
+def test_quit_and_relapse_mechanics(smoke_model_params):
+    """Test that everyone quits with certain quit attempts and nobody relapses without relapse risk"""
+    params = {
+        **smoke_model_params,
+        "visit_prob": 0.0,
+        "initial_smoking_prob": 1.0,
+        "quit_attempt_prob": 1.0,
+        "base_smoke_relapse_prob": 0.0
+    }
+    model = Vectorized_SmokeModel_MECC_Model(**params)
+    for _ in range(4):
+        model.step()
+
+    data = model.datacollector.get_model_vars_dataframe()
+    assert data["Total Smoking"].tolist() == [100, 0, 0, 0]
+    assert data["Total Quit Smoking"].iloc[-1] == 100
+    assert data["Average Months Smoke Free"].tolist() == [0, 1, 2, 3]
+
+def test_seed_reproducible(smoke_model_params):
+    """Test that the same seed gives the same results"""
+    results = []
+    for _ in range(2):
+        model = Vectorized_SmokeModel_MECC_Model(**smoke_model_params)
+        for _ in range(6):
+            model.step()
+        results.append(model.datacollector.get_model_vars_dataframe())
+
+    assert results[0].equals(results[1])
+
+def test_create_model_selects_engine():
+    """Test that create_MECC_model builds the requested engine"""
+    model_parameters = {
+        "model_seed": 42,
+        "N_people": 50,
+        "N_service": 1,
+        "visit_prob": 0.1,
+        "base_make_intervention_prob": 0.1,
+        "mecc_effect": 0.9
+    }
+    model = create_MECC_model(model_parameters, model_type='Generic', engine='Vectorized')
+    assert isinstance(model.people.visit_prob, np.ndarray)
+
+    with pytest.raises(ValueError):
+        create_MECC_model(model_parameters, model_type='Generic', engine='Unknown')